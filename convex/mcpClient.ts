@@ -56,6 +56,12 @@ const DEFAULT_RETRY_CONFIG: RetryConfig = {
   backoffMultiplier: 2,
 };
 
+/**
+ * Progress notifications restart a tool call's timeout; this many timeouts
+ * is the most a call may take in total, however often the server reports.
+ */
+const MAX_TOTAL_TIMEOUT_MULTIPLIER = 10;
+
 /**
  * Sleep utility for retry delays
  */
@@ -511,19 +517,53 @@ async function invokeMCPToolDirect(
       );
     }
 
-    // Call the tool with timeout
-    const result = await Promise.race( [
-      client.callTool( {
-        name: toolName,
-        arguments: parameters,
-      } ),
-      new Promise( ( _, reject ) =>
-        setTimeout( () => reject( new Error( "MCP tool invocation timeout" ) ), timeout )
-      ),
-    ] );
+    // Call the tool with timeout. Servers that stream partial results as
+    // progress notifications (e.g. fetch_documentation, one page at a time)
+    // restart the timeout with every notification, up to a total cap, and
+    // pages that arrived before a timeout or any other failure are returned
+    // instead of being thrown away.
+    const partialResults: string[] = [];
+    let result: any;
+    try {
+      result = await client.callTool(
+        {
+          name: toolName,
+          arguments: parameters,
+        },
+        undefined,
+        {
+          timeout,
+          resetTimeoutOnProgress: true,
+          maxTotalTimeout: timeout * MAX_TOTAL_TIMEOUT_MULTIPLIER,
+          onprogress: ( progress: { progress: number; total?: number; message?: string } ) => {
+            if ( progress.message ) {
+              partialResults.push( progress.message );
+            }
+            console.log(
+              `MCP progress (${server.name}/${toolName}): ${progress.progress}/${progress.total ?? "?"}`
+            );
+          },
+        }
+      );
+    } catch ( error: any ) {
+      // -32001 is the SDK's RequestTimeout error code
+      const timedOut = error?.code === -32001;
+      if ( partialResults.length > 0 ) {
+        const reason = timedOut ? "timed out" : `failed: ${error?.message ?? String( error )}`;
+        console.warn( `MCP tool ${server.name}/${toolName} ${reason}; returning ${partialResults.length} partial results` );
+        return `${partialResults.join( "\n" )}\n[Incomplete: the tool call ${reason}]`;
+      }
+      if ( timedOut ) {
+        throw new Error( "MCP tool invocation timeout" );
+      }
+      throw error;
+    }
 
-    // Return the result content
-    return result.content?.[0]?.text || result;
+    // Return the result content (tools may return one text block per item)
+    const texts = ( result.content || [] )
+      .filter( ( part: any ) => part.type === "text" )
+      .map( ( part: any ) => part.text );
+    return texts.length > 0 ? texts.join( "\n" ) : result;
   } catch ( error: any ) {
     console.error( `MCP invocation error (${server.name}/${toolName}):`, error );
     throw error;
@@ -90,8 +90,13 @@ const BUILT_IN_MCP_SERVERS: BuiltInMcpServer[] = [
     status: "connected",
     availableTools: [
       { name: "fetch_url", description: "Fetch and clean a web page" },
-      { name: "parse_llms_txt", description: "Parse an llms.txt file and extract links" },
-      { name: "fetch_documentation", description: "Fetch multiple documentation pages from llms.txt" },
+      { name: "fetch_urls", description: "Fetch and clean several web pages in one call" },
+      { name: "parse_llms_txt", description: "List documentation links from an llms.txt file or sitemap" },
+      { name: "fetch_documentation", description: "Fetch multiple documentation pages from llms.txt or a sitemap" },
+      { name: "search_docs", description: "Search fetched documentation for relevant passages" },
+      { name: "get_chunks", description: "Return chunks of fetched documentation pages by ID" },
+      { name: "cache_stats", description: "Show document cache hit/miss counters" },
+      { name: "export_snapshot", description: "Write fetched documentation to a snapshot file" },
     ],
     createdAt: Date.now(),
     updatedAt: Date.now(),
@@ -0,0 +1,101 @@
+"""Benchmark the pooled keep-alive transport against plain urllib.
+
+Starts a local HTTP/1.1 server and fetches the same set of pages
+sequentially, once with urllib.request.urlopen (new connection per request)
+and once through the asyncio ConnectionPool. ``--connect-delay`` makes the server stall
+on every new connection to model the TCP+TLS handshake round trips of a
+remote docs host.
+
+Usage:
+    python benchmarks/bench_transport.py [--requests 200] [--connect-delay 0.02]
+"""
+
+import argparse
+import asyncio
+import http.server
+import threading
+import time
+import urllib.request
+
+from mcp_document_fetcher.transport import ConnectionPool
+
+PAGE = (
+    b"<html><head><title>Bench</title></head><body>" + b"<p>lorem ipsum dolor sit amet</p>\n" * 400 + b"</body></html>"
+)
+
+
+def _serve(connect_delay: float) -> tuple[http.server.ThreadingHTTPServer, list[int]]:
+    accepted = [0]
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Like production servers; otherwise Nagle + delayed ACKs stall reused connections
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            accepted[0] += 1
+            time.sleep(connect_delay)
+            super().setup()
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(PAGE)))
+            self.end_headers()
+            self.wfile.write(PAGE)
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, accepted
+
+
+async def _run(label: str, fetch, urls: list[str], accepted: list[int]) -> None:
+    before = accepted[0]
+    start = time.perf_counter()
+    for url in urls:
+        await fetch(url)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<10} {len(urls) / elapsed:9.1f} req/s  "
+        f"{elapsed / len(urls) * 1000:7.2f} ms/req  {accepted[0] - before:4d} connections"
+    )
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--connect-delay", type=float, default=0.0, help="seconds to stall each new connection")
+    args = parser.parse_args()
+
+    server, accepted = _serve(args.connect_delay)
+    urls = [f"http://127.0.0.1:{server.server_port}/page/{i}" for i in range(args.requests)]
+
+    async def urllib_fetch(url: str) -> bytes:
+        with urllib.request.urlopen(url, timeout=30) as r:
+            return r.read()
+
+    pool = ConnectionPool()
+
+    async def pooled_fetch(url: str) -> bytes:
+        async with pool.open(url, {}, 30) as r:
+            chunks = []
+            while chunk := await r.read(64 * 1024):
+                chunks.append(chunk)
+            return b"".join(chunks)
+
+    await _run("urllib", urllib_fetch, urls, accepted)
+    await _run("pooled", pooled_fetch, urls, accepted)
+    pool.close()
+    server.shutdown()
+
+
+def main() -> None:
+    asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    main()
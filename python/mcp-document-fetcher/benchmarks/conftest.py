@@ -0,0 +1,140 @@
+"""Offline fixtures for the document fetcher benchmarks.
+
+Pages are built from the templates in fixtures/ (a typical docs page with
+navigation, scripts, code samples and tables) at a few sizes, with seeded
+pseudo-random prose so no two pages are near-duplicates. A local HTTP/1.1
+server serves them together with an llms.txt listing them.
+
+The caches, search index and politeness limits are disabled so every
+benchmark round measures a cold fetch and clean.
+"""
+
+import asyncio
+import http.server
+import os
+import random
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+import pytest
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+os.environ.setdefault("MCP_DOCFETCH_CACHE_DIR", tempfile.mkdtemp(prefix="docfetch-bench-"))
+os.environ.setdefault("MCP_DOCFETCH_CACHE_MAX_BYTES", "0")
+os.environ.setdefault("MCP_DOCFETCH_PAGE_CACHE_MAX_BYTES", "0")
+os.environ.setdefault("MCP_DOCFETCH_SEARCH_INDEX", "0")
+os.environ.setdefault("MCP_DOCFETCH_RATE_LIMIT", "0")
+os.environ.setdefault("MCP_DOCFETCH_ROBOTS_TXT", "0")
+
+FIXTURES = Path(__file__).parent / "fixtures"
+# Sections per page for each size (a section is roughly 1.5 KB of HTML)
+SIZES = {"small": 2, "medium": 32, "large": 512}
+# Pages listed in the fixture llms.txt, cycling through the sizes
+LLMS_TXT_PAGES = 48
+
+_SYLLABLES = "ka lo mi re tu san ver pol dex an or ix fen gra tho bu lie nom qua zer".split()
+_VOCABULARY = [
+    "".join(random.Random(i).choice(_SYLLABLES) for _ in range(1 + i % 3)) + str(i % 7 or "") for i in range(4000)
+]
+# Zipf-like word frequencies, as in natural prose
+_WEIGHTS = [1 / rank for rank in range(1, len(_VOCABULARY) + 1)]
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choices(_VOCABULARY, _WEIGHTS, k=words)).capitalize() + "."
+
+
+def build_page(size: str, seed: int) -> bytes:
+    """Render a fixture page of the given size; the seed varies its prose."""
+    rng = random.Random(seed)
+    section = (FIXTURES / "section.html").read_text()
+    sections = []
+    for n in range(SIZES[size]):
+        html = section
+        for key, value in (
+            ("{n}", str(n)),
+            ("{ident}", "_".join(rng.choices(_VOCABULARY, k=2))),
+            ("{heading}", _sentence(rng, 3)[:-1]),
+            ("{para1}", " ".join(_sentence(rng, 12) for _ in range(4))),
+            *((f"{{para{i}}}", _sentence(rng, 10)) for i in range(2, 7)),
+        ):
+            html = html.replace(key, value)
+        sections.append(html)
+    page = (FIXTURES / "page.html").read_text()
+    page = page.replace("{title}", f"Guide {seed} ({size})").replace("{sections}", "".join(sections))
+    return page.encode()
+
+
+def build_llms_txt(base_url: str, pages: int = LLMS_TXT_PAGES) -> bytes:
+    """Render an llms.txt linking to pages fixture pages of cycling sizes under base_url."""
+    sizes = list(SIZES)
+    lines = ["# Example SDK", "", "> Documentation for the Example SDK.", "", "## Docs", ""]
+    for i in range(pages):
+        size = sizes[i % len(sizes)]
+        lines.append(f"- [Guide {i}]({base_url}/docs/{size}/{i}.html): {_sentence(random.Random(i), 6)}")
+    return "\n".join(lines).encode()
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    bodies: dict[str, tuple[bytes, str]] = {}
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        found = self.bodies.get(self.path)
+        if found is None:
+            parts = self.path.strip("/").split("/")
+            if len(parts) == 3 and parts[0] == "docs" and parts[1] in SIZES and parts[2].endswith(".html"):
+                found = (build_page(parts[1], int(parts[2][:-5])), "text/html; charset=utf-8")
+                self.bodies[self.path] = found
+        if found is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body, content_type = found
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture(scope="session")
+def fixture_server():
+    """Base URL of the local fixture server."""
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    _Handler.bodies = {"/llms.txt": (build_llms_txt(base_url), "text/plain; charset=utf-8")}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield base_url
+    server.shutdown()
+
+
+@pytest.fixture(scope="session")
+def event_loop_runner():
+    """Run coroutines on one long-lived loop, so pooled connections survive between rounds."""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+@pytest.fixture(autouse=True)
+def peak_rss(request):
+    """Record the process's peak RSS after each benchmark in its extra_info."""
+    yield
+    benchmark = request.node.funcargs.get("benchmark")
+    if benchmark is not None and resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and KiB elsewhere
+        benchmark.extra_info["peak_rss_mib"] = round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
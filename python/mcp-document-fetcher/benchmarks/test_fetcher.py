@@ -0,0 +1,101 @@
+"""Benchmarks for parsing, cleaning and fetching documentation.
+
+Runs offline against the fixture server from conftest.py. Needs
+pytest-benchmark (``pip install -e '.[bench]'``):
+
+    pytest benchmarks/ --benchmark-columns=min,median,max,ops
+    pytest benchmarks/ --benchmark-autosave        # then compare with --benchmark-compare
+
+Each benchmark's extra_info holds throughput (bytes or pages per second of
+the median round) and the process's peak RSS so far; benchmarks run from
+small to large inputs, so the RSS of the large ones is the one to watch.
+"""
+
+import re
+from html import unescape
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from conftest import SIZES, LLMS_TXT_PAGES, build_page  # noqa: E402
+
+from mcp_document_fetcher import server  # noqa: E402
+
+
+# The regex cleaner the streaming extractor replaced, kept as the reference point
+_HTML_BLOCK = re.compile(r"(?is)<(script|style|noscript).*?>.*?</\1>")
+_TAG = re.compile(r"(?s)<[^>]+>")
+_TITLE_TAG = re.compile(r"(?is)<title[^>]*>(.*?)</title>")
+
+
+def _regex_html_to_text(raw_html: str) -> tuple[str, str | None]:
+    """Text and <title> of a page as the original regex pipeline extracted them."""
+    stripped = unescape(_TAG.sub(" ", _HTML_BLOCK.sub("", raw_html)))
+    text = "\n".join(line for line in (line.strip() for line in stripped.splitlines()) if line)
+    match = _TITLE_TAG.search(raw_html)
+    return text, unescape(match.group(1)).strip() if match else None
+
+
+def _record_throughput(benchmark, unit: str, amount: float) -> None:
+    # No stats with --benchmark-disable: the function ran once, untimed
+    if benchmark.stats is None:
+        return
+    median = benchmark.stats.stats.median
+    benchmark.extra_info[f"{unit}_per_second"] = round(amount / median, 1) if median else None
+
+
+def test_parse_llms_txt(benchmark, fixture_server, event_loop_runner):
+    links = benchmark(lambda: event_loop_runner(server.parse_llms_txt(f"{fixture_server}/llms.txt")))
+
+    assert len(links) == LLMS_TXT_PAGES
+    _record_throughput(benchmark, "links", len(links))
+
+
+@pytest.mark.parametrize("size", list(SIZES))
+def test_html_to_text(benchmark, size):
+    html = build_page(size, seed=1).decode()
+
+    benchmark.group = f"html_to_text-{size}"
+    text = benchmark(server._html_to_text, html)
+
+    assert "Guide 1" in text
+    assert "gtag" not in text
+    _record_throughput(benchmark, "bytes", len(html))
+
+
+@pytest.mark.parametrize("size", list(SIZES))
+def test_html_to_text_regex_baseline(benchmark, size):
+    """The original regex cleaner on the same pages, in the same group as test_html_to_text."""
+    html = build_page(size, seed=1).decode()
+
+    benchmark.group = f"html_to_text-{size}"
+    text, title = benchmark(_regex_html_to_text, html)
+
+    assert text == server._html_to_text(html)
+    assert title.startswith("Guide 1")
+    _record_throughput(benchmark, "bytes", len(html))
+
+
+@pytest.mark.parametrize("size", list(SIZES))
+def test_fetch_and_clean(benchmark, fixture_server, event_loop_runner, size):
+    url = f"{fixture_server}/docs/{size}/1.html"
+
+    page = benchmark(lambda: event_loop_runner(server.fetch_and_clean(url)))
+
+    assert page.title.startswith("Guide 1")
+    assert page.chunks
+    _record_throughput(benchmark, "bytes", len(build_page(size, seed=1)))
+
+
+def test_fetch_documentation(benchmark, fixture_server, event_loop_runner):
+    arguments = {"llms_txt_url": f"{fixture_server}/llms.txt", "max_pages": LLMS_TXT_PAGES}
+
+    blocks = benchmark.pedantic(
+        lambda: event_loop_runner(server.call_tool("fetch_documentation", arguments)), rounds=5, warmup_rounds=1
+    )
+
+    # Every fixture page has its own prose, so none may collapse as a duplicate
+    assert f"fetched {LLMS_TXT_PAGES} pages, 0 duplicates collapsed" in blocks[0].text
+    assert not any("\nError: " in block.text for block in blocks)
+    _record_throughput(benchmark, "pages", LLMS_TXT_PAGES)
@@ -5,6 +5,14 @@ Provides tools for fetching and cleaning web documentation.
 
 __version__ = "0.1.0"
 
-from .server import app, main
-
 __all__ = ["app", "main", "__version__"]
+
+
+def __getattr__(name: str):
+    # Import the server on first use, so worker processes that only need the
+    # cleaning modules do not build its caches, index and connection pool
+    if name in ("app", "main"):
+        from . import server
+
+        return getattr(server, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
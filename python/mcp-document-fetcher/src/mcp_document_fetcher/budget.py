@@ -0,0 +1,105 @@
+"""
+Token budgets for tool output.
+
+Tools that return page text take a max_tokens argument so agents can bound
+what lands in their context. Tokens are estimated with
+chunking.estimate_tokens (about four characters per token), which is cheap
+enough to run on every page. truncate() cuts text at the last section,
+paragraph, sentence or word boundary that fits; allocate() shares a
+budget between pages in priority order, and relevance() ranks pages
+against a query to derive that order.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Sequence
+
+from .chunking import estimate_tokens
+
+# Sentence end: terminal punctuation, optional closing quotes/brackets, whitespace
+_SENTENCE_END = re.compile(r"""[.!?]["')\]]*\s""")
+_WORD = re.compile(r"\w+")
+# A cut may move back at most this fraction of the allowed text to land on a boundary
+_MAX_BACKTRACK = 0.5
+
+
+def truncate(text: str, max_tokens: int, boundaries: Sequence[int] = ()) -> str:
+    """Cut text to at most max_tokens at the best boundary available.
+
+    Boundaries are tried in order of preference: the given offsets (e.g.
+    section starts), paragraph breaks, line breaks, sentence ends and
+    spaces. Only boundaries in the last half of the allowed text count;
+    without one the text is cut mid-word.
+
+    Args:
+        text: Text to cut
+        max_tokens: Token budget for the result
+        boundaries: Offsets in text where a cut is preferred
+
+    Returns:
+        text itself if it fits, else a prefix of it (trailing whitespace removed)
+
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    limit = max(0, max_tokens) * 4
+    floor = int(limit * (1 - _MAX_BACKTRACK))
+    cut = max((offset for offset in boundaries if floor < offset <= limit), default=-1)
+    for separator in ("\n\n", "\n"):
+        if cut < 0:
+            cut = text.rfind(separator, floor, limit)
+    if cut < 0:
+        cut = max((match.end() for match in _SENTENCE_END.finditer(text, floor, limit)), default=-1)
+    if cut < 0:
+        cut = text.rfind(" ", floor, limit)
+    if cut <= 0:
+        cut = limit
+    return text[:cut].rstrip()
+
+
+def allocate(needs: Sequence[int], budget: int, order: Sequence[int] | None = None, minimum: int = 1) -> list[int]:
+    """Share a token budget between items, serving them one after another.
+
+    Items are given their whole need in priority order until the budget
+    runs out; the item where it runs out gets what is left if that is at
+    least minimum, and every later item gets nothing.
+
+    Args:
+        needs: Tokens each item needs in full
+        budget: Tokens to share
+        order: Item indexes by priority (default: index order)
+        minimum: Smallest partial share worth giving
+
+    Returns:
+        Tokens granted to each item, indexed like needs
+
+    """
+    granted = [0] * len(needs)
+    left = max(0, budget)
+    for index in range(len(needs)) if order is None else order:
+        share = min(needs[index], left)
+        if share < needs[index] and share < minimum:
+            break
+        granted[index] = share
+        left -= share
+        if share < needs[index]:
+            break
+    return granted
+
+
+def relevance(query: str, texts: Sequence[str]) -> list[float]:
+    """Score texts against a query: sum of log(1 + tf) * idf over the query's words.
+
+    A cheap stand-in for BM25 over a handful of pages, used to decide which
+    pages get a token budget first.
+    """
+    terms = {word.lower() for word in _WORD.findall(query)}
+    if not terms:
+        return [0.0] * len(texts)
+    counts = [Counter(word for word in map(str.lower, _WORD.findall(text)) if word in terms) for text in texts]
+    documents = Counter(term for count in counts for term in count)
+    return [
+        sum(math.log1p(tf) * math.log(1 + len(texts) / documents[term]) for term, tf in count.items())
+        for count in counts
+    ]
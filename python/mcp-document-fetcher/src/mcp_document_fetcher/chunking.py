@@ -0,0 +1,163 @@
+"""
+Heading-aware chunking of cleaned pages.
+
+A page is first cut into sections at its headings (markdown ``#`` lines or
+HTML <h1>-<h6>, whose offsets the HTML extractor records), then sections
+larger than the token budget are split on line boundaries into overlapping
+windows. Every chunk carries a stable ID derived from the page URL and body
+digest, its heading path and its character offsets in the page content.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass
+
+# Closing "#"s are stripped in code: a lazy (.+?)[ \t#]*$ backtracks quadratically
+_MD_HEADING = re.compile(r"(#{1,6})[ \t]+(.+)")
+_FENCE = re.compile(r"^(```|~~~)")
+
+
+@dataclass
+class Chunk:
+    """A passage of a page.
+
+    Attributes:
+        id: Stable ID, unique per (URL, body digest, position)
+        index: Position of the chunk within the page
+        heading: Heading path of the enclosing section ("A > B"), or ""
+        start: Offset of the first character in the page content
+        end: Offset one past the last character in the page content
+        tokens: Estimated token count
+    """
+
+    id: str
+    index: int
+    heading: str
+    start: int
+    end: int
+    tokens: int
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (about four characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def markdown_headings(text: str) -> list[tuple[int, int, str]]:
+    """Find ATX headings outside fenced code blocks.
+
+    Returns:
+        (offset, level, title) for each heading line
+
+    """
+    headings = []
+    offset = 0
+    in_fence = False
+    for line in text.splitlines(keepends=True):
+        stripped = line.strip()
+        if _FENCE.match(stripped):
+            in_fence = not in_fence
+        elif not in_fence:
+            match = _MD_HEADING.match(stripped)
+            if match:
+                title = match.group(2)
+                title = title[0] + title[1:].rstrip(" \t#")
+                headings.append((offset + len(line) - len(line.lstrip()), len(match.group(1)), title))
+        offset += len(line)
+    return headings
+
+
+def _line_spans(text: str, start: int, end: int) -> list[tuple[int, int]]:
+    """(start, end) offsets of the lines of text[start:end], newlines excluded."""
+    spans = []
+    while start < end:
+        newline = text.find("\n", start, end)
+        stop = end if newline == -1 else newline
+        spans.append((start, stop))
+        start = stop + 1
+    return spans
+
+
+def _windows(text: str, start: int, end: int, max_tokens: int, overlap_tokens: int) -> list[tuple[int, int]]:
+    """Split text[start:end] into line-aligned windows of at most max_tokens.
+
+    Consecutive windows share up to overlap_tokens worth of trailing lines.
+    A single line longer than the budget is cut at character boundaries.
+    """
+    max_chars = max(1, max_tokens * 4)
+    lines: list[tuple[int, int]] = []
+    for line_start, line_end in _line_spans(text, start, end):
+        while line_end - line_start > max_chars:
+            lines.append((line_start, line_start + max_chars))
+            line_start += max_chars
+        lines.append((line_start, line_end))
+    tokens = [estimate_tokens(text[line_start:line_end]) + 1 for line_start, line_end in lines]
+
+    windows = []
+    first = 0
+    while first < len(lines):
+        last, used = first, tokens[first]
+        while last + 1 < len(lines) and used + tokens[last + 1] <= max_tokens:
+            last += 1
+            used += tokens[last]
+        windows.append((lines[first][0], lines[last][1]))
+        if last + 1 >= len(lines):
+            break
+        # Step back over trailing lines that fit in the overlap budget
+        next_first, shared = last + 1, 0
+        while next_first - 1 > first and shared + tokens[next_first - 1] <= overlap_tokens:
+            next_first -= 1
+            shared += tokens[next_first]
+        first = next_first
+    return windows
+
+
+def chunk_text(
+    url: str,
+    digest: str,
+    text: str,
+    headings: list[tuple[int, int, str]],
+    max_tokens: int,
+    overlap_tokens: int,
+) -> list[Chunk]:
+    """Split a cleaned page into heading-aligned, token-budgeted chunks.
+
+    Args:
+        url: Page URL (part of the chunk IDs)
+        digest: Digest of the raw body (part of the chunk IDs)
+        text: Cleaned page content
+        headings: (offset, level, title) of each heading in text, in order
+        max_tokens: Token budget per chunk
+        overlap_tokens: Tokens shared between consecutive chunks of a section
+
+    Returns:
+        Chunks in document order
+
+    """
+    prefix = hashlib.sha1(f"{url}\0{digest}".encode()).hexdigest()[:12]
+    boundaries = [(0, 0, "")] + [h for h in headings if 0 < h[0] < len(text)]
+    if headings and headings[0][0] == 0:
+        boundaries[0] = headings[0]
+
+    chunks: list[Chunk] = []
+    path: list[tuple[int, str]] = []
+    for i, (start, level, title) in enumerate(boundaries):
+        end = boundaries[i + 1][0] if i + 1 < len(boundaries) else len(text)
+        if level:
+            path = [(lvl, name) for lvl, name in path if lvl < level] + [(level, title)]
+        heading = " > ".join(name for _, name in path)
+        for window_start, window_end in _windows(text, start, end, max_tokens, overlap_tokens):
+            body = text[window_start:window_end]
+            if not body.strip():
+                continue
+            chunks.append(
+                Chunk(
+                    id=f"{prefix}-{len(chunks)}",
+                    index=len(chunks),
+                    heading=heading,
+                    start=window_start,
+                    end=window_end,
+                    tokens=estimate_tokens(body),
+                )
+            )
+    return chunks
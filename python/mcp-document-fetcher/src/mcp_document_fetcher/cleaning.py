@@ -0,0 +1,227 @@
+"""
+CPU-bound cleaning of fetched pages.
+
+clean_body() turns a raw response body into cleaned text, a title,
+heading-aware chunks and duplicate-detection fingerprints. It depends on nothing
+but its arguments and the pure parsing modules, so it can run in a worker
+thread or, for large batches, in a worker process (see process_pool) with
+the body handed over as bytes.
+
+body_kind() picks the extraction path from the Content-Type header, falling
+back to the first SNIFF_BYTES of the body: HTML is parsed, markdown passes
+through without its front matter, JSON is pretty-printed (or outlined when
+large) and anything else is kept as plain text.
+
+Bodies are cleaned once fully read: the raw bytes are needed whole for the
+body digest, the HTTP cache and the hand-off to worker processes, so the
+HTML extractor is fed decoded chunks of the buffered body rather than reads
+from the socket, and peak memory follows the body size (at most MAX_BYTES).
+"""
+
+import codecs
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Iterator
+from urllib.parse import urlsplit
+
+from .chunking import Chunk, chunk_text, markdown_headings
+from .dedup import content_hash, simhash
+from .html_text import extract
+
+# Bodies are decoded and parsed in chunks of this many bytes
+DECODE_CHUNK_SIZE = 64 * 1024
+# Leading bytes sniffed when the Content-Type is missing, generic or text/plain
+# (which servers also use for HTML and markdown)
+SNIFF_BYTES = 4096
+# JSON bodies up to this size are pretty-printed; larger ones are outlined
+JSON_PRETTY_MAX_BYTES = 64 * 1024
+# Nesting levels and keys per object shown in a JSON outline
+JSON_OUTLINE_DEPTH = 4
+JSON_OUTLINE_KEYS = 50
+
+# An HTML document opens (after whitespace, a BOM and comments) with one of these tags
+_HTML_START = re.compile(
+    rb"(?is)(?:\xef\xbb\xbf)?\s*(?:<!--(?:(?!-->).)*-->\s*)*<(?:!doctype\s+html|html|head|body)[\s>]"
+)
+_HTML_TYPES = ("text/html", "application/xhtml+xml")
+_MARKDOWN_TYPES = ("text/markdown", "text/x-markdown")
+_MARKDOWN_SUFFIXES = (".md", ".markdown", ".mdx")
+# YAML (---) or TOML (+++) front matter at the very start of a markdown file
+_FRONT_MATTER = re.compile(r"\A(---|\+\+\+)[ \t]*\r?\n(.*?)^(?:\1|\.\.\.)[ \t]*(?:\r?\n|\Z)", re.S | re.M)
+_FRONT_MATTER_TITLE = re.compile(r"""^title[ \t]*[:=][ \t]*["']?(.*?)["']?[ \t]*$""", re.M)
+
+
+@dataclass
+class CleanedBody:
+    """The cleaned form of a response body.
+
+    Attributes:
+        title: <title>, og:title or first <h1>, else the last URL path segment
+        content: Cleaned text
+        chunks: Heading-aware chunks of content
+        content_hash: Hash of content, for exact duplicate detection
+        simhash: SimHash fingerprint of content, for near duplicates
+    """
+
+    title: str
+    content: str
+    chunks: list[Chunk]
+    content_hash: str
+    simhash: int
+
+
+def iter_text(body: bytes, charset: str, chunk_size: int = DECODE_CHUNK_SIZE):
+    """Decode a body incrementally, yielding text chunks of about chunk_size bytes."""
+    decoder = codecs.getincrementaldecoder(charset)(errors="ignore")
+    view = memoryview(body)
+    for start in range(0, len(body), chunk_size):
+        yield decoder.decode(view[start : start + chunk_size])
+    yield decoder.decode(b"", final=True)
+
+
+def body_kind(url: str, body: bytes, content_type: str | None) -> str:
+    """Decide how to extract a body.
+
+    A specific Content-Type (HTML, markdown or JSON) is trusted. Otherwise
+    a markdown file extension or front matter means markdown, and only the
+    first SNIFF_BYTES bytes are looked at: a body opening with an HTML
+    doctype or <html>, <head> or <body> tag is HTML (tags further in, such
+    as markup quoted in text, do not count), and a missing or generic type
+    with a body starting like JSON (or a .json URL) means JSON.
+
+    Args:
+        url: URL the body was fetched from
+        body: Raw response body
+        content_type: Content-Type header, if any
+
+    Returns:
+        "html", "markdown", "json" or "text"
+
+    """
+    media = (content_type or "").split(";", 1)[0].strip().lower()
+    if media in _HTML_TYPES:
+        return "html"
+    if media in _MARKDOWN_TYPES:
+        return "markdown"
+    if media == "application/json" or media.endswith("+json"):
+        return "json"
+    head = body[:SNIFF_BYTES]
+    path = urlsplit(url).path.lower()
+    if path.endswith(_MARKDOWN_SUFFIXES) or head.startswith((b"---", b"+++")):
+        return "markdown"
+    if _HTML_START.match(head):
+        return "html"
+    if media.startswith("text/"):
+        return "text"
+    if path.endswith(".json") or head.lstrip()[:1] in (b"{", b"["):
+        return "json"
+    return "text"
+
+
+def strip_front_matter(text: str) -> tuple[str, str | None]:
+    """Remove YAML or TOML front matter from markdown.
+
+    Returns:
+        The text without front matter, and the front matter's title if it has one
+
+    """
+    match = _FRONT_MATTER.match(text)
+    if not match:
+        return text, None
+    title = _FRONT_MATTER_TITLE.search(match.group(2))
+    return text[match.end() :].lstrip("\r\n"), (title.group(1) or None) if title else None
+
+
+def _json_outline(value: Any, key: str, depth: int = 0) -> Iterator[str]:
+    """Outline lines of a JSON value: types and sizes, scalars, and the first item of each array."""
+    indent = "  " * depth
+    if isinstance(value, dict):
+        yield f"{indent}- {key}: object ({len(value)} keys)"
+        if depth < JSON_OUTLINE_DEPTH:
+            for name, item in list(value.items())[:JSON_OUTLINE_KEYS]:
+                yield from _json_outline(item, name, depth + 1)
+            if len(value) > JSON_OUTLINE_KEYS:
+                yield f"{indent}  - ({len(value) - JSON_OUTLINE_KEYS} more keys)"
+    elif isinstance(value, list):
+        yield f"{indent}- {key}: array ({len(value)} items)"
+        if value and depth < JSON_OUTLINE_DEPTH:
+            yield from _json_outline(value[0], "[0]", depth + 1)
+    else:
+        scalar = json.dumps(value, ensure_ascii=False)
+        yield f"{indent}- {key}: {scalar[:80] + '...' if len(scalar) > 80 else scalar}"
+
+
+def format_json(text: str) -> str | None:
+    """Pretty-print a JSON document, or outline it if it is larger than JSON_PRETTY_MAX_BYTES.
+
+    Returns:
+        The formatted document, or None if text is not valid JSON
+
+    """
+    try:
+        value = json.loads(text)
+    except ValueError:
+        return None
+    if len(text) <= JSON_PRETTY_MAX_BYTES:
+        return json.dumps(value, indent=2, ensure_ascii=False)
+    return f"JSON document ({len(text)} characters), outline:\n\n" + "\n".join(_json_outline(value, "$"))
+
+
+def clean_body(
+    url: str,
+    body: bytes,
+    charset: str,
+    digest: str,
+    chunk_tokens: int,
+    chunk_overlap: int,
+    content_type: str | None = None,
+) -> CleanedBody:
+    """Clean a raw response body.
+
+    HTML is decoded and parsed chunk by chunk in a single pass that yields
+    the text, the title and the heading offsets. Other bodies are decoded
+    as a whole and take a fast path chosen by body_kind(): markdown loses
+    its front matter and is titled by it or its first level-1 heading,
+    JSON is formatted, and plain text is kept as is. The text is then split
+    into heading-aware chunks.
+
+    Args:
+        url: URL the body was fetched from
+        body: Raw response body
+        charset: Codec name to decode the body with
+        digest: SHA-256 hex digest of the body, used in chunk IDs
+        chunk_tokens: Token budget per chunk
+        chunk_overlap: Tokens shared between consecutive chunks of a section
+        content_type: Content-Type header of the response, if any
+
+    Returns:
+        The cleaned body
+
+    """
+    fallback_title = url.rsplit("/", 1)[-1] or url
+    kind = body_kind(url, body, content_type)
+    if kind == "html":
+        extractor = extract(iter_text(body, charset))
+        title = extractor.title or fallback_title
+        content, headings = extractor.text, extractor.headings
+    else:
+        title = fallback_title
+        content = "".join(iter_text(body, charset))
+        formatted = format_json(content) if kind == "json" else None
+        if formatted is not None:
+            content, headings = formatted, []
+        elif kind == "markdown":
+            content, front_title = strip_front_matter(content)
+            headings = markdown_headings(content)
+            title = front_title or next((text for _, level, text in headings if level == 1), title)
+        else:
+            # Plain text (llms.txt files among it) keeps markdown-style headings for chunking
+            headings = markdown_headings(content)
+    return CleanedBody(
+        title=title,
+        content=content,
+        chunks=chunk_text(url, digest, content, headings, chunk_tokens, chunk_overlap),
+        content_hash=content_hash(content),
+        simhash=simhash(content),
+    )
@@ -0,0 +1,125 @@
+"""
+Persistent state for incremental documentation crawls.
+
+For every llms.txt URL crawled with ``incremental`` set, the link set of the
+last run is stored together with each page's body digest and HTTP
+validators. The next run diffs the new link list against it, revalidates
+known pages with conditional requests and only downloads and cleans pages
+that were added or actually changed, so refresh cost follows churn rather
+than corpus size.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawl_pages (
+    source TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (source, url)
+);
+"""
+
+
+@dataclass
+class PageState:
+    """What the previous crawl knew about one linked page.
+
+    Attributes:
+        url: Page URL as listed in llms.txt
+        title: Link title
+        digest: SHA-256 hex digest of the body ("" if never downloaded)
+        etag: ETag validator, if the server sent one
+        last_modified: Last-Modified validator, if the server sent one
+    """
+
+    url: str
+    title: str
+    digest: str
+    etag: str | None = None
+    last_modified: str | None = None
+
+    def conditional_headers(self) -> dict[str, str]:
+        """Return the If-None-Match / If-Modified-Since headers for revalidation."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class CrawlState:
+    """SQLite store of per-llms.txt link sets, digests and validators.
+
+    The database is opened lazily on first use; all access is serialised by
+    a lock so it can be used from worker threads.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        """Create a store backed by the SQLite file at path."""
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+            self._db = db
+        return self._db
+
+    def load(self, source: str) -> dict[str, PageState]:
+        """Return the pages recorded for an llms.txt URL, keyed by page URL."""
+        with self._lock:
+            rows = (
+                self._conn()
+                .execute(
+                    "SELECT url, title, digest, etag, last_modified FROM crawl_pages WHERE source = ?",
+                    (source,),
+                )
+                .fetchall()
+            )
+        return {row[0]: PageState(*row) for row in rows}
+
+    def save(self, source: str, links: list[str], pages: list[PageState]) -> None:
+        """Record the outcome of a crawl.
+
+        Args:
+            source: llms.txt URL
+            links: Every page URL the llms.txt currently lists; recorded
+                pages not among them are forgotten
+            pages: States of the pages that were (re)fetched in this run;
+                other listed pages keep their previous state
+
+        """
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            db.execute("BEGIN")
+            try:
+                known = {url for (url,) in db.execute("SELECT url FROM crawl_pages WHERE source = ?", (source,))}
+                db.executemany(
+                    "DELETE FROM crawl_pages WHERE source = ? AND url = ?",
+                    [(source, url) for url in known - set(links)],
+                )
+                db.executemany(
+                    "INSERT OR REPLACE INTO crawl_pages "
+                    "(source, url, title, digest, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(source, p.url, p.title, p.digest, p.etag, p.last_modified, now) for p in pages],
+                )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
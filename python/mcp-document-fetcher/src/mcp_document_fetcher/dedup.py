@@ -0,0 +1,165 @@
+"""
+Duplicate detection for documentation crawls.
+
+llms.txt files often list one page under several URLs (a trailing slash,
+``index.md`` versus the directory, tracking query strings), and mirrors or
+versioned copies of a page differ only in boilerplate. canonical_url() folds
+the URL variants together so each page is fetched once; content_hash() and
+simhash() fingerprint the cleaned text so that identical and near-identical
+pages fetched under unrelated URLs can be collapsed.
+
+SimHash (Charikar) maps a document to a 64-bit fingerprint such that similar
+documents differ in few bits. Pages within MAX_DISTANCE bits are treated as
+near duplicates; splitting the fingerprint into MAX_DISTANCE + 1 bands means
+any such pair agrees exactly on at least one band, which is what lookups key
+on.
+"""
+
+import hashlib
+import re
+import sys
+from array import array
+from collections import Counter
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Fingerprints at most this many bits apart are near duplicates
+MAX_DISTANCE = 3
+# Words per shingle fed to SimHash
+SHINGLE_WORDS = 3
+BAND_BITS = 16
+BANDS = 64 // BAND_BITS
+
+_WORD = re.compile(r"\w+")
+_INDEX_FILE = re.compile(r"/index\.(?:md|html?|txt)$", re.IGNORECASE)
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+# Query parameters that never change the content of a page
+_TRACKING_PARAMS = frozenset({"ref", "source", "fbclid", "gclid", "mc_cid", "mc_eid"})
+
+
+def canonical_url(url: str) -> str:
+    """Normalise a URL so that variants of the same page compare equal.
+
+    Lowercases the scheme and host, drops default ports, fragments, tracking
+    parameters (utm_* and friends) and trailing ``index.md``/``index.html``,
+    sorts the remaining query parameters and removes trailing slashes. The
+    result is a dedup key, not necessarily a fetchable URL.
+
+    Args:
+        url: URL as listed in llms.txt
+
+    Returns:
+        Canonical form of url
+
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = _INDEX_FILE.sub("/", parts.path).rstrip("/") or "/"
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in _TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def content_hash(text: str) -> str:
+    """Hash of the cleaned text with whitespace normalised."""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def _word_hash(word: str, position: int) -> int:
+    """64-bit hash of a word at a position within a shingle (one independent table per position)."""
+    digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8, salt=bytes([position])).digest()
+    return int.from_bytes(digest, "little")
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash of the distinct word shingles of text, or 0 if text is too short.
+
+    Every distinct shingle counts once, however often it occurs: weighting by
+    occurrence would let boilerplate repeated on every section of a templated
+    page (API references, changelogs) outvote the text that tells pages apart.
+    """
+    words = _WORD.findall(text.lower())
+    if len(words) < SHINGLE_WORDS:
+        return 0
+    # Tabulation hashing: each distinct word is hashed once per shingle
+    # position, and a shingle's hash XORs the hashes of its words. That is
+    # as good as hashing whole shingles for SimHash (any two shingle hashes
+    # are independent) at a fraction of the cost of building and hashing
+    # every shingle string.
+    count = len(words) - SHINGLE_WORDS + 1
+    distinct = set(words)
+    shingles = [0] * count
+    for position in range(SHINGLE_WORDS):
+        table = {word: _word_hash(word, position) for word in distinct}
+        shingles = [value ^ table[word] for value, word in zip(shingles, words[position : position + count])]
+    # Count set bits per byte position of the distinct shingle hashes with
+    # Counter, instead of looping over 64 bits per shingle
+    packed = array("Q", set(shingles))
+    if sys.byteorder == "big":
+        packed.byteswap()
+    data = packed.tobytes()
+    total = len(packed)
+    fingerprint = 0
+    for position in range(8):
+        counts = [0] * 8
+        for value, n in Counter(data[position::8]).items():
+            for bit in range(8):
+                if value >> bit & 1:
+                    counts[bit] += n
+        for bit in range(8):
+            if 2 * counts[bit] > total:
+                fingerprint |= 1 << (position * 8 + bit)
+    return fingerprint
+
+
+def simhash_bands(fingerprint: int) -> list[int]:
+    """Split a fingerprint into BANDS values of BAND_BITS bits."""
+    mask = (1 << BAND_BITS) - 1
+    return [fingerprint >> (band * BAND_BITS) & mask for band in range(BANDS)]
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits between two fingerprints."""
+    return (a ^ b).bit_count()
+
+
+class DuplicateDetector:
+    """Remembers the pages of one crawl and spots repeats among them."""
+
+    def __init__(self, max_distance: int = MAX_DISTANCE):
+        """Treat fingerprints at most max_distance bits apart as duplicates."""
+        self.max_distance = max_distance
+        self._hashes: dict[str, str] = {}
+        self._bands: list[dict[int, list[tuple[int, str]]]] = [{} for _ in range(BANDS)]
+
+    def check(self, url: str, text_hash: str, fingerprint: int) -> str | None:
+        """Return the URL of an earlier duplicate of this page, or register it.
+
+        Args:
+            url: Page URL
+            text_hash: content_hash() of the page
+            fingerprint: simhash() of the page (0 disables near-duplicate matching)
+
+        Returns:
+            URL of the first page seen with the same or nearly the same
+            content, or None if the page is new
+
+        """
+        original = self._hashes.get(text_hash)
+        if original is not None:
+            return original
+        if fingerprint:
+            for band, value in zip(self._bands, simhash_bands(fingerprint)):
+                for other, other_url in band.get(value, ()):
+                    if hamming(fingerprint, other) <= self.max_distance:
+                        return other_url
+        self._hashes[text_hash] = url
+        if fingerprint:
+            for band, value in zip(self._bands, simhash_bands(fingerprint)):
+                band.setdefault(value, []).append((fingerprint, url))
+        return None
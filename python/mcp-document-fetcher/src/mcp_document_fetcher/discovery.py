@@ -0,0 +1,218 @@
+"""
+Discovery of documentation pages from llms.txt files and sitemaps.
+
+discover() walks an index and yields page links as soon as they are
+parsed, so fetching can start while the rest of the index is still being
+read. Supported indexes:
+
+- llms.txt: markdown links; links to other llms.txt files (per-section or
+  per-product indexes) are followed recursively
+- llms-full.txt: the documentation itself, yielded as a single page
+- sitemap.xml (optionally gzipped) and sitemap indexes, followed recursively
+
+Sitemaps are parsed incrementally with xml.etree.ElementTree.XMLPullParser
+(the feed-based form of iterparse), clearing every entry once read, so a
+sitemap with tens of thousands of URLs never exists as an element tree and
+a truncated one still yields the URLs before the cut. The body itself is
+downloaded whole before parsing starts: index fetches go through the HTTP
+cache, so an unchanged sitemap is revalidated rather than downloaded again,
+and that needs the complete body. Sitemap URLs (see is_sitemap_url) may be
+up to MAX_SITEMAP_BYTES; other indexes keep the general size limit.
+"""
+
+import logging
+import re
+import zlib
+from typing import AsyncIterator, Awaitable, Callable
+from urllib.parse import urlsplit
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+logger = logging.getLogger(__name__)
+
+# Example: "[Quickstart](https://strandsagents.com/.../index.md)"
+# Link text excludes brackets and newlines and URLs exclude whitespace and parentheses, so
+# a failed match attempt never scans past the start of the next one (linear on any input)
+_MD_LINK = re.compile(r"""\[([^\[\]\n]+)\]\((https?://[^\s()]+)(?:\s+"[^"\n]*")?\)""")
+# Nested indexes followed by discover(); llms-full.txt holds content, not links
+_LLMS_INDEX = re.compile(r"/llms\.txt$", re.IGNORECASE)
+_LLMS_FULL = re.compile(r"/llms-full\.txt$", re.IGNORECASE)
+_XML_START = re.compile(rb"\s*(?:<\?xml|<urlset|<sitemapindex)")
+_SITEMAP_PATH = re.compile(r"\.xml(?:\.gz)?$", re.IGNORECASE)
+
+# Nested llms.txt files and sitemaps are followed this many levels deep
+MAX_DEPTH = 3
+# Size limit of an index as downloaded and, for a gzipped sitemap, once
+# decompressed (the sitemaps.org limit is 50 MB)
+MAX_SITEMAP_BYTES = 64 * 1024 * 1024
+# Sitemaps are decompressed and parsed in pieces of this many bytes
+_PARSE_CHUNK = 64 * 1024
+
+
+def markdown_links(text: str) -> list[tuple[str, str]]:
+    """(title, url) of every absolute markdown link in text; the URL stands in for an empty title."""
+    return [
+        (match.group(1).strip() or match.group(2).strip(), match.group(2).strip()) for match in _MD_LINK.finditer(text)
+    ]
+
+
+def is_sitemap(body: bytes) -> bool:
+    """True if a body looks like a (possibly gzipped) sitemap rather than markdown."""
+    return body[:2] == b"\x1f\x8b" or _XML_START.match(body.lstrip(b"\xef\xbb\xbf")) is not None
+
+
+def is_sitemap_url(url: str) -> bool:
+    """True if a URL names a sitemap (a .xml or .xml.gz path), which may be fetched up to MAX_SITEMAP_BYTES."""
+    return _SITEMAP_PATH.search(urlsplit(url).path) is not None
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+class SitemapParser:
+    """Incremental parser for <urlset> sitemaps and <sitemapindex> files.
+
+    feed() bytes as they arrive; it returns the entries completed so far as
+    ("page", url) for <url> entries and ("sitemap", url) for <sitemap>
+    entries of an index.
+    """
+
+    def __init__(self):
+        self._parser = XMLPullParser(events=("start", "end"))
+        self._root = None
+
+    def feed(self, data: bytes) -> list[tuple[str, str]]:
+        """Parse more of the document and return the entries it completed.
+
+        Raises:
+            xml.etree.ElementTree.ParseError: If the XML is malformed
+        """
+        self._parser.feed(data)
+        return self._entries()
+
+    def close(self) -> list[tuple[str, str]]:
+        """Finish parsing and return the last entries."""
+        self._parser.close()
+        return self._entries()
+
+    def _entries(self) -> list[tuple[str, str]]:
+        entries = []
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = elem
+                continue
+            name = _local_name(elem.tag)
+            if name not in ("url", "sitemap"):
+                continue
+            loc = next((child.text for child in elem if _local_name(child.tag) == "loc"), None)
+            if loc and loc.strip():
+                entries.append(("page" if name == "url" else "sitemap", loc.strip()))
+            # Drop finished entries so the tree never grows past one <url>
+            self._root.clear()
+        return entries
+
+
+def _sitemap_chunks(body: bytes):
+    """Yield a sitemap body in pieces, decompressing it first if it is gzipped."""
+    if body[:2] != b"\x1f\x8b":
+        for start in range(0, len(body), _PARSE_CHUNK):
+            yield body[start : start + _PARSE_CHUNK]
+        return
+    decompressor = zlib.decompressobj(wbits=31)
+    produced = 0
+    for start in range(0, len(body), _PARSE_CHUNK):
+        data = body[start : start + _PARSE_CHUNK]
+        while data and produced < MAX_SITEMAP_BYTES:
+            chunk = decompressor.decompress(data, _PARSE_CHUNK)
+            produced += len(chunk)
+            yield chunk
+            data = decompressor.unconsumed_tail
+        if produced >= MAX_SITEMAP_BYTES:
+            logger.warning("Sitemap exceeds %d bytes decompressed, ignoring the rest", MAX_SITEMAP_BYTES)
+            return
+    # Output zlib still holds once all input is consumed
+    tail = decompressor.flush()[: MAX_SITEMAP_BYTES - produced]
+    if tail:
+        yield tail
+
+
+def _title_from_url(url: str) -> str:
+    """A title for a sitemap entry: its last path segment, else the URL."""
+    return urlsplit(url).path.rstrip("/").rsplit("/", 1)[-1] or url
+
+
+async def discover(
+    url: str,
+    fetch: Callable[[str], Awaitable[tuple[bytes, str]]],
+    max_depth: int = MAX_DEPTH,
+) -> AsyncIterator[tuple[str, str]]:
+    """Yield the (title, url) of every page an index leads to, in index order.
+
+    Each page is yielded once, however many indexes list it. A nested index
+    that cannot be fetched or parsed is logged and skipped; only a failure
+    of the root index is raised.
+
+    Args:
+        url: URL of an llms.txt, llms-full.txt, sitemap or sitemap index
+        fetch: Coroutine returning the body and charset of an index
+        max_depth: How many levels of nested indexes to follow
+
+    Raises:
+        urllib.error.URLError: If the root index cannot be fetched
+
+    """
+    seen_pages: set[str] = set()
+    async for title, link in _walk(url, fetch, max_depth, set()):
+        if link not in seen_pages:
+            seen_pages.add(link)
+            yield title, link
+
+
+async def _walk(
+    url: str, fetch: Callable[[str], Awaitable[tuple[bytes, str]]], depth: int, seen: set[str]
+) -> AsyncIterator[tuple[str, str]]:
+    if url in seen:
+        return
+    seen.add(url)
+    if _LLMS_FULL.search(urlsplit(url).path):
+        yield "llms-full.txt", url
+        return
+
+    body, charset = await fetch(url)
+    if is_sitemap(body):
+        parser = SitemapParser()
+        try:
+            for chunk in _sitemap_chunks(body):
+                for kind, loc in parser.feed(chunk):
+                    if kind == "page":
+                        yield _title_from_url(loc), loc
+                    elif depth > 0:
+                        async for link in _nested(loc, fetch, depth - 1, seen):
+                            yield link
+            for kind, loc in parser.close():
+                if kind == "page":
+                    yield _title_from_url(loc), loc
+        except (ParseError, zlib.error) as e:
+            # Keep what was parsed before the error (e.g. a truncated sitemap)
+            logger.warning("Stopped parsing sitemap %s: %s", url, e)
+        return
+
+    for title, link in markdown_links(body.decode(charset, errors="ignore")):
+        if _LLMS_INDEX.search(urlsplit(link).path):
+            if depth > 0:
+                async for nested in _nested(link, fetch, depth - 1, seen):
+                    yield nested
+        else:
+            yield title, link
+
+
+async def _nested(
+    url: str, fetch: Callable[[str], Awaitable[tuple[bytes, str]]], depth: int, seen: set[str]
+) -> AsyncIterator[tuple[str, str]]:
+    """Walk a nested index, logging and skipping it if it fails."""
+    try:
+        async for link in _walk(url, fetch, depth, seen):
+            yield link
+    except Exception as e:
+        logger.warning("Skipping index %s: %s", url, e)
@@ -0,0 +1,81 @@
+"""
+HTTP transport for the document fetcher.
+
+build_app() lets one warm process, with its caches and connection pools,
+serve many MCP clients at once:
+
+- /mcp: the streamable HTTP transport
+- /sse and /messages/: the older HTTP+SSE transport
+- /metrics: Prometheus metrics (when a registry is given)
+- /healthz: a liveness probe
+
+Starlette and uvicorn are dependencies of the mcp package.
+"""
+
+import contextlib
+from typing import AsyncIterator, Awaitable, Callable
+
+from mcp.server import Server
+from mcp.server.sse import SseServerTransport
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+from starlette.routing import Mount, Route
+from starlette.types import Receive, Scope, Send
+
+from .metrics import CONTENT_TYPE, Registry
+
+
+def build_app(
+    server: Server,
+    metrics: Registry | None = None,
+    on_shutdown: Callable[[], Awaitable[None]] | None = None,
+) -> Starlette:
+    """Build the ASGI app serving an MCP server over HTTP.
+
+    Args:
+        server: The MCP server to expose
+        metrics: Registry to serve on /metrics, if any
+        on_shutdown: Awaited once the server has stopped taking requests,
+            after every session has closed
+
+    Returns:
+        A Starlette app to run with uvicorn
+
+    """
+    session_manager = StreamableHTTPSessionManager(app=server)
+    sse = SseServerTransport("/messages/")
+
+    async def handle_streamable_http(scope: Scope, receive: Receive, send: Send) -> None:
+        await session_manager.handle_request(scope, receive, send)
+
+    async def handle_sse(request: Request) -> Response:
+        async with sse.connect_sse(request.scope, request.receive, request._send) as (read_stream, write_stream):
+            await server.run(read_stream, write_stream, server.create_initialization_options())
+        return Response()
+
+    async def healthz(request: Request) -> Response:
+        return PlainTextResponse("ok\n")
+
+    async def metrics_endpoint(request: Request) -> Response:
+        return Response(metrics.render(), media_type=CONTENT_TYPE)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette) -> AsyncIterator[None]:
+        async with session_manager.run():
+            try:
+                yield
+            finally:
+                if on_shutdown is not None:
+                    await on_shutdown()
+
+    routes = [
+        Mount("/mcp", app=handle_streamable_http),
+        Route("/sse", endpoint=handle_sse, methods=["GET"]),
+        Mount("/messages/", app=sse.handle_post_message),
+        Route("/healthz", endpoint=healthz),
+    ]
+    if metrics is not None:
+        routes.append(Route("/metrics", endpoint=metrics_endpoint))
+    return Starlette(routes=routes, lifespan=lifespan)
@@ -0,0 +1,313 @@
+"""
+Persistent HTTP cache for the document fetcher.
+
+Response bodies are stored content-addressed (by SHA-256 digest) under the
+cache directory, so identical pages served from several URLs share one blob.
+Per-URL metadata (validators, freshness, content type) and per-blob LRU
+bookkeeping live in a small SQLite database next to the blobs.
+"""
+
+import email.utils
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from email.message import Message
+from pathlib import Path
+
+# Upper bound for heuristic freshness when a response only has Last-Modified
+_MAX_HEURISTIC_TTL = 24 * 60 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    url TEXT PRIMARY KEY,
+    digest TEXT NOT NULL REFERENCES blobs(digest),
+    content_type TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_digest ON entries(digest);
+CREATE INDEX IF NOT EXISTS blobs_accessed ON blobs(accessed_at);
+"""
+
+
+@dataclass
+class CacheEntry:
+    """Metadata for one cached URL.
+
+    Attributes:
+        url: The cached URL
+        digest: SHA-256 hex digest of the body (also the blob name)
+        content_type: Content-Type header of the cached response
+        etag: ETag validator, if the server sent one
+        last_modified: Last-Modified validator, if the server sent one
+        stored_at: Time the response was stored or last revalidated
+        expires_at: Time after which the entry must be revalidated
+    """
+
+    url: str
+    digest: str
+    content_type: str | None
+    etag: str | None
+    last_modified: str | None
+    stored_at: float
+    expires_at: float
+
+    def is_fresh(self, now: float | None = None) -> bool:
+        """Return True if the entry can be served without revalidation."""
+        return (now if now is not None else time.time()) < self.expires_at
+
+    def conditional_headers(self) -> dict[str, str]:
+        """Return the If-None-Match / If-Modified-Since headers for revalidation."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def _cache_control(headers: Message) -> dict[str, str | None]:
+    """Parse the Cache-Control header into a {directive: value} dict."""
+    directives: dict[str, str | None] = {}
+    for part in ",".join(headers.get_all("Cache-Control") or []).split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') or None
+    return directives
+
+
+def _http_date(value: str | None) -> float | None:
+    """Parse an HTTP date header into a timestamp."""
+    if not value:
+        return None
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def freshness_lifetime(headers: Message, now: float) -> float | None:
+    """Compute how long a response may be served from cache.
+
+    Follows RFC 9111: max-age, then Expires, then a heuristic of 10% of the
+    time since Last-Modified.
+
+    Args:
+        headers: Response headers
+        now: Time the response was received
+
+    Returns:
+        Remaining freshness in seconds (0 means revalidate on every use), or
+        None if the response must not be stored at all
+
+    """
+    directives = _cache_control(headers)
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+
+    age = 0.0
+    try:
+        age = float(headers.get("Age", 0))
+    except ValueError:
+        pass
+
+    if "max-age" in directives:
+        try:
+            return max(0.0, float(directives["max-age"] or 0) - age)
+        except ValueError:
+            return 0.0
+
+    date = _http_date(headers.get("Date")) or now
+    expires = _http_date(headers.get("Expires"))
+    if headers.get("Expires") is not None:
+        return max(0.0, (expires or 0.0) - date - age)
+
+    last_modified = _http_date(headers.get("Last-Modified"))
+    if last_modified is not None and last_modified < date:
+        return min((date - last_modified) / 10, _MAX_HEURISTIC_TTL)
+    return 0.0
+
+
+class HttpCache:
+    """Content-addressed on-disk HTTP cache with LRU eviction.
+
+    The database and directory are created lazily on first use, and all
+    operations are serialised by a lock so the cache can be shared by worker
+    threads.
+    """
+
+    def __init__(self, directory: str | os.PathLike, max_bytes: int):
+        """Create a cache rooted at directory holding at most max_bytes of bodies."""
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            (self.directory / "objects").mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.directory / "index.sqlite3", check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(_SCHEMA)
+            self._db = db
+        return self._db
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.directory / "objects" / digest[:2] / digest
+
+    def lookup(self, url: str) -> CacheEntry | None:
+        """Return the cache entry for url, or None if it is not cached."""
+        with self._lock:
+            row = (
+                self._conn()
+                .execute(
+                    "SELECT url, digest, content_type, etag, last_modified, stored_at, expires_at "
+                    "FROM entries WHERE url = ?",
+                    (url,),
+                )
+                .fetchone()
+            )
+        return CacheEntry(*row) if row else None
+
+    def read_body(self, entry: CacheEntry) -> bytes | None:
+        """Read the body for entry and mark it as recently used.
+
+        Returns:
+            The cached body, or None if the blob has gone missing
+
+        """
+        try:
+            body = self._blob_path(entry.digest).read_bytes()
+        except FileNotFoundError:
+            with self._lock:
+                self._conn().execute("DELETE FROM entries WHERE url = ?", (entry.url,))
+            return None
+        with self._lock:
+            self._conn().execute("UPDATE blobs SET accessed_at = ? WHERE digest = ?", (time.time(), entry.digest))
+        return body
+
+    def store(self, url: str, body: bytes, headers: Message, digest: str | None = None) -> CacheEntry | None:
+        """Store a 200 response for url.
+
+        Args:
+            url: The requested URL
+            body: Raw response body
+            headers: Response headers
+            digest: SHA-256 hex digest of body, if already computed
+
+        Returns:
+            The new entry, or None if the response is not cacheable
+
+        """
+        now = time.time()
+        lifetime = freshness_lifetime(headers, now)
+        if lifetime is None or len(body) > self.max_bytes:
+            return None
+        if not lifetime and not (headers.get("ETag") or headers.get("Last-Modified")):
+            # Could neither be served nor revalidated later
+            return None
+
+        digest = digest or hashlib.sha256(body).hexdigest()
+        entry = CacheEntry(
+            url=url,
+            digest=digest,
+            content_type=headers.get("Content-Type"),
+            etag=headers.get("ETag"),
+            last_modified=headers.get("Last-Modified"),
+            stored_at=now,
+            expires_at=now + lifetime,
+        )
+        path = self._blob_path(digest)
+        with self._lock:
+            db = self._conn()
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_name(f"{digest}.{os.getpid()}.{threading.get_ident()}.tmp")
+                tmp.write_bytes(body)
+                os.replace(tmp, path)
+            db.execute("BEGIN")
+            try:
+                previous = db.execute("SELECT digest FROM entries WHERE url = ?", (url,)).fetchone()
+                db.execute(
+                    "INSERT INTO blobs (digest, size, accessed_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(digest) DO UPDATE SET accessed_at = excluded.accessed_at",
+                    (digest, len(body), now),
+                )
+                db.execute(
+                    "INSERT OR REPLACE INTO entries "
+                    "(url, digest, content_type, etag, last_modified, stored_at, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (url, digest, entry.content_type, entry.etag, entry.last_modified, now, entry.expires_at),
+                )
+                released = previous is not None and previous[0] != digest and self._release(db, previous[0])
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            # Blobs are only deleted once no committed row can refer to them
+            if released:
+                self._blob_path(previous[0]).unlink(missing_ok=True)
+            self._evict(db)
+        return entry
+
+    def revalidated(self, entry: CacheEntry, headers: Message) -> CacheEntry:
+        """Record a 304 Not Modified response for entry and return the refreshed entry."""
+        now = time.time()
+        lifetime = freshness_lifetime(headers, now)
+        entry.stored_at = now
+        entry.expires_at = now + (lifetime or 0.0)
+        entry.etag = headers.get("ETag") or entry.etag
+        entry.last_modified = headers.get("Last-Modified") or entry.last_modified
+        with self._lock:
+            self._conn().execute(
+                "UPDATE entries SET etag = ?, last_modified = ?, stored_at = ?, expires_at = ? WHERE url = ?",
+                (entry.etag, entry.last_modified, entry.stored_at, entry.expires_at, entry.url),
+            )
+        return entry
+
+    def _release(self, db: sqlite3.Connection, digest: str) -> bool:
+        """Drop the blob row for digest if no URL refers to it any more.
+
+        Returns:
+            True if the row was dropped; the caller deletes the file after committing
+
+        """
+        if db.execute("SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)).fetchone() is None:
+            db.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+            return True
+        return False
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        """Drop least recently used blobs until the cache fits in max_bytes."""
+        (total,) = db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        db.execute("BEGIN")
+        try:
+            for digest, size in db.execute("SELECT digest, size FROM blobs ORDER BY accessed_at").fetchall():
+                if total <= self.max_bytes:
+                    break
+                db.execute("DELETE FROM entries WHERE digest = ?", (digest,))
+                db.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+                evicted.append(digest)
+                total -= size
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        for digest in evicted:
+            self._blob_path(digest).unlink(missing_ok=True)
@@ -0,0 +1,316 @@
+"""
+Metrics for the document fetcher.
+
+A small in-process registry of labelled counters and histograms, so fetch
+latency can be attributed to DNS, connecting, time to first byte,
+downloading, cleaning or formatting. The registry renders the Prometheus
+text format (served on /metrics by serve_metrics()) and, when the
+``opentelemetry-api`` package is installed, mirrors every observation to
+OpenTelemetry instruments; those stay no-ops unless the host process
+configures an OTEL SDK meter provider.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in seconds, from a cached DNS lookup to a slow crawl
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Distinct label sets kept per metric; later ones (e.g. an endless stream of
+# hosts in a long-running server) are folded into one "_other" series
+MAX_SERIES = 1000
+_OTHER = "_other"
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = tuple[str, ...]
+# A collector returns (name, help, [(labels, value)]) for counters read at scrape time
+Collected = tuple[str, str, list[tuple[dict[str, str], float]]]
+
+
+# Fallback start time where /proc is unavailable: when this module was imported
+_IMPORTED = time.monotonic()
+
+
+def process_age() -> float:
+    """Seconds since this process started.
+
+    Read from /proc on Linux, so interpreter startup and imports count; other
+    platforms measure from the import of this module.
+    """
+    try:
+        with open("/proc/self/stat", "rb") as f:
+            # Fields after the parenthesised command name start at field 3; starttime is field 22
+            start_ticks = int(f.read().rsplit(b")", 1)[1].split()[19])
+        with open("/proc/uptime", "rb") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return time.monotonic() - _IMPORTED
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Labels, values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    """Shared label handling of counters and histograms."""
+
+    kind = ""
+
+    def __init__(self, registry: "Registry", name: str, help: str, labels: Labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._registry = registry
+        self._lock = threading.Lock()
+        self._otel = None
+
+    def _key(self, series: dict, labels: dict[str, str]) -> Labels:
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        if key not in series and len(series) >= MAX_SERIES:
+            key = (_OTHER,) * len(self.labels)
+        return key
+
+    def _mirror(self, value: float, labels: dict[str, str]) -> None:
+        if self._otel is None:
+            self._otel = self._registry._otel_instrument(self) or False
+        if self._otel:
+            attributes = {name: str(labels.get(name, "")) for name in self.labels}
+            if self.kind == "counter":
+                self._otel.add(value, attributes)
+            else:
+                self._otel.record(value, attributes)
+
+
+class Counter(_Metric):
+    """A monotonically increasing labelled count."""
+
+    kind = "counter"
+
+    def __init__(self, registry: "Registry", name: str, help: str, labels: Labels):
+        super().__init__(registry, name, help, labels)
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Add amount to the series for labels."""
+        with self._lock:
+            key = self._key(self._values, labels)
+            self._values[key] = self._values.get(key, 0) + amount
+        self._mirror(amount, labels)
+
+    def values(self) -> dict[Labels, float]:
+        """Current value of every series, keyed by label values."""
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+            for key, value in sorted(self.values().items())
+        ]
+
+
+class Histogram(_Metric):
+    """A labelled distribution of observations (cumulative buckets, sum, count)."""
+
+    kind = "histogram"
+
+    def __init__(
+        self, registry: "Registry", name: str, help: str, labels: Labels, buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        super().__init__(registry, name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per series: non-cumulative bucket counts (last one is +Inf), sum
+        self._series: dict[Labels, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record one observation in the series for labels."""
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with self._lock:
+            key = self._key(self._series, labels)
+            counts, total = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+        self._mirror(value, labels)
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the wall-clock seconds spent in the with block (also when it raises)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def summary(self) -> dict[Labels, tuple[int, float]]:
+        """(count, sum) of every series, keyed by label values."""
+        with self._lock:
+            return {key: (sum(counts), total[0]) for key, (counts, total) in self._series.items()}
+
+    def render(self) -> list[str]:
+        with self._lock:
+            series = {key: (list(counts), total[0]) for key, (counts, total) in self._series.items()}
+        lines = []
+        for key, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """A set of metrics rendered together."""
+
+    def __init__(self, otel: bool = True, meter_name: str = "mcp_document_fetcher"):
+        """Create a registry.
+
+        Args:
+            otel: Mirror observations to OpenTelemetry if opentelemetry-api is installed
+            meter_name: Name of the OpenTelemetry meter
+        """
+        self.otel = otel
+        self.meter_name = meter_name
+        self._metrics: list[_Metric] = []
+        self._collectors: list[Callable[[], list[Collected]]] = []
+        self._meter = None
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help: str, labels: Labels = ()) -> Counter:
+        """Create and register a counter."""
+        metric = Counter(self, name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self, name: str, help: str, labels: Labels = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Create and register a histogram."""
+        metric = Histogram(self, name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, func: Callable[[], list[Collected]]) -> Callable[[], list[Collected]]:
+        """Register a function reporting counters kept elsewhere (read at scrape time)."""
+        self._collectors.append(func)
+        if self._meter:
+            self._observe_collector(self._meter, func)
+        return func
+
+    def _otel_meter(self):
+        """The OpenTelemetry meter, imported on first observation (None if unavailable).
+
+        Deferred so that starting the server never pays for importing OTEL.
+        """
+        with self._lock:
+            if self._meter is None:
+                self._meter = self._create_meter()
+        return self._meter or None
+
+    def _create_meter(self):
+        try:
+            from opentelemetry import metrics as otel_metrics
+        except ImportError:  # optional dependency
+            return False
+        meter = otel_metrics.get_meter(self.meter_name)
+        for func in self._collectors:
+            self._observe_collector(meter, func)
+        return meter
+
+    def _otel_instrument(self, metric: _Metric):
+        meter = self._otel_meter() if self.otel else None
+        if meter is None:
+            return None
+        if metric.kind == "counter":
+            return meter.create_counter(metric.name, description=metric.help)
+        return meter.create_histogram(metric.name, unit="s", description=metric.help)
+
+    @staticmethod
+    def _observe_collector(meter, func: Callable[[], list[Collected]]) -> None:
+        from opentelemetry.metrics import Observation
+
+        for name, help, _ in func():
+
+            def callback(options, name=name):
+                for collected_name, _, samples in func():
+                    if collected_name == name:
+                        return [Observation(value, labels) for labels, value in samples]
+                return []
+
+            meter.create_observable_counter(name, callbacks=[callback], description=help)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        for func in self._collectors:
+            try:
+                collected = func()
+            except Exception as e:
+                logger.warning("Metrics collector failed: %s", e)
+                continue
+            for name, help, samples in collected:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in samples:
+                    names = tuple(labels)
+                    values = tuple(str(labels[label]) for label in names)
+                    lines.append(f"{name}{_format_labels(names, values)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def serve_metrics(registry: Registry, host: str, port: int) -> ThreadingHTTPServer:
+    """Serve registry.render() on http://host:port/metrics from a daemon thread.
+
+    Returns:
+        The running server; call shutdown() to stop it
+
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug("metrics: " + format, *args)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logger.info("Serving metrics on http://%s:%d/metrics", host, server.server_port)
+    return server
@@ -0,0 +1,87 @@
+"""
+In-memory cache of cleaned documentation pages.
+
+Entries are keyed by (URL, body digest), so a page is only cleaned again when
+its raw bytes change. The cache is bounded both by age (TTL) and by the
+approximate size of the cached text, evicting least recently used entries
+first.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+# Rough per-chunk cost of the object and its offsets, beyond its strings
+_CHUNK_OVERHEAD = 64
+
+
+def _page_size(page: Any) -> int:
+    """Approximate memory footprint of a page: the length of its strings, chunks included."""
+    size = len(page.url) + len(page.title) + len(page.content)
+    for chunk in getattr(page, "chunks", ()):
+        size += len(chunk.id) + len(chunk.heading) + _CHUNK_OVERHEAD
+    return size
+
+
+class PageCache:
+    """Bounded LRU cache of cleaned pages with TTL expiry and hit/miss counters."""
+
+    def __init__(self, max_bytes: int, ttl: float):
+        """Create a cache holding at most max_bytes of text for ttl seconds per entry."""
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size = 0
+        self._entries: OrderedDict[tuple[str, str], tuple[Any, float, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url: str, digest: str) -> Any | None:
+        """Return the cached page for (url, digest), or None on a miss."""
+        key = (url, digest)
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and item[1] <= time.monotonic():
+                self._remove(key)
+                self.evictions += 1
+                item = None
+            if item is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, url: str, digest: str, page: Any) -> None:
+        """Cache page under (url, digest), evicting old entries as needed."""
+        size = _page_size(page)
+        if size > self.max_bytes:
+            return
+        key = (url, digest)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (page, time.monotonic() + self.ttl, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: tuple[str, str]) -> None:
+        _, _, size = self._entries.pop(key)
+        self._size -= size
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss/eviction counters and current occupancy."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,215 @@
+"""
+Per-host politeness for the document fetcher.
+
+Every network request first takes a token from its host's token bucket.
+Buckets refill at the configured rate, slowed down to the host's robots.txt
+Crawl-delay / Request-rate (fetched once per origin and cached), and adapt
+to the server: a 429 or 503 halves the host's rate and pauses the host for
+the Retry-After period (or an exponential backoff without one), and each
+success wins some rate back. Hosts are independent, so a throttled host
+never slows down the others.
+
+robots.txt is only consulted for pacing; pages are fetched on a user's
+request, not discovered by crawling, so Disallow rules are not applied.
+"""
+
+import asyncio
+import email.utils
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+from urllib.parse import urlsplit
+
+# Successes needed to climb from a halved rate back to the full rate
+_RECOVERY_STEPS = 10
+# A throttled host's rate never drops below this fraction of the configured rate
+_MIN_RATE_FRACTION = 1 / 16
+
+
+def parse_retry_after(value: str | None, now: float | None = None) -> float | None:
+    """Parse a Retry-After header (delay in seconds or an HTTP date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+    return max(0.0, when - (now if now is not None else time.time()))
+
+
+def robots_delay(text: str, user_agent: str) -> float | None:
+    """Seconds between requests asked for by a robots.txt, if any.
+
+    Reads Crawl-delay (fractional values allowed, unlike urllib.robotparser)
+    and Request-rate ("requests/seconds") from the group matching
+    user_agent, falling back to the "*" group, and returns the stricter.
+    """
+    groups: list[tuple[list[str], dict[str, str]]] = []
+    in_agents = False
+    for raw in text.splitlines():
+        key, sep, value = raw.split("#", 1)[0].partition(":")
+        if not sep:
+            continue
+        key, value = key.strip().lower(), value.strip()
+        if key == "user-agent":
+            if not in_agents:
+                groups.append(([], {}))
+                in_agents = True
+            groups[-1][0].append(value.lower())
+        elif groups:
+            in_agents = False
+            groups[-1][1].setdefault(key, value)
+
+    token = user_agent.lower()
+    rules = next((r for agents, r in groups if any(a != "*" and a in token for a in agents)), None)
+    if rules is None:
+        rules = next((r for agents, r in groups if "*" in agents), {})
+    delays = []
+    try:
+        delays.append(float(rules["crawl-delay"]))
+    except (KeyError, ValueError):
+        pass
+    requests, _, seconds = rules.get("request-rate", "").partition("/")
+    try:
+        delays.append(float(seconds.strip().rstrip("s")) / float(requests))
+    except (ValueError, ZeroDivisionError):
+        pass
+    delays = [delay for delay in delays if delay > 0]
+    return max(delays) if delays else None
+
+
+@dataclass
+class _Host:
+    """Token bucket and backoff state of one host (max_rate 0 means unlimited)."""
+
+    max_rate: float
+    rate: float
+    burst: float
+    tokens: float
+    updated: float
+    blocked_until: float = 0.0
+    failures: int = 0
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class PolitenessScheduler:
+    """Token-bucket rate limiter per host with robots.txt and Retry-After support.
+
+    Must only be used from one event loop at a time.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        fetch_robots: Callable[[str], Awaitable[str | None]] | None = None,
+        user_agent: str = "*",
+        robots_ttl: float = 24 * 60 * 60,
+        max_crawl_delay: float = 30.0,
+        max_retry_after: float = 60.0,
+    ):
+        """Create a scheduler.
+
+        Args:
+            rate: Requests per second allowed per host (0 disables rate limiting)
+            burst: Requests a host may receive back to back
+            fetch_robots: Coroutine returning the robots.txt text of an
+                origin ("https://host"), or None if there is none; None
+                disables robots.txt handling
+            user_agent: Product token matched against robots.txt User-agent lines
+            robots_ttl: Seconds to cache a host's robots.txt policy
+            max_crawl_delay: Upper bound applied to robots.txt Crawl-delay
+            max_retry_after: Longest Retry-After (or backoff) worth waiting for
+        """
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.user_agent = user_agent
+        self.robots_ttl = robots_ttl
+        self.max_crawl_delay = max_crawl_delay
+        self.max_retry_after = max_retry_after
+        self._fetch_robots = fetch_robots
+        self._hosts: dict[str, _Host] = {}
+        self._robots: dict[str, tuple[float, asyncio.Task]] = {}
+
+    async def _robots_rate(self, origin: str) -> float | None:
+        """Requests per second allowed by an origin's robots.txt, if it limits them."""
+        now = time.monotonic()
+        cached = self._robots.get(origin)
+        if cached is None or cached[0] <= now:
+            cached = (now + self.robots_ttl, asyncio.ensure_future(self._load_robots(origin)))
+            self._robots[origin] = cached
+        return await asyncio.shield(cached[1])
+
+    async def _load_robots(self, origin: str) -> float | None:
+        text = await self._fetch_robots(origin)
+        delay = robots_delay(text, self.user_agent) if text else None
+        return 1.0 / min(delay, self.max_crawl_delay) if delay else None
+
+    def _new_host(self, rate: float, burst: float) -> _Host:
+        return _Host(rate, rate, burst, burst, time.monotonic())
+
+    async def _host(self, url: str) -> _Host:
+        parts = urlsplit(url)
+        key = parts.netloc.lower()
+        host = self._hosts.get(key)
+        if host is None:
+            rate, burst = self.rate, self.burst
+            if self._fetch_robots is not None and parts.scheme in ("http", "https"):
+                robots_rate = await self._robots_rate(f"{parts.scheme}://{parts.netloc}")
+                if robots_rate is not None:
+                    # Crawl-delay means one request per delay, no bursts
+                    rate, burst = min(rate, robots_rate) if rate > 0 else robots_rate, 1.0
+            host = self._hosts.setdefault(key, self._new_host(rate, burst))
+        return host
+
+    async def acquire(self, url: str) -> None:
+        """Wait until a request to url's host may be sent."""
+        host = await self._host(url)
+        while True:
+            now = time.monotonic()
+            wait = host.blocked_until - now
+            if wait <= 0:
+                if not host.max_rate:
+                    return
+                host.refill(now)
+                if host.tokens >= 1:
+                    host.tokens -= 1
+                    return
+                wait = (1 - host.tokens) / host.rate
+            await asyncio.sleep(wait)
+
+    def succeeded(self, url: str) -> None:
+        """Record a successful response, letting a throttled host speed up again."""
+        host = self._hosts.get(urlsplit(url).netloc.lower())
+        if host is not None:
+            host.failures = 0
+            host.rate = min(host.max_rate, host.rate + host.max_rate / _RECOVERY_STEPS)
+
+    def throttled(self, url: str, retry_after: str | None) -> bool:
+        """Record a 429/503 response and pause the host.
+
+        Args:
+            url: URL that was throttled
+            retry_after: The response's Retry-After header, if any
+
+        Returns:
+            True if the request should be retried after the pause, False if
+            the server asked for a longer wait than max_retry_after
+
+        """
+        host = self._hosts.setdefault(urlsplit(url).netloc.lower(), self._new_host(self.rate, self.burst))
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = float(2**host.failures)
+        host.failures += 1
+        if delay > self.max_retry_after:
+            return False
+        host.rate = max(host.max_rate * _MIN_RATE_FRACTION, host.rate / 2)
+        host.blocked_until = max(host.blocked_until, time.monotonic() + delay)
+        return True
@@ -0,0 +1,94 @@
+"""
+Process pool for CPU-bound work, sized to the container's CPU quota.
+
+Cleaning holds the GIL, so threads cannot spread a large batch of pages
+over several cores. ProcessPool runs picklable functions in worker
+processes started on first use. os.cpu_count() reports the host's CPUs,
+not what a container may use, so available_cpus() also honours the CPU
+affinity mask and the cgroup (v2 or v1) CPU quota.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable
+
+_CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+
+def cpu_quota(root: Path = _CGROUP_ROOT) -> float | None:
+    """CPUs granted by the cgroup CPU quota, or None if there is no quota.
+
+    Args:
+        root: Mount point of the cgroup filesystem
+
+    Returns:
+        Quota divided by period (e.g. 1.5 for "150000 100000"), or None
+
+    """
+    try:
+        quota, period = (root / "cpu.max").read_text().split()[:2]
+        return int(quota) / int(period) if quota != "max" else None
+    except (OSError, ValueError):
+        pass
+    for controller in ("cpu", "cpu,cpuacct"):
+        try:
+            quota = int((root / controller / "cpu.cfs_quota_us").read_text())
+            period = int((root / controller / "cpu.cfs_period_us").read_text())
+        except (OSError, ValueError):
+            continue
+        return quota / period if quota > 0 and period > 0 else None
+    return None
+
+
+def available_cpus() -> int:
+    """Number of CPUs this process can actually keep busy."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS, Windows
+        cpus = os.cpu_count() or 1
+    quota = cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, int(quota))
+    return max(1, cpus)
+
+
+def _mp_context() -> multiprocessing.context.BaseContext:
+    # Forking a process that runs an event loop and worker threads is unsafe
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class ProcessPool:
+    """Worker processes, started lazily, for running functions from an event loop."""
+
+    def __init__(self, workers: int):
+        """Create a pool of at most workers processes."""
+        self.workers = workers
+        self._executor: ProcessPoolExecutor | None = None
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run func(*args) in a worker process and return its result.
+
+        Raises:
+            BrokenProcessPool: If a worker died; the next call starts a new pool
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=_mp_context())
+        executor = self._executor
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        except BrokenProcessPool:
+            if self._executor is executor:
+                self._executor = None
+                executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,125 @@
+"""
+Retries and hedged requests for the document fetcher.
+
+Transient failures (connection resets, timeouts, truncated bodies, 500, 502
+and 504 responses) are retried with "full jitter" exponential backoff, so
+many clients recovering from the same hiccup do not retry in lockstep.
+Throttling responses (429/503) are handled by the politeness scheduler.
+
+Hedging targets tail latency rather than failures: once a request has been
+outstanding for longer than a high percentile of the host's recent
+latencies, a second identical request is sent and whichever answers first
+wins, so one slow CDN edge or stalled connection does not set the p99.
+"""
+
+import asyncio
+import http.client
+import random
+import urllib.error
+from collections import deque
+from typing import Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+# HTTP statuses worth retrying (429 and 503 are left to the politeness scheduler)
+RETRY_STATUSES = frozenset({500, 502, 504})
+# Network errors worth retrying; DNS and TLS failures are not among them
+_TRANSIENT_ERRORS = (
+    ConnectionError,
+    TimeoutError,
+    asyncio.TimeoutError,
+    asyncio.IncompleteReadError,
+    http.client.IncompleteRead,
+    http.client.RemoteDisconnected,
+)
+
+
+def is_transient(error: BaseException) -> bool:
+    """Return True if a failed request is worth retrying."""
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code in RETRY_STATUSES
+    if isinstance(error, urllib.error.URLError) and isinstance(error.reason, BaseException):
+        return is_transient(error.reason)
+    return isinstance(error, _TRANSIENT_ERRORS)
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter."""
+
+    def __init__(self, retries: int, base_delay: float, max_delay: float):
+        """Allow retries extra attempts, waiting up to base_delay * 2**n (capped at max_delay)."""
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, retry: int) -> float:
+        """Seconds to wait before the given retry (1 for the first)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+
+
+class LatencyTracker:
+    """Rolling window of request latencies per host."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        """Keep the last window samples per host; percentiles need min_samples."""
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: dict[str, deque[float]] = {}
+
+    def record(self, host: str, seconds: float) -> None:
+        """Record the latency of a completed request."""
+        samples = self._samples.get(host)
+        if samples is None:
+            samples = self._samples[host] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def percentile(self, host: str, percentile: float) -> float | None:
+        """The given percentile (0-100) of the host's recent latencies, or None if too few."""
+        samples = self._samples.get(host)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percentile / 100))]
+
+
+async def hedged(
+    first: Callable[[], Awaitable[T]],
+    second: Callable[[], Awaitable[T]],
+    delay: float | None,
+) -> T:
+    """Run first(); if it is still running after delay seconds, race it against second().
+
+    Args:
+        first: Starts the primary attempt
+        second: Starts the backup attempt
+        delay: Seconds to wait before hedging, or None to never hedge
+
+    Returns:
+        The result of whichever attempt succeeds first
+
+    Raises:
+        The primary attempt's error if it fails before the hedge is sent, or
+        the first error seen if both attempts fail
+
+    """
+    tasks = {asyncio.ensure_future(first())}
+    try:
+        if delay is None:
+            return await next(iter(tasks))
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done:
+            return done.pop().result()
+        tasks.add(asyncio.ensure_future(second()))
+        error: BaseException | None = None
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = error or task.exception()
+        raise error
+    finally:
+        # The losing attempt (or both, if we were cancelled) is abandoned
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,262 @@
+"""
+Local full-text index over cleaned documentation pages.
+
+Every page the fetcher cleans is stored as its heading-aware chunks (see
+chunking.py) in SQLite: chunk metadata in a plain table and chunk text in an
+FTS5 table sharing its rowids. A URL's chunks are replaced only when the body
+digest changed. Queries are ranked with FTS5's built-in BM25, so agents can
+pull the few relevant chunks into context instead of whole pages, and fetch
+any chunk again later by its ID. Pages also keep their content hash and
+SimHash fingerprint so duplicates can be recognised across crawls.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from .chunking import Chunk
+from .dedup import BAND_BITS, BANDS, hamming, simhash_bands
+
+# Bumped whenever the layout (or the simhash of stored pages) changes; older index files are rebuilt
+_SCHEMA_VERSION = 5
+
+_WORD = re.compile(r"\w+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    simhash INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_content_hash ON pages(content_hash);
+CREATE TABLE IF NOT EXISTS chunks (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    url TEXT NOT NULL,
+    ord INTEGER NOT NULL,
+    heading TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    tokens INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_url ON chunks(url);
+CREATE VIRTUAL TABLE IF NOT EXISTS passages USING fts5(
+    title,
+    heading,
+    body,
+    tokenize = 'porter unicode61'
+);
+""" + "".join(
+    f"CREATE INDEX IF NOT EXISTS pages_band{band} ON pages((simhash >> {band * BAND_BITS}) & {(1 << BAND_BITS) - 1});\n"
+    for band in range(BANDS)
+)
+
+
+@dataclass
+class SearchHit:
+    """One ranked (or directly requested) chunk.
+
+    Attributes:
+        chunk_id: Stable chunk ID, usable with get_chunks
+        url: URL of the page the chunk came from
+        title: Title of that page
+        heading: Heading path of the chunk's section
+        passage: Chunk text
+        score: BM25 score (lower is better, as reported by FTS5); 0 for lookups
+    """
+
+    chunk_id: str
+    url: str
+    title: str
+    heading: str
+    passage: str
+    score: float
+
+
+def _signed(fingerprint: int) -> int:
+    """Map an unsigned 64-bit fingerprint onto SQLite's signed INTEGER."""
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+
+def _match_expression(query: str) -> str:
+    """Turn free text into an FTS5 query: any of the quoted words."""
+    return " OR ".join(f'"{word}"' for word in _WORD.findall(query))
+
+
+class SearchIndex:
+    """Incremental BM25 index of fetched pages, stored in SQLite FTS5.
+
+    The database is opened lazily on first use; all access is serialised by
+    a lock so the index can be updated from worker threads.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        """Create an index stored in the SQLite file at path."""
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            (version,) = db.execute("PRAGMA user_version").fetchone()
+            if version != _SCHEMA_VERSION:
+                db.executescript(
+                    "DROP TABLE IF EXISTS passages; DROP TABLE IF EXISTS chunks; DROP TABLE IF EXISTS pages;"
+                )
+                db.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+            db.executescript(_SCHEMA)
+            self._db = db
+        return self._db
+
+    def add(
+        self,
+        url: str,
+        title: str,
+        content: str,
+        digest: str,
+        chunks: list[Chunk],
+        content_hash: str = "",
+        simhash: int = 0,
+    ) -> bool:
+        """Index a cleaned page, replacing older chunks for the same URL.
+
+        Args:
+            url: Page URL
+            title: Page title
+            content: Cleaned page text the chunk offsets refer to
+            digest: Digest of the raw body; unchanged pages are skipped
+            chunks: The page's chunks
+            content_hash: Hash of the cleaned text (see dedup.content_hash)
+            simhash: SimHash fingerprint of the cleaned text
+
+        Returns:
+            True if the page was (re)indexed, False if it was already current
+
+        """
+        with self._lock:
+            db = self._conn()
+            row = db.execute("SELECT digest FROM pages WHERE url = ?", (url,)).fetchone()
+            if row and row[0] == digest:
+                return False
+            db.execute("BEGIN")
+            try:
+                db.execute("DELETE FROM passages WHERE rowid IN (SELECT rowid FROM chunks WHERE url = ?)", (url,))
+                db.execute("DELETE FROM chunks WHERE url = ?", (url,))
+                for chunk in chunks:
+                    cursor = db.execute(
+                        "INSERT OR REPLACE INTO chunks (id, url, ord, heading, start, end, tokens) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (chunk.id, url, chunk.index, chunk.heading, chunk.start, chunk.end, chunk.tokens),
+                    )
+                    db.execute(
+                        "INSERT INTO passages (rowid, title, heading, body) VALUES (?, ?, ?, ?)",
+                        (cursor.lastrowid, title, chunk.heading, content[chunk.start : chunk.end]),
+                    )
+                db.execute(
+                    "INSERT OR REPLACE INTO pages (url, title, digest, content_hash, simhash) VALUES (?, ?, ?, ?, ?)",
+                    (url, title, digest, content_hash, _signed(simhash)),
+                )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return True
+
+    def search(self, query: str, k: int = 5) -> list[SearchHit]:
+        """Return the k best chunks for query, best first."""
+        expression = _match_expression(query)
+        if not expression:
+            return []
+        with self._lock:
+            rows = (
+                self._conn()
+                .execute(
+                    "SELECT c.id, c.url, p.title, c.heading, p.body, bm25(passages) AS score "
+                    "FROM passages p JOIN chunks c ON c.rowid = p.rowid "
+                    "WHERE passages MATCH ? ORDER BY score LIMIT ?",
+                    (expression, k),
+                )
+                .fetchall()
+            )
+        return [SearchHit(*row) for row in rows]
+
+    def get_chunks(self, chunk_ids: list[str]) -> list[SearchHit]:
+        """Look chunks up by ID, in the order requested; unknown IDs are skipped."""
+        with self._lock:
+            db = self._conn()
+            hits = []
+            for chunk_id in chunk_ids:
+                row = db.execute(
+                    "SELECT c.id, c.url, p.title, c.heading, p.body, 0.0 "
+                    "FROM chunks c JOIN passages p ON p.rowid = c.rowid WHERE c.id = ?",
+                    (chunk_id,),
+                ).fetchone()
+                if row:
+                    hits.append(SearchHit(*row))
+        return hits
+
+    def find_duplicate(self, url: str, content_hash: str, simhash: int, max_distance: int) -> str | None:
+        """Return the URL of an indexed page with the same or nearly the same content.
+
+        Args:
+            url: URL of the page being checked (never reported as its own duplicate)
+            content_hash: Hash of the page's cleaned text
+            simhash: SimHash fingerprint of the page (0 disables near matches)
+            max_distance: Maximum number of differing fingerprint bits
+
+        Returns:
+            URL of a matching page, or None
+
+        """
+        mask = (1 << BAND_BITS) - 1
+        clauses = ["content_hash = ?"]
+        params: list = [content_hash]
+        if simhash:
+            for band, value in enumerate(simhash_bands(simhash)):
+                clauses.append(f"((simhash >> {band * BAND_BITS}) & {mask}) = ?")
+                params.append(value)
+        with self._lock:
+            rows = (
+                self._conn()
+                .execute(
+                    f"SELECT url, content_hash, simhash FROM pages WHERE url != ? AND ({' OR '.join(clauses)})",
+                    [url, *params],
+                )
+                .fetchall()
+            )
+        for other_url, other_hash, _ in rows:
+            if other_hash == content_hash:
+                return other_url
+        for other_url, _, other_simhash in rows:
+            if other_simhash and simhash and hamming(simhash, other_simhash & ((1 << 64) - 1)) <= max_distance:
+                return other_url
+        return None
+
+    def page_chunks(self, url: str) -> list[Chunk]:
+        """Return the indexed chunks of a page, in document order."""
+        with self._lock:
+            rows = (
+                self._conn()
+                .execute("SELECT id, ord, heading, start, end, tokens FROM chunks WHERE url = ? ORDER BY ord", (url,))
+                .fetchall()
+            )
+        return [Chunk(*row) for row in rows]
+
+    def urls(self) -> list[str]:
+        """URLs of every indexed page, in ascending order."""
+        with self._lock:
+            return [row[0] for row in self._conn().execute("SELECT url FROM pages ORDER BY url")]
+
+    def page_count(self) -> int:
+        """Number of pages in the index."""
+        with self._lock:
+            return self._conn().execute("SELECT COUNT(*) FROM pages").fetchone()[0]
@@ -3,32 +3,239 @@ MCP Document Fetcher Server
 
 Provides tools for fetching and cleaning web documentation:
 - fetch_url: Fetch and clean a single web page
+- fetch_urls: Fetch and clean a list of web pages in one call
 - parse_llms_txt: Parse an llms.txt file and extract links
 - fetch_documentation: Fetch multiple pages from llms.txt
+- search_docs: Search passages of every page fetched so far
+- get_chunks: Return chunks of fetched pages by ID
+- cache_stats: Report cleaned-page cache hit/miss counters
+- export_snapshot: Write every page fetched so far to a snapshot file
+
+Runs over stdio by default; ``--transport http`` serves many clients from
+one long-lived process (see http_app).
 """
 
-import html
+import argparse
+import asyncio
+import codecs
+import hashlib
+import logging
+import os
 import re
-import urllib.request
-from dataclasses import dataclass
-from typing import Any
+import sqlite3
+import time
+import urllib.error
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import aclosing
+from dataclasses import dataclass, field, replace
+from email.message import Message
+from pathlib import Path
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable
+from urllib.parse import urlsplit
 
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
 
+from .budget import allocate, relevance, truncate
+from .chunking import Chunk, estimate_tokens
+from .cleaning import CleanedBody, clean_body, iter_text
+from .crawl_state import CrawlState, PageState
+from .dedup import MAX_DISTANCE, DuplicateDetector, canonical_url
+from .html_text import extract
+from .http_cache import CacheEntry, HttpCache
+from .metrics import Registry, process_age, serve_metrics
+from .page_cache import PageCache
+from .politeness import PolitenessScheduler
+from .process_pool import ProcessPool, available_cpus
+from .retry import LatencyTracker, RetryPolicy, hedged, is_transient
+from .search_index import SearchHit, SearchIndex
+from .snapshot import Snapshot, SnapshotPage, SnapshotWriter, snapshot_path
+from .transport import ConnectionPool
+
 
-# Example: "[Quickstart](https://strandsagents.com/.../index.md)"
-_MD_LINK = re.compile(r"\[([^\]]+)\]\((https?://[^\)]+)\)")
-_HTML_BLOCK = re.compile(r"(?is)<(script|style|noscript).*?>.*?</\1>")
-_TAG = re.compile(r"(?s)<[^>]+>")
-_TITLE_TAG = re.compile(r"(?is)<title[^>]*>(.*?)</title>")
-_H1_TAG = re.compile(r"(?is)<h1[^>]*>(.*?)</h1>")
-_META_OG = re.compile(r'(?is)<meta[^>]+property=["\']og:title["\'][^>]+content=["\'](.*?)["\']')
+_META_CHARSET = re.compile(rb"""(?i)<meta[^>]{0,200}?charset=["']?([a-z0-9_.:-]{1,40})""")
+# Budgeted output: tokens kept for the note ending a cut page, and the smallest share
+# of content worth showing (pages that would get less are only listed)
+_TRUNCATION_NOTE_TOKENS = 32
+_MIN_PAGE_TOKENS = 64
+_OMITTED_HEADER = "## Omitted to fit max_tokens\n\n"
 
 # Configuration
 USER_AGENT = "Mozilla/5.0 (compatible; MCP-DocumentFetcher/1.0)"
-TIMEOUT = 30
+# Seconds allowed for connecting and for each read
+TIMEOUT = float(os.environ.get("MCP_DOCFETCH_TIMEOUT", "30"))
+# Most URLs a single fetch_urls call accepts
+MAX_BATCH_URLS = int(os.environ.get("MCP_DOCFETCH_MAX_BATCH_URLS", "100"))
+# Seconds allowed for a whole request, redirects and body included
+DEADLINE = float(os.environ.get("MCP_DOCFETCH_DEADLINE", "120"))
+# Bodies are decoded and parsed in chunks of this many bytes
+CHUNK_SIZE = 64 * 1024
+# Response bodies beyond this size are truncated (reported on the Page)
+MAX_BYTES = int(os.environ.get("MCP_DOCFETCH_MAX_BYTES", str(10 * 1024 * 1024)))
+# Most page links discovered from one llms.txt or sitemap, nested indexes included
+MAX_LINKS = int(os.environ.get("MCP_DOCFETCH_MAX_LINKS", "10000"))
+# Concurrency limits for fetch_documentation (overridable per call)
+MAX_CONCURRENCY = int(os.environ.get("MCP_DOCFETCH_MAX_CONCURRENCY", "8"))
+PER_HOST_CONCURRENCY = int(os.environ.get("MCP_DOCFETCH_PER_HOST_CONCURRENCY", "4"))
+# Advertise gzip/deflate/br to servers (set to 0 to request identity encoding)
+COMPRESSION = os.environ.get("MCP_DOCFETCH_COMPRESSION", "1") != "0"
+# Per-host politeness: requests per second (0 disables), burst size, robots.txt Crawl-delay
+RATE_LIMIT = float(os.environ.get("MCP_DOCFETCH_RATE_LIMIT", "8"))
+RATE_BURST = float(os.environ.get("MCP_DOCFETCH_RATE_BURST", str(max(PER_HOST_CONCURRENCY, 1))))
+ROBOTS_TXT = os.environ.get("MCP_DOCFETCH_ROBOTS_TXT", "1") != "0"
+ROBOTS_MAX_BYTES = 512 * 1024
+# Seconds allowed for fetching robots.txt; a host whose robots.txt times out is fetched without a Crawl-delay
+ROBOTS_TIMEOUT = float(os.environ.get("MCP_DOCFETCH_ROBOTS_TIMEOUT", "5"))
+# 429/503 responses are retried this many times, waiting out Retry-After up to MAX_RETRY_AFTER seconds
+THROTTLE_RETRIES = 3
+MAX_RETRY_AFTER = float(os.environ.get("MCP_DOCFETCH_MAX_RETRY_AFTER", "60"))
+# Transient failures (resets, timeouts, 500/502/504) are retried with jittered exponential backoff
+RETRIES = int(os.environ.get("MCP_DOCFETCH_RETRIES", "2"))
+RETRY_BASE_DELAY = float(os.environ.get("MCP_DOCFETCH_RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.environ.get("MCP_DOCFETCH_RETRY_MAX_DELAY", "10"))
+# Send a second request once one has taken longer than this percentile of the host's
+# recent latencies (set MCP_DOCFETCH_HEDGE_PERCENTILE to e.g. 95 to enable hedging)
+HEDGE_PERCENTILE = float(os.environ.get("MCP_DOCFETCH_HEDGE_PERCENTILE", "0"))
+HEDGE_MIN_DELAY = 0.05
+# On-disk HTTP cache (set MCP_DOCFETCH_CACHE_MAX_BYTES=0 to disable)
+CACHE_DIR = Path(
+    os.environ.get("MCP_DOCFETCH_CACHE_DIR")
+    or Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "mcp-document-fetcher"
+)
+CACHE_MAX_BYTES = int(os.environ.get("MCP_DOCFETCH_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# In-memory cache of cleaned pages
+PAGE_CACHE_MAX_BYTES = int(os.environ.get("MCP_DOCFETCH_PAGE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+PAGE_CACHE_TTL = float(os.environ.get("MCP_DOCFETCH_PAGE_CACHE_TTL", "3600"))
+# Full-text index of every cleaned page, used by search_docs (set MCP_DOCFETCH_SEARCH_INDEX=0 to disable)
+SEARCH_INDEX_PATH = Path(os.environ.get("MCP_DOCFETCH_SEARCH_INDEX_PATH") or CACHE_DIR / "search.sqlite3")
+SEARCH_INDEX_ENABLED = os.environ.get("MCP_DOCFETCH_SEARCH_INDEX", "1") != "0"
+# Link sets, digests and validators remembered for incremental fetch_documentation runs
+CRAWL_STATE_PATH = Path(os.environ.get("MCP_DOCFETCH_CRAWL_STATE_PATH") or CACHE_DIR / "crawl_state.sqlite3")
+# Token budget and overlap of the heading-aware chunks pages are split into
+CHUNK_TOKENS = int(os.environ.get("MCP_DOCFETCH_CHUNK_TOKENS", "512"))
+CHUNK_OVERLAP = int(os.environ.get("MCP_DOCFETCH_CHUNK_OVERLAP", "64"))
+# Worker processes cleaning the large pages of fetch_documentation batches ("auto" sizes
+# the pool to the CPU quota; the default 0 cleans every page in a thread). Single-page
+# fetch_url calls and bodies under CLEAN_PROCESS_MIN_BYTES are always cleaned in-process.
+CLEAN_PROCESSES = os.environ.get("MCP_DOCFETCH_CLEAN_PROCESSES", "0")
+CLEAN_PROCESS_MIN_BYTES = int(os.environ.get("MCP_DOCFETCH_CLEAN_PROCESS_MIN_BYTES", str(128 * 1024)))
+# Prebuilt snapshot (see export_snapshot) whose pages are served without fetching them;
+# they are not revalidated, except by incremental fetch_documentation runs
+SNAPSHOT_PATH = os.environ.get("MCP_DOCFETCH_SNAPSHOT", "")
+# Directory export_snapshot writes into; clients only name files relative to it
+SNAPSHOT_DIR = Path(os.environ.get("MCP_DOCFETCH_SNAPSHOT_DIR") or CACHE_DIR / "snapshots")
+# Prometheus /metrics sidecar (port 0, the default, disables it); metrics are also
+# mirrored to OpenTelemetry when opentelemetry-api is installed (MCP_DOCFETCH_OTEL=0 disables)
+METRICS_HOST = os.environ.get("MCP_DOCFETCH_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("MCP_DOCFETCH_METRICS_PORT", "0"))
+OTEL_METRICS = os.environ.get("MCP_DOCFETCH_OTEL", "1") != "0"
+# Transport main() serves: "stdio" (one client per process) or "http" (streamable HTTP
+# on /mcp and SSE on /sse, so many clients share one warm process and its caches)
+SERVER_TRANSPORT = os.environ.get("MCP_DOCFETCH_TRANSPORT", "stdio")
+HTTP_HOST = os.environ.get("MCP_DOCFETCH_HOST", "127.0.0.1")
+HTTP_PORT = int(os.environ.get("MCP_DOCFETCH_PORT", "8000"))
+# Tool calls running at once across all clients (0 for no limit); later calls wait their turn
+MAX_CONCURRENT_CALLS = int(os.environ.get("MCP_DOCFETCH_MAX_CONCURRENT_CALLS", "16"))
+# Seconds the HTTP transport waits for in-flight requests when asked to shut down
+SHUTDOWN_TIMEOUT = float(os.environ.get("MCP_DOCFETCH_SHUTDOWN_TIMEOUT", "30"))
+
+METRICS = Registry(otel=OTEL_METRICS)
+TOOL_SECONDS = METRICS.histogram("docfetch_tool_duration_seconds", "Time spent handling MCP tool calls", ("tool",))
+TOOL_ERRORS = METRICS.counter("docfetch_tool_errors_total", "MCP tool calls that returned an error", ("tool",))
+STAGE_SECONDS = METRICS.histogram(
+    "docfetch_stage_duration_seconds",
+    "Time spent per fetch stage: dns, connect (TCP and TLS), ttfb, download, clean, format",
+    ("stage",),
+)
+DOWNLOADED_BYTES = METRICS.counter("docfetch_downloaded_bytes_total", "Response body bytes downloaded", ("host",))
+FETCH_ERRORS = METRICS.counter(
+    "docfetch_fetch_errors_total", "Failed fetch attempts by host and HTTP status or error type", ("host", "error")
+)
+HTTP_CACHE_LOOKUPS = METRICS.counter(
+    "docfetch_http_cache_lookups_total", "HTTP cache lookups by result: fresh, revalidated or miss", ("result",)
+)
+FIRST_LIST_TOOLS_SECONDS = METRICS.histogram(
+    "docfetch_time_to_first_list_tools_seconds",
+    "Time from process start to the first list_tools response (observed once per process)",
+    buckets=(0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0),
+)
+
+HTTP_CACHE = HttpCache(CACHE_DIR, CACHE_MAX_BYTES) if CACHE_MAX_BYTES > 0 else None
+PAGE_CACHE = PageCache(PAGE_CACHE_MAX_BYTES, PAGE_CACHE_TTL)
+TRANSPORT = ConnectionPool(
+    max_idle_per_host=max(PER_HOST_CONCURRENCY, 1),
+    compression=COMPRESSION,
+    observe=lambda stage, seconds: STAGE_SECONDS.observe(seconds, stage=stage),
+)
+SEARCH_INDEX = SearchIndex(SEARCH_INDEX_PATH) if SEARCH_INDEX_ENABLED else None
+CRAWL_STATE = CrawlState(CRAWL_STATE_PATH)
+RETRY_POLICY = RetryPolicy(RETRIES, RETRY_BASE_DELAY, RETRY_MAX_DELAY)
+LATENCY = LatencyTracker()
+if CLEAN_PROCESSES == "auto":
+    _cpus = available_cpus()
+    _clean_workers = _cpus if _cpus > 1 else 0
+else:
+    _clean_workers = int(CLEAN_PROCESSES)
+CLEAN_POOL = ProcessPool(_clean_workers) if _clean_workers > 0 else None
+# Set by main() from --max-concurrent-calls
+TOOL_SLOTS: asyncio.Semaphore | None = None
+_listed_tools = False
+
+logger = logging.getLogger(__name__)
+
+
+def _open_snapshot(path: str) -> Snapshot | None:
+    """Map the configured snapshot, or log why it cannot be used."""
+    try:
+        return Snapshot(path)
+    except (OSError, ValueError) as e:
+        logger.warning("Not using snapshot %s: %s", path, e)
+        return None
+
+
+SNAPSHOT = _open_snapshot(SNAPSHOT_PATH) if SNAPSHOT_PATH else None
+
+
+@METRICS.collector
+def _cache_metrics() -> list[tuple[str, str, list[tuple[dict[str, str], float]]]]:
+    """Hit/miss counters of the page cache and snapshot, read at scrape time."""
+    caches = {"page": PAGE_CACHE.stats()}
+    if SNAPSHOT is not None:
+        caches["snapshot"] = SNAPSHOT.stats()
+    return [
+        (
+            f"docfetch_cache_{result}_total",
+            f"Cleaned-page lookups by cache ({result})",
+            [({"cache": cache}, stats[result]) for cache, stats in caches.items()],
+        )
+        for result in ("hits", "misses")
+    ]
+
+
+async def _fetch_robots_txt(origin: str) -> str | None:
+    """Fetch an origin's robots.txt for the politeness scheduler (None if unavailable or slow)."""
+    try:
+        body, _, _, _ = await asyncio.wait_for(
+            _download(f"{origin}/robots.txt", {"User-Agent": USER_AGENT}, ROBOTS_MAX_BYTES), ROBOTS_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        logger.info("robots.txt for %s timed out after %g s, fetching without a Crawl-delay", origin, ROBOTS_TIMEOUT)
+        return None
+    except Exception as e:
+        logger.debug("No robots.txt for %s: %s", origin, e)
+        return None
+    return body.decode("utf-8", errors="ignore")
+
+
+SCHEDULER = PolitenessScheduler(
+    RATE_LIMIT,
+    RATE_BURST,
+    fetch_robots=_fetch_robots_txt if ROBOTS_TXT else None,
+    user_agent="MCP-DocumentFetcher",
+    max_retry_after=MAX_RETRY_AFTER,
+)
 
 
 @dataclass
@@ -39,18 +246,294 @@ class Page:
         url: The source URL of the page
         title: Extracted or derived title of the page
         content: Cleaned text content of the page
+        truncated: True if the body exceeded MAX_BYTES and was cut short
+        digest: SHA-256 hex digest of the raw body
+        chunks: Heading-aware chunks of content
+        content_hash: Hash of the cleaned text, for exact duplicate detection
+        simhash: SimHash fingerprint of the cleaned text, for near duplicates
+        duplicate_of: URL of the page this one duplicates, if any
+        etag: ETag validator of the response the page was cleaned from
+        last_modified: Last-Modified validator of that response
+        change: "added", "changed" or "unchanged" in incremental crawls
     """
 
     url: str  # Source URL of the page
     title: str  # Page title (extracted or derived)
     content: str  # Cleaned text content
+    truncated: bool = False  # Body was cut at MAX_BYTES
+    digest: str = ""  # Digest of the raw body
+    chunks: list[Chunk] = field(default_factory=list)  # Chunks of content
+    content_hash: str = ""  # Hash of the cleaned text
+    simhash: int = 0  # Near-duplicate fingerprint
+    duplicate_of: str | None = None  # Page with the same content
+    etag: str | None = None  # ETag of the source response
+    last_modified: str | None = None  # Last-Modified of the source response
+    change: str | None = None  # Incremental crawl status
+
+
+@dataclass
+class _Response:
+    """A fetched (or cached) HTTP response body.
+
+    Attributes:
+        url: The requested URL
+        body: Raw response body
+        digest: SHA-256 hex digest of the body
+        content_type: Content-Type header, if any
+        from_cache: True if no full download was needed (fresh or 304)
+        truncated: True if the body was cut at MAX_BYTES
+        etag: ETag validator, if the server sent one
+        last_modified: Last-Modified validator, if the server sent one
+    """
+
+    url: str
+    body: bytes
+    digest: str
+    content_type: str | None
+    from_cache: bool = False
+    truncated: bool = False
+    etag: str | None = None
+    last_modified: str | None = None
+
+    @property
+    def charset(self) -> str:
+        """Character set from Content-Type, a BOM or a <meta charset>, else UTF-8."""
+        charset = None
+        if self.content_type:
+            msg = Message()
+            msg["Content-Type"] = self.content_type
+            charset = msg.get_content_charset()
+        if not charset:
+            if self.body.startswith(codecs.BOM_UTF8):
+                charset = "utf-8-sig"
+            elif self.body.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+                charset = "utf-16"
+            else:
+                match = _META_CHARSET.search(self.body, 0, 1024)
+                charset = match.group(1).decode("ascii") if match else "utf-8"
+        try:
+            return codecs.lookup(charset).name
+        except LookupError:
+            return "utf-8"
+
+    def text(self) -> str:
+        """Decode the body as text."""
+        return "".join(iter_text(self.body, self.charset, CHUNK_SIZE))
+
+
+async def _read_body(r, max_bytes: int) -> tuple[bytes, bool]:
+    """Read a response body in chunks, stopping once max_bytes is exceeded.
+
+    A Content-Length above the limit marks the body as truncated up front,
+    and only the first max_bytes are downloaded.
+
+    Args:
+        r: An open transport response
+        max_bytes: Maximum number of body bytes to keep
+
+    Returns:
+        The (possibly truncated) body and whether it was truncated
+
+    """
+    length = r.headers.get("Content-Length", "")
+    truncated = length.isdigit() and int(length) > max_bytes
+    chunks = []
+    size = 0
+    while True:
+        chunk = await r.read(min(CHUNK_SIZE, max_bytes + 1 - size))
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size += len(chunk)
+        if size > max_bytes:
+            truncated = True
+            chunks[-1] = chunk[: len(chunk) - (size - max_bytes)]
+            break
+    return b"".join(chunks), truncated
+
+
+def _cached_response(entry: CacheEntry, body: bytes) -> _Response:
+    """Build a response served from an HTTP cache entry."""
+    return _Response(
+        entry.url,
+        body,
+        entry.digest,
+        entry.content_type,
+        from_cache=True,
+        etag=entry.etag,
+        last_modified=entry.last_modified,
+    )
+
+
+async def _download(url: str, headers: dict[str, str], max_bytes: int = MAX_BYTES) -> tuple[bytes, bool, Message, int]:
+    """GET a URL and read its body (up to max_bytes).
+
+    Returns:
+        The body, whether it was truncated, the response headers and status
+
+    """
+    async with TRANSPORT.open(url, headers, TIMEOUT) as r:
+        with STAGE_SECONDS.time(stage="download"):
+            body, truncated = await _read_body(r, max_bytes)
+        DOWNLOADED_BYTES.inc(len(body), host=urlsplit(url).netloc.lower())
+        return body, truncated, r.headers, r.status
+
+
+async def _attempt_download(
+    url: str, headers: dict[str, str], max_bytes: int = MAX_BYTES
+) -> tuple[bytes, bool, Message, int]:
+    """Download a URL within DEADLINE seconds, recording the latency of successes."""
+    start = time.monotonic()
+    try:
+        result = await asyncio.wait_for(_download(url, headers, max_bytes), DEADLINE)
+    except asyncio.TimeoutError as e:
+        raise urllib.error.URLError(TimeoutError(f"timed out fetching {url}")) from e
+    LATENCY.record(urlsplit(url).netloc.lower(), time.monotonic() - start)
+    return result
+
+
+async def _hedged_download(
+    url: str, headers: dict[str, str], max_bytes: int = MAX_BYTES
+) -> tuple[bytes, bool, Message, int]:
+    """Download a URL, racing a second request if the first is slower than HEDGE_PERCENTILE."""
+    delay = None
+    if HEDGE_PERCENTILE > 0:
+        delay = LATENCY.percentile(urlsplit(url).netloc.lower(), HEDGE_PERCENTILE)
+        if delay is not None:
+            delay = max(delay, HEDGE_MIN_DELAY)
+
+    async def backup() -> tuple[bytes, bool, Message, int]:
+        await SCHEDULER.acquire(url)
+        logger.debug("Hedging slow request to %s", url)
+        return await _attempt_download(url, headers, max_bytes)
+
+    return await hedged(lambda: _attempt_download(url, headers, max_bytes), backup, delay)
+
+
+async def _polite_download(
+    url: str, headers: dict[str, str], max_bytes: int = MAX_BYTES
+) -> tuple[bytes, bool, Message, int]:
+    """Download a URL once the politeness scheduler allows it.
+
+    429 and 503 responses pause the host (honouring Retry-After) and are
+    retried up to THROTTLE_RETRIES times; other transient failures are
+    retried up to RETRIES times with jittered backoff. Each attempt must
+    finish within DEADLINE seconds; time spent waiting for the host does
+    not count.
+
+    Raises:
+        urllib.error.URLError: If the request fails or misses the deadline
+    """
+    throttles = retries = 0
+    while True:
+        await SCHEDULER.acquire(url)
+        try:
+            result = await _hedged_download(url, headers, max_bytes)
+        except Exception as e:
+            if not (isinstance(e, urllib.error.HTTPError) and e.code < 400):
+                FETCH_ERRORS.inc(host=urlsplit(url).netloc.lower(), error=_error_kind(e))
+            if isinstance(e, urllib.error.HTTPError):
+                retry_after = e.headers.get("Retry-After") if e.headers else None
+                if e.code in (429, 503) and throttles < THROTTLE_RETRIES and SCHEDULER.throttled(url, retry_after):
+                    logger.info("%s answered %d, retrying after backoff", url, e.code)
+                    throttles += 1
+                    continue
+                if e.code < 400:
+                    SCHEDULER.succeeded(url)
+            if retries >= RETRY_POLICY.retries or not is_transient(e):
+                raise
+            retries += 1
+            delay = RETRY_POLICY.backoff(retries)
+            logger.info("Fetching %s failed (%s), retry %d in %.2fs", url, e, retries, delay)
+            await asyncio.sleep(delay)
+            continue
+        SCHEDULER.succeeded(url)
+        return result
+
+
+def _error_kind(error: Exception) -> str:
+    """Metrics label for a failed fetch: the HTTP status, else the exception type."""
+    if isinstance(error, urllib.error.HTTPError):
+        return str(error.code)
+    if isinstance(error, urllib.error.URLError) and isinstance(error.reason, BaseException):
+        error = error.reason
+    return type(error).__name__
+
+
+async def _fetch(
+    url: str, revalidate: bool = False, validators: dict[str, str] | None = None, max_bytes: int = MAX_BYTES
+) -> _Response | None:
+    """Fetch a URL through the HTTP cache.
+
+    Fresh cache entries are returned without touching the network (unless
+    revalidate is set); stale ones are revalidated with a conditional GET.
+    Network requests go through the per-host politeness scheduler; cache
+    I/O runs in worker threads so the event loop never blocks.
+
+    Args:
+        url: The URL to fetch
+        revalidate: Revalidate cache entries even while they are fresh
+        validators: Conditional headers to send when the HTTP cache has no
+            entry for url (e.g. from an earlier incremental crawl)
+        max_bytes: Size limit of the body read from the network
+
+    Returns:
+        The response body and metadata, or None if validators were given,
+        nothing was cached and the server answered 304 Not Modified
+
+    Raises:
+        urllib.error.URLError: If the request fails or misses the deadline
+    """
+    entry = await asyncio.to_thread(HTTP_CACHE.lookup, url) if HTTP_CACHE else None
+    if entry and entry.is_fresh() and not revalidate:
+        body = await asyncio.to_thread(HTTP_CACHE.read_body, entry)
+        if body is not None:
+            HTTP_CACHE_LOOKUPS.inc(result="fresh")
+            return _cached_response(entry, body)
+        entry = None
+
+    headers = {"User-Agent": USER_AGENT}
+    if entry:
+        headers.update(entry.conditional_headers())
+    elif validators:
+        headers.update(validators)
+    try:
+        body, truncated, response_headers, status = await _polite_download(url, headers, max_bytes)
+    except urllib.error.HTTPError as e:
+        if e.code != 304 or (entry is None and not validators):
+            raise
+        if entry is None:
+            return None
+        entry = await asyncio.to_thread(HTTP_CACHE.revalidated, entry, e.headers)
+        body = await asyncio.to_thread(HTTP_CACHE.read_body, entry)
+        if body is not None:
+            HTTP_CACHE_LOOKUPS.inc(result="revalidated")
+            return _cached_response(entry, body)
+        # Blob vanished underneath us; fall back to a plain GET
+        return await _fetch(url, max_bytes=max_bytes)
+
+    digest = hashlib.sha256(body).hexdigest()
+    if HTTP_CACHE:
+        HTTP_CACHE_LOOKUPS.inc(result="miss")
+    if HTTP_CACHE and status == 200 and not truncated:
+        await asyncio.to_thread(HTTP_CACHE.store, url, body, response_headers, digest)
+    return _Response(
+        url,
+        body,
+        digest,
+        response_headers.get("Content-Type"),
+        truncated=truncated,
+        etag=response_headers.get("ETag"),
+        last_modified=response_headers.get("Last-Modified"),
+    )
 
 
-def _get(url: str) -> str:
+async def _get(url: str, revalidate: bool = False) -> str:
     """Fetch content from a URL with proper headers and timeout.
 
     Args:
         url: The URL to fetch
+        revalidate: Revalidate a cached copy even while it is fresh
 
     Returns:
         The decoded text content of the response
@@ -58,26 +541,53 @@ def _get(url: str) -> str:
     Raises:
         urllib.error.URLError: If the request fails
     """
-    req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
-    with urllib.request.urlopen(req, timeout=TIMEOUT) as r:
-        return r.read().decode("utf-8", errors="ignore")
+    return (await _fetch(url, revalidate)).text()
 
 
-def parse_llms_txt(url: str) -> list[tuple[str, str]]:
+async def parse_llms_txt(url: str, revalidate: bool = False) -> list[tuple[str, str]]:
     """Parse an llms.txt file and extract document links.
 
     Args:
         url: URL of the llms.txt file to parse
+        revalidate: Revalidate a cached copy even while it is fresh
 
     Returns:
         List of (title, url) tuples extracted from markdown links
 
     """
-    txt = _get(url)
-    return [
-        (match.group(1).strip() or match.group(2).strip(), match.group(2).strip())
-        for match in _MD_LINK.finditer(txt)
-    ]
+    from .discovery import markdown_links
+
+    return markdown_links(await _get(url, revalidate))
+
+
+async def discover_links(url: str, revalidate: bool = False) -> AsyncIterator[tuple[str, str]]:
+    """Yield the page links an index leads to, as they are parsed (at most MAX_LINKS).
+
+    Follows nested llms.txt files and sitemap indexes; see discovery.discover.
+
+    Args:
+        url: URL of an llms.txt, llms-full.txt, sitemap or sitemap index
+        revalidate: Revalidate cached copies of the indexes even while fresh
+
+    Raises:
+        urllib.error.URLError: If the index cannot be fetched
+    """
+    from .discovery import MAX_SITEMAP_BYTES, discover, is_sitemap_url
+
+    async def fetch_index(index_url: str) -> tuple[bytes, str]:
+        # Sitemaps may legitimately exceed MAX_BYTES (the sitemaps.org limit is 50 MB)
+        max_bytes = max(MAX_BYTES, MAX_SITEMAP_BYTES) if is_sitemap_url(index_url) else MAX_BYTES
+        response = await _fetch(index_url, revalidate, max_bytes=max_bytes)
+        return response.body, response.charset
+
+    async with aclosing(discover(url, fetch_index)) as links:
+        count = 0
+        async for link in links:
+            yield link
+            count += 1
+            if count >= MAX_LINKS:
+                logger.warning("%s leads to more than %d links, ignoring the rest", url, MAX_LINKS)
+                return
 
 
 def _html_to_text(raw_html: str) -> str:
@@ -90,57 +600,523 @@ def _html_to_text(raw_html: str) -> str:
         Plain text with HTML tags removed and entities unescaped
 
     """
-    stripped = _HTML_BLOCK.sub("", raw_html)  # remove script/style
-    stripped = _TAG.sub(" ", stripped)  # drop tags
-    stripped = html.unescape(stripped)
-    # normalize whitespace, remove empty lines
-    lines = [ln.strip() for ln in stripped.splitlines()]
-    return "\n".join(ln for ln in lines if ln)
+    return extract([raw_html]).text
 
 
-def _extract_html_title(raw_html: str) -> str | None:
-    """Extract title from HTML content using multiple strategies.
+async def fetch_and_clean(page_url: str, offload: bool = False) -> Page:
+    """Fetch a web page and return cleaned content.
+
+    Cleaned pages are memoized by (URL, body digest): if the HTTP cache holds
+    a fresh copy whose page is already cleaned, neither the network nor the
+    cleaning pipeline is touched. Otherwise a page in the snapshot is served
+    as is. Cleaning runs in a worker thread.
 
     Args:
-        raw_html: Raw HTML content to extract title from
+        page_url: URL of the page to fetch
+        offload: Clean a large body in the process pool (for batch fetches)
 
     Returns:
-        Extracted title string, or None if no title found
+        Page object with URL, title, and cleaned content
 
     """
-    match = _TITLE_TAG.search(raw_html)
-    if match:
-        return html.unescape(match.group(1)).strip()
-    match = _META_OG.search(raw_html)
-    if match:
-        return html.unescape(match.group(1)).strip()
-    match = _H1_TAG.search(raw_html)
-    if match:
-        inner = _TAG.sub(" ", match.group(1))
-        return html.unescape(inner).strip()
-    return None
-
-
-def fetch_and_clean(page_url: str) -> Page:
-    """Fetch a web page and return cleaned content.
+    entry = await asyncio.to_thread(HTTP_CACHE.lookup, page_url) if HTTP_CACHE else None
+    fresh_digest = entry.digest if entry and entry.is_fresh() else None
+    if fresh_digest:
+        page = PAGE_CACHE.get(page_url, fresh_digest)
+        if page is not None:
+            return page
+    elif SNAPSHOT is not None:
+        page = await asyncio.to_thread(_snapshot_page, page_url)
+        if page is not None:
+            return page
+
+    response = await _fetch(page_url)
+    page = PAGE_CACHE.get(page_url, response.digest) if response.digest != fresh_digest else None
+    return page if page is not None else await _clean_and_cache(page_url, response, offload)
+
+
+async def _clean_and_cache(page_url: str, response: _Response, offload: bool = False) -> Page:
+    """Clean a response into a Page, memoize it and add it to the search index.
+
+    With offload set, bodies of at least CLEAN_PROCESS_MIN_BYTES are cleaned
+    in the process pool (if enabled), so a batch of large pages uses every
+    core; everything else is cleaned in a worker thread, sparing small pages
+    the cost of shipping bodies to another process.
+    """
+    if offload and CLEAN_POOL is not None and len(response.body) >= CLEAN_PROCESS_MIN_BYTES:
+        try:
+            with STAGE_SECONDS.time(stage="clean"):
+                cleaned = await CLEAN_POOL.run(
+                    clean_body,
+                    page_url,
+                    response.body,
+                    response.charset,
+                    response.digest,
+                    CHUNK_TOKENS,
+                    CHUNK_OVERLAP,
+                    response.content_type,
+                )
+        except BrokenProcessPool as e:
+            logger.warning("Cleaning process failed for %s, cleaning in-process: %s", page_url, e)
+        else:
+            page = _page(page_url, response, cleaned)
+            await asyncio.to_thread(_cache_and_index, page)
+            return page
+    return await asyncio.to_thread(_clean_and_cache_sync, page_url, response)
+
+
+def _snapshot_page(page_url: str) -> Page | None:
+    """Look a page up in the snapshot, adding a hit to the search index.
+
+    Hits are not put in the page cache: the snapshot is already in memory.
+    """
+    try:
+        stored = SNAPSHOT.get(page_url)
+    except ValueError as e:
+        logger.warning("Could not read %s from snapshot: %s", page_url, e)
+        return None
+    if stored is None:
+        return None
+    page = Page(
+        url=page_url,
+        title=stored.title,
+        content=stored.content,
+        truncated=stored.truncated,
+        digest=stored.digest,
+        chunks=stored.chunks,
+        content_hash=stored.content_hash,
+        simhash=stored.simhash,
+    )
+    _index_page(page, page.digest)
+    return page
+
+
+def _clean_and_cache_sync(page_url: str, response: _Response) -> Page:
+    """Clean, memoize and index a response in the calling thread."""
+    page = _clean(page_url, response)
+    _cache_and_index(page)
+    return page
+
+
+def _cache_and_index(page: Page) -> None:
+    """Memoize a freshly cleaned page and add it to the search index."""
+    PAGE_CACHE.put(page.url, page.digest, page)
+    _index_page(page, page.digest)
+
+
+def _index_page(page: Page, digest: str) -> None:
+    """Add a freshly cleaned page to the search index (best effort).
+
+    Pages whose content is already indexed under another URL are skipped,
+    so search results never repeat the same passage.
+    """
+    if SEARCH_INDEX is None or _find_indexed_duplicate(page) is not None:
+        return
+    try:
+        SEARCH_INDEX.add(
+            page.url, page.title, page.content, digest, page.chunks, page.content_hash, page.simhash
+        )
+    except sqlite3.Error as e:
+        logger.warning("Could not index %s: %s", page.url, e)
+
+
+def _find_indexed_duplicate(page: Page) -> str | None:
+    """Return the URL of an indexed page with the same or nearly the same content."""
+    if SEARCH_INDEX is None or not page.content_hash:
+        return None
+    try:
+        return SEARCH_INDEX.find_duplicate(page.url, page.content_hash, page.simhash, MAX_DISTANCE)
+    except sqlite3.Error as e:
+        logger.warning("Could not check %s for duplicates: %s", page.url, e)
+        return None
+
+
+async def _fetch_unique(page_url: str) -> Page:
+    """Fetch and clean a page, pointing it at an indexed duplicate if there is one."""
+    return await asyncio.to_thread(_with_indexed_duplicate, await fetch_and_clean(page_url, offload=True))
+
+
+async def _refresh_unique(page_url: str, previous: PageState | None) -> Page:
+    """Re-fetch a page for an incremental crawl.
+
+    Known pages are revalidated with a conditional request (even if the
+    HTTP cache still considers them fresh) and only cleaned if their body
+    digest changed; unchanged pages come back without content.
 
     Args:
-        page_url: URL of the page to fetch
+        page_url: URL of the page
+        previous: State recorded by the last crawl, or None for a new link
+
+    Returns:
+        The page, with change set to "added", "changed" or "unchanged"
+
+    """
+    validators = previous.conditional_headers() if previous else None
+    response = await _fetch(page_url, revalidate=True, validators=validators)
+    if previous and (response is None or response.digest == previous.digest):
+        return Page(
+            url=page_url,
+            title=previous.title,
+            content="",
+            digest=previous.digest,
+            etag=response.etag if response else previous.etag,
+            last_modified=response.last_modified if response else previous.last_modified,
+            change="unchanged",
+        )
+    page = PAGE_CACHE.get(page_url, response.digest) or await _clean_and_cache(page_url, response, offload=True)
+    page = await asyncio.to_thread(_with_indexed_duplicate, page)
+    return replace(page, change="changed" if previous else "added")
+
+
+def _with_indexed_duplicate(page: Page) -> Page:
+    """Point a page at an indexed page with the same content, if there is one.
+
+    A page that repeats one fetched in an earlier crawl is returned with
+    duplicate_of set and the original's indexed chunks, so callers can use
+    chunk IDs that get_chunks and search_docs know about.
+    """
+    original = _find_indexed_duplicate(page)
+    if original is None:
+        return page
+    try:
+        chunks = SEARCH_INDEX.page_chunks(original)
+    except sqlite3.Error:
+        return page
+    return replace(page, duplicate_of=original, chunks=chunks)
+
+
+def _clean(page_url: str, response: _Response) -> Page:
+    """Turn a raw response body into a cleaned Page (see cleaning.clean_body).
+
+    Args:
+        page_url: URL the body was fetched from
+        response: The fetched response
 
     Returns:
         Page object with URL, title, and cleaned content
 
     """
-    raw = _get(page_url)
-    lower = raw.lower()
-    if "<html" in lower or "<head" in lower or "<body" in lower:
-        extracted_title = _extract_html_title(raw)
-        content = _html_to_text(raw)
-        title = extracted_title or page_url.rsplit("/", 1)[-1] or page_url
-        return Page(url=page_url, title=title, content=content)
+    with STAGE_SECONDS.time(stage="clean"):
+        cleaned = clean_body(
+            page_url,
+            response.body,
+            response.charset,
+            response.digest,
+            CHUNK_TOKENS,
+            CHUNK_OVERLAP,
+            response.content_type,
+        )
+    return _page(page_url, response, cleaned)
+
+
+def _page(page_url: str, response: _Response, cleaned: CleanedBody) -> Page:
+    """Build the Page for a response from its cleaned body."""
+    return Page(
+        url=page_url,
+        title=cleaned.title,
+        content=cleaned.content,
+        truncated=response.truncated,
+        digest=response.digest,
+        chunks=cleaned.chunks,
+        content_hash=cleaned.content_hash,
+        simhash=cleaned.simhash,
+        etag=response.etag,
+        last_modified=response.last_modified,
+    )
+
+
+async def fetch_pages(
+    links: Iterable[tuple[str, str]] | AsyncIterable[tuple[str, str]],
+    max_concurrency: int = MAX_CONCURRENCY,
+    per_host_concurrency: int = PER_HOST_CONCURRENCY,
+    on_page: Callable[[int, Page], Awaitable[None]] | None = None,
+    previous: dict[str, PageState] | None = None,
+    timeout: float | None = None,
+) -> list[Page]:
+    """Fetch and clean several pages concurrently.
+
+    Fetches run on the event loop (cleaning in worker threads, or in worker
+    processes for large pages when CLEAN_PROCESSES is set), so cancelling
+    the caller stops every download in flight. A page is only started once
+    both a per-host slot and a global slot are free, so one slow host
+    cannot occupy the whole pool.
+
+    Duplicates are collapsed: links whose canonical URLs match are fetched
+    once, and pages whose content repeats (exactly or nearly) a page fetched
+    earlier in the run or already in the search index get duplicate_of set.
+
+    Args:
+        links: (title, url) tuples as returned by parse_llms_txt, or an async
+            iterable of them (such as discover_links); each page is started
+            as soon as its link arrives
+        max_concurrency: Maximum number of requests in flight overall
+        per_host_concurrency: Maximum number of requests in flight per host
+        on_page: Awaited with (index, page) as soon as each page is done,
+            in completion order
+        previous: Page states from the last crawl of the same llms.txt;
+            when given, pages are revalidated and tagged with their change
+            (see _refresh_unique) instead of fetched unconditionally
+        timeout: Seconds each page may take once it has its slots (default:
+            no limit beyond the per-request TIMEOUT); slower pages become
+            error pages
+
+    Returns:
+        Pages in the same order as links; failed fetches become error pages
+
+    """
+    total = asyncio.Semaphore(max(1, max_concurrency))
+    per_host: dict[str, asyncio.Semaphore] = {}
+    detector = DuplicateDetector()
+    first_by_canonical: dict[str, str] = {}
+
+    async def fetch_one(index: int, title: str, url: str) -> Page:
+        original = first_by_canonical.setdefault(canonical_url(url), url)
+        if original != url:
+            change = None if previous is None else "unchanged" if url in previous else "added"
+            page = Page(url=url, title=title, content="", duplicate_of=original, change=change)
+        else:
+            host = urlsplit(url).netloc.lower()
+            host_slot = per_host.setdefault(host, asyncio.Semaphore(max(1, per_host_concurrency)))
+            async with host_slot, total:
+                try:
+                    if previous is None:
+                        fetch = _fetch_unique(url)
+                    else:
+                        fetch = _refresh_unique(url, previous.get(url))
+                    page = await asyncio.wait_for(fetch, timeout)
+                except Exception as e:
+                    # Only wait_for's own timeout is reported as such; other timeouts keep their message
+                    if isinstance(e, asyncio.TimeoutError) and timeout is not None and not str(e):
+                        reason = f"timed out after {timeout:g} s"
+                    else:
+                        reason = str(e) or type(e).__name__
+                    page = Page(url=url, title=title, content=f"Error: {reason}")
+            if page.content_hash:
+                original = detector.check(url, page.content_hash, page.simhash)
+                if original is not None:
+                    page = replace(page, duplicate_of=original, chunks=[])
+        if on_page is not None:
+            await on_page(index, page)
+        return page
+
+    tasks: list[asyncio.Task] = []
+    try:
+        if isinstance(links, AsyncIterable):
+            async for title, url in links:
+                tasks.append(asyncio.ensure_future(fetch_one(len(tasks), title, url)))
+        else:
+            tasks.extend(asyncio.ensure_future(fetch_one(i, title, url)) for i, (title, url) in enumerate(links))
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        # Discovery failed or the caller was cancelled: stop the fetches in flight
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def export_snapshot(path: str) -> int:
+    """Write every page in the search index to a snapshot file.
+
+    Pages are cleaned again through the caches (page cache, snapshot, HTTP
+    cache, then the network), so exporting right after fetch_documentation
+    sends no requests. Pages that cannot be fetched are logged and skipped.
+
+    Args:
+        path: File to write; replaced only once the snapshot is complete
+
+    Returns:
+        Number of pages written
+
+    """
+    urls = await asyncio.to_thread(SEARCH_INDEX.urls)
+    writer = await asyncio.to_thread(SnapshotWriter, path)
+    slots = asyncio.Semaphore(max(1, MAX_CONCURRENCY))
+
+    async def export_one(url: str) -> None:
+        async with slots:
+            try:
+                page = await fetch_and_clean(url)
+            except Exception as e:
+                logger.warning("Not exporting %s: %s", url, e)
+                return
+        stored = SnapshotPage(
+            url=page.url,
+            title=page.title,
+            content=page.content,
+            digest=page.digest,
+            content_hash=page.content_hash,
+            simhash=page.simhash,
+            truncated=page.truncated,
+            chunks=page.chunks,
+        )
+        await asyncio.to_thread(writer.add, stored)
+
+    tasks = [asyncio.ensure_future(export_one(url)) for url in urls]
+    try:
+        await asyncio.gather(*tasks)
+        return await asyncio.to_thread(writer.close)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        writer.abort()
+        raise
+
+
+def _format_page_summary(page: Page, content: str | None = None) -> str:
+    """Format one fetch_documentation or fetch_urls entry: title, URL and the chunk outline (or content, if given)."""
+    parts = [f"## {page.title}\n\n", f"URL: {page.url}\n\n"]
+    if page.change:
+        parts.append(f"Status: {page.change}\n\n")
+    if page.change == "unchanged":
+        parts.append("---\n\n")
+        return "".join(parts)
+    if page.duplicate_of and not page.chunks:
+        parts.append(f"Duplicate of: {page.duplicate_of}\n\n---\n\n")
+        return "".join(parts)
+    if page.duplicate_of:
+        parts.append(f"Same content as: {page.duplicate_of} (already indexed)\n\n")
+    if page.truncated:
+        parts.append(f"[Truncated: response exceeded {MAX_BYTES} bytes]\n\n")
+    if content is not None:
+        parts.append(f"{content}\n\n")
+    elif page.chunks:
+        parts.append(f"Chunks: {len(page.chunks)}\n\n")
+        parts.extend(
+            f"- `{chunk.id}` {chunk.heading or '(untitled)'} ({chunk.tokens} tokens)\n" for chunk in page.chunks
+        )
+        parts.append("\n")
     else:
-        title = page_url.rsplit("/", 1)[-1] or page_url
-        return Page(url=page_url, title=title, content=raw)
+        parts.append(f"{page.content}\n\n")
+    parts.append("---\n\n")
+    return "".join(parts)
+
+
+def _section_starts(chunks: list[Chunk]) -> list[int]:
+    """Offsets where the sections of a page begin (each first chunk under a new heading)."""
+    return [chunk.start for i, chunk in enumerate(chunks) if i == 0 or chunk.heading != chunks[i - 1].heading]
+
+
+def _fit_content(page: Page, max_tokens: int) -> str:
+    """Page content cut to about max_tokens at a section, paragraph or sentence boundary.
+
+    A cut page ends with a note naming the chunks that hold the rest, so an
+    agent can page through them with get_chunks.
+    """
+    if estimate_tokens(page.content) <= max_tokens:
+        return page.content
+    text = truncate(page.content, max_tokens - _TRUNCATION_NOTE_TOKENS, _section_starts(page.chunks))
+    rest = [chunk for chunk in page.chunks if chunk.end > len(text)]
+    if not rest:
+        return f"{text}\n\n[Truncated to fit max_tokens]"
+    return f"{text}\n\n[Truncated to fit max_tokens; the rest is in chunks `{rest[0].id}` to `{rest[-1].id}`]"
+
+
+def _format_budgeted(pages: list[Page], max_tokens: int, query: str | None = None) -> list[str]:
+    """Format fetch_documentation or fetch_urls entries with page content, fitting about max_tokens in all.
+
+    Pages are served whole in the given order, or most relevant to query
+    first, until the budget runs out; the page where it runs out is cut at
+    a boundary and the remaining pages are only listed by URL.
+    """
+    frames = [estimate_tokens(_format_page_summary(page, "")) for page in pages]
+    needs = [estimate_tokens(_format_page_summary(page, page.content)) for page in pages]
+    listings = [estimate_tokens(f"- {page.url}\n") for page in pages]
+    order = None
+    if query:
+        scores = relevance(query, [page.content for page in pages])
+        order = sorted(range(len(pages)), key=lambda i: -scores[i])
+    granted = allocate(
+        [need - listing for need, listing in zip(needs, listings)],
+        max_tokens - estimate_tokens(_OMITTED_HEADER) - sum(listings),
+        order,
+        minimum=_MIN_PAGE_TOKENS,
+    )
+
+    entries, omitted = [], []
+    for page, frame, need, listing, share in zip(pages, frames, needs, listings, granted):
+        content_tokens = share + listing - frame
+        if share == need - listing:
+            entries.append(_format_page_summary(page, page.content))
+        elif content_tokens >= _MIN_PAGE_TOKENS:
+            entries.append(_format_page_summary(page, _fit_content(page, content_tokens)))
+        else:
+            omitted.append(f"- {page.url}\n")
+    if omitted:
+        entries.append(_OMITTED_HEADER + "".join(omitted))
+    return entries
+
+
+def _page_state(page: Page) -> PageState:
+    """State to remember for a page after an incremental crawl."""
+    return PageState(page.url, page.title, page.digest, page.etag, page.last_modified)
+
+
+def _format_refresh_header(pages: list[Page], removed: list[str]) -> str:
+    """Format the summary of an incremental fetch_documentation run."""
+    counts = {change: sum(1 for page in pages if page.change == change) for change in ("added", "changed", "unchanged")}
+    failed = sum(1 for page in pages if page.change is None)
+    parts = [
+        f"# Documentation refresh ({counts['added']} added, {counts['changed']} changed, "
+        f"{len(removed)} removed, {counts['unchanged']} unchanged, {failed} failed)\n\n"
+    ]
+    if removed:
+        parts.append("## Removed\n\n")
+        parts.extend(f"- {url}\n" for url in removed)
+        parts.append("\n")
+    return "".join(parts)
+
+
+def _format_hit(hit: SearchHit, prefix: str = "") -> str:
+    """Format one chunk returned by search_docs or get_chunks."""
+    heading = f" > {hit.heading}" if hit.heading else ""
+    return f"## {prefix}{hit.title}{heading}\n\nURL: {hit.url}\nChunk: `{hit.chunk_id}`\n\n{hit.passage}\n\n---\n\n"
+
+
+def _format_metrics() -> str:
+    """Format the HTTP cache, fetch stage and tool metrics for cache_stats."""
+    parts = ["\n## HTTP cache\n\n"]
+    lookups = {key[0]: value for key, value in HTTP_CACHE_LOOKUPS.values().items()}
+    parts.extend(f"- {result}: {int(lookups.get(result, 0))}\n" for result in ("fresh", "revalidated", "miss"))
+    parts.append(f"- downloaded_bytes: {int(sum(DOWNLOADED_BYTES.values().values()))}\n")
+    parts.append(f"- fetch_errors: {int(sum(FETCH_ERRORS.values().values()))}\n")
+
+    parts.append("\n## Fetch stages\n\n")
+    for (stage,), (count, total) in sorted(STAGE_SECONDS.summary().items()):
+        parts.append(f"- {stage}: {count} timed, {total / count * 1000:.1f} ms mean\n")
+
+    parts.append("\n## Tools\n\n")
+    for count, total in FIRST_LIST_TOOLS_SECONDS.summary().values():
+        parts.append(f"- first list_tools: {total / count * 1000:.0f} ms after process start\n")
+    errors = {key[0]: value for key, value in TOOL_ERRORS.values().items()}
+    for (tool,), (count, total) in sorted(TOOL_SECONDS.summary().items()):
+        failed = int(errors.get(tool, 0))
+        parts.append(f"- {tool}: {count} calls, {failed} errors, {total / count * 1000:.1f} ms mean\n")
+    return "".join(parts)
+
+
+def _progress_reporter() -> Callable[[float, float | None, str | None], Awaitable[None]] | None:
+    """Return a callback sending MCP progress notifications for the current request.
+
+    Returns:
+        An async (progress, total, message) callback, or None if the client
+        did not ask for progress (no progressToken) or there is no request
+    """
+    try:
+        ctx = app.request_context
+    except LookupError:
+        return None
+    token = ctx.meta.progressToken if ctx.meta else None
+    if token is None:
+        return None
+
+    async def report(progress: float, total: float | None, message: str | None) -> None:
+        await ctx.session.send_progress_notification(
+            token, progress, total, message=message, related_request_id=ctx.request_id
+        )
+
+    return report
 
 
 # MCP Server Implementation
@@ -149,7 +1125,19 @@ app = Server("document-fetcher")
 
 @app.list_tools()
 async def list_tools() -> list[Tool]:
-    """List available tools."""
+    """List available tools, recording how long the first listing took after startup."""
+    global _listed_tools
+
+    tools = _tools()
+    if not _listed_tools:
+        _listed_tools = True
+        startup = process_age()
+        FIRST_LIST_TOOLS_SECONDS.observe(startup)
+        logger.info("First list_tools response %.3f s after process start", startup)
+    return tools
+
+
+def _tools() -> list[Tool]:
     return [
         Tool(
             name="fetch_url",
@@ -160,20 +1148,66 @@ async def list_tools() -> list[Tool]:
                     "url": {
                         "type": "string",
                         "description": "The URL of the page to fetch",
-                    }
+                    },
+                    "max_tokens": {
+                        "type": "number",
+                        "description": "Approximate token limit for the result; longer pages are cut at a "
+                        "section, paragraph or sentence boundary (default: no limit)",
+                    },
                 },
                 "required": ["url"],
             },
         ),
+        Tool(
+            name="fetch_urls",
+            description="Fetch and clean several web pages in one call, returning each page or its error",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "urls": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": f"The URLs of the pages to fetch (at most {MAX_BATCH_URLS})",
+                    },
+                    "max_concurrency": {
+                        "type": "number",
+                        "description": f"Maximum concurrent page fetches (default: {MAX_CONCURRENCY})",
+                        "default": MAX_CONCURRENCY,
+                    },
+                    "per_host_concurrency": {
+                        "type": "number",
+                        "description": f"Maximum concurrent fetches per host (default: {PER_HOST_CONCURRENCY})",
+                        "default": PER_HOST_CONCURRENCY,
+                    },
+                    "timeout": {
+                        "type": "number",
+                        "description": "Seconds each page may take; slower pages are reported as errors "
+                        "(default: no limit beyond the server's request timeout)",
+                    },
+                    "max_tokens_per_url": {
+                        "type": "number",
+                        "description": "Approximate token limit for each page; longer pages are cut at a "
+                        "section, paragraph or sentence boundary (default: no limit)",
+                    },
+                    "max_tokens": {
+                        "type": "number",
+                        "description": "Approximate token limit for the whole result, shared in URL order; "
+                        "pages past the budget are cut at a boundary or only listed (default: no limit)",
+                    },
+                },
+                "required": ["urls"],
+            },
+        ),
         Tool(
             name="parse_llms_txt",
-            description="Parse an llms.txt file and extract documentation links",
+            description="List the documentation links of an llms.txt file or sitemap, "
+            "following nested llms.txt files and sitemap indexes",
             inputSchema={
                 "type": "object",
                 "properties": {
                     "url": {
                         "type": "string",
-                        "description": "The URL of the llms.txt file to parse",
+                        "description": "The URL of the llms.txt file, sitemap.xml or sitemap index to parse",
                     }
                 },
                 "required": ["url"],
@@ -181,88 +1215,394 @@ async def list_tools() -> list[Tool]:
         ),
         Tool(
             name="fetch_documentation",
-            description="Fetch multiple documentation pages from an llms.txt file",
+            description="Fetch multiple documentation pages from an llms.txt, llms-full.txt or sitemap.xml",
             inputSchema={
                 "type": "object",
                 "properties": {
                     "llms_txt_url": {
                         "type": "string",
-                        "description": "The URL of the llms.txt file",
+                        "description": "The URL of the llms.txt, llms-full.txt, sitemap.xml or sitemap index",
                     },
                     "max_pages": {
                         "type": "number",
                         "description": "Maximum number of pages to fetch (default: 10)",
                         "default": 10,
                     },
+                    "max_concurrency": {
+                        "type": "number",
+                        "description": f"Maximum concurrent page fetches (default: {MAX_CONCURRENCY})",
+                        "default": MAX_CONCURRENCY,
+                    },
+                    "per_host_concurrency": {
+                        "type": "number",
+                        "description": f"Maximum concurrent fetches per host (default: {PER_HOST_CONCURRENCY})",
+                        "default": PER_HOST_CONCURRENCY,
+                    },
+                    "incremental": {
+                        "type": "boolean",
+                        "description": "Only fetch pages added or changed since the last incremental run "
+                        "of this llms.txt, and report added, changed and removed pages (default: false)",
+                        "default": False,
+                    },
+                    "max_tokens": {
+                        "type": "number",
+                        "description": "Return page content instead of chunk outlines, fitting about this many "
+                        "tokens in all; pages past the budget are cut at a boundary or only listed",
+                    },
+                    "query": {
+                        "type": "string",
+                        "description": "With max_tokens, give the budget to the pages most relevant to this "
+                        "query first (default: llms.txt order)",
+                    },
                 },
                 "required": ["llms_txt_url"],
             },
         ),
+        Tool(
+            name="search_docs",
+            description="Search previously fetched documentation and return the most relevant passages",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "Free-text search query",
+                    },
+                    "k": {
+                        "type": "number",
+                        "description": "Number of passages to return (default: 5)",
+                        "default": 5,
+                    },
+                },
+                "required": ["query"],
+            },
+        ),
+        Tool(
+            name="get_chunks",
+            description="Return chunks of fetched documentation pages by ID (as listed by fetch_documentation)",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "ids": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Chunk IDs to return",
+                    },
+                },
+                "required": ["ids"],
+            },
+        ),
+        Tool(
+            name="export_snapshot",
+            description="Write every documentation page fetched so far to a compressed snapshot file "
+            "in the server's snapshot directory, which a later server can serve without fetching "
+            "(set MCP_DOCFETCH_SNAPSHOT to its path)",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "path": {
+                        "type": "string",
+                        "description": "File name of the snapshot, relative to the snapshot directory",
+                    },
+                },
+                "required": ["path"],
+            },
+        ),
+        Tool(
+            name="cache_stats",
+            description="Show hit/miss counters for the cleaned-page cache",
+            inputSchema={
+                "type": "object",
+                "properties": {},
+            },
+        ),
     ]
 
 
 @app.call_tool()
 async def call_tool(name: str, arguments: Any) -> list[TextContent]:
-    """Handle tool calls."""
+    """Handle tool calls, recording their duration and errors."""
+    if TOOL_SLOTS is not None:
+        async with TOOL_SLOTS:
+            return await _timed_call_tool(name, arguments)
+    return await _timed_call_tool(name, arguments)
+
+
+async def _timed_call_tool(name: str, arguments: Any) -> list[TextContent]:
+    with TOOL_SECONDS.time(tool=name):
+        result = await _call_tool(name, arguments)
+    # Every tool reports failure as a text block starting with "Error"
+    if result and result[0].text.startswith(("Error", "Unknown tool")):
+        TOOL_ERRORS.inc(tool=name)
+    return result
+
+
+async def _call_tool(name: str, arguments: Any) -> list[TextContent]:
+    """Dispatch a tool call."""
 
     if name == "fetch_url":
         url = arguments["url"]
+        max_tokens = arguments.get("max_tokens")
         try:
-            page = fetch_and_clean(url)
-            result = f"# {page.title}\n\nURL: {page.url}\n\n{page.content}"
+            page = await fetch_and_clean(url)
+            with STAGE_SECONDS.time(stage="format"):
+                header = f"# {page.title}\n\nURL: {page.url}\n\n"
+                content = page.content
+                if max_tokens is not None:
+                    content = _fit_content(page, max(int(max_tokens) - estimate_tokens(header), _MIN_PAGE_TOKENS))
+                result = header + content
+                if page.truncated:
+                    result += f"\n\n[Truncated: response exceeded {MAX_BYTES} bytes]"
             return [TextContent(type="text", text=result)]
         except Exception as e:
             return [TextContent(type="text", text=f"Error fetching URL: {str(e)}")]
 
+    elif name == "fetch_urls":
+        urls = arguments["urls"]
+        max_concurrency = int(arguments.get("max_concurrency", MAX_CONCURRENCY))
+        per_host_concurrency = int(arguments.get("per_host_concurrency", PER_HOST_CONCURRENCY))
+        timeout = arguments.get("timeout")
+        max_tokens_per_url = arguments.get("max_tokens_per_url")
+        max_tokens = arguments.get("max_tokens")
+        if len(urls) > MAX_BATCH_URLS:
+            return [TextContent(type="text", text=f"Error fetching URLs: more than {MAX_BATCH_URLS} URLs")]
+
+        try:
+            report = _progress_reporter()
+            done = 0
+
+            async def on_page(index: int, page: Page) -> None:
+                nonlocal done
+                done += 1
+                await report(done, len(urls), _format_page_summary(page))
+
+            pages = await fetch_pages(
+                [(url, url) for url in urls],
+                max_concurrency,
+                per_host_concurrency,
+                on_page=on_page if report else None,
+                timeout=None if timeout is None else float(timeout),
+            )
+
+            # One content block per URL, in request order
+            with STAGE_SECONDS.time(stage="format"):
+                # Failed fetches are the pages without a body digest (canonical duplicates have none either)
+                failed = sum(1 for page in pages if not page.digest and not page.duplicate_of)
+                duplicates = sum(1 for page in pages if page.duplicate_of and not page.chunks)
+                header = f"# Fetched {len(pages) - failed} of {len(pages)} URLs ({failed} failed"
+                header += f", {duplicates} duplicates collapsed)\n\n" if duplicates else ")\n\n"
+                if max_tokens_per_url is not None:
+                    limit = max(int(max_tokens_per_url), _MIN_PAGE_TOKENS)
+                    pages = [replace(page, content=_fit_content(page, limit)) for page in pages]
+                if max_tokens is None:
+                    entries = [_format_page_summary(page, page.content) for page in pages]
+                else:
+                    entries = _format_budgeted(pages, int(max_tokens) - estimate_tokens(header))
+            return [TextContent(type="text", text=text) for text in [header, *entries]]
+        except Exception as e:
+            return [TextContent(type="text", text=f"Error fetching URLs: {str(e)}")]
+
     elif name == "parse_llms_txt":
         url = arguments["url"]
         try:
-            links = parse_llms_txt(url)
-            result = "# Documentation Links\n\n"
-            for title, link_url in links:
-                result += f"- [{title}]({link_url})\n"
-            return [TextContent(type="text", text=result)]
+            links = [link async for link in discover_links(url)]
+            lines = ["# Documentation Links\n\n"]
+            lines.extend(f"- [{title}]({link_url})\n" for title, link_url in links)
+            return [TextContent(type="text", text="".join(lines))]
         except Exception as e:
             return [TextContent(type="text", text=f"Error parsing llms.txt: {str(e)}")]
 
     elif name == "fetch_documentation":
         llms_txt_url = arguments["llms_txt_url"]
-        max_pages = arguments.get("max_pages", 10)
+        max_pages = int(arguments.get("max_pages", 10))
+        max_concurrency = int(arguments.get("max_concurrency", MAX_CONCURRENCY))
+        per_host_concurrency = int(arguments.get("per_host_concurrency", PER_HOST_CONCURRENCY))
+        incremental = bool(arguments.get("incremental", False))
+        max_tokens = arguments.get("max_tokens")
+        query = arguments.get("query")
 
         try:
-            # Parse llms.txt to get links
-            links = parse_llms_txt(llms_txt_url)
+            previous = await asyncio.to_thread(CRAWL_STATE.load, llms_txt_url) if incremental else None
+            listed: list[str] = []
+            discovered = False
 
-            # Fetch pages (up to max_pages)
-            pages = []
-            for title, url in links[:max_pages]:
-                try:
-                    page = fetch_and_clean(url)
-                    pages.append(page)
-                except Exception as e:
-                    # Skip failed pages
-                    pages.append(Page(url=url, title=title, content=f"Error: {str(e)}"))
+            async def to_fetch() -> AsyncIterator[tuple[str, str]]:
+                # Links feed the fetch queue as they are parsed; incremental runs read the
+                # whole index so pages beyond max_pages are not mistaken for removed ones
+                nonlocal discovered
+                async with aclosing(discover_links(llms_txt_url, incremental)) as links:
+                    async for title, url in links:
+                        listed.append(url)
+                        if len(listed) <= max_pages:
+                            yield title, url
+                        elif previous is None:
+                            break
+                discovered = True
 
-            # Format results
-            result = f"# Documentation (fetched {len(pages)} pages)\n\n"
-            for page in pages:
-                result += f"## {page.title}\n\n"
-                result += f"URL: {page.url}\n\n"
-                result += f"{page.content[:500]}...\n\n"
-                result += "---\n\n"
+            # Stream each page to the client as soon as it is ready
+            report = _progress_reporter()
+            done = 0
 
-            return [TextContent(type="text", text=result)]
+            async def on_page(index: int, page: Page) -> None:
+                nonlocal done
+                done += 1
+                total = min(len(listed), max_pages) if discovered else None
+                await report(done, total, _format_page_summary(page))
+
+            # Fetch pages (up to max_pages), failed pages become error entries
+            pages = await fetch_pages(
+                to_fetch(),
+                max_concurrency,
+                per_host_concurrency,
+                on_page=on_page if report else None,
+                previous=previous,
+            )
+
+            if previous is not None:
+                # Failed pages keep their old state so the next run retries them
+                states = [_page_state(page) for page in pages if page.change]
+                await asyncio.to_thread(CRAWL_STATE.save, llms_txt_url, listed, states)
+                removed = sorted(set(previous) - set(listed))
+                header = _format_refresh_header(pages, removed)
+                pages = [page for page in pages if page.change != "unchanged"]
+            else:
+                duplicates = sum(1 for page in pages if page.duplicate_of)
+                header = f"# Documentation (fetched {len(pages)} pages, {duplicates} duplicates collapsed)\n\n"
+
+            # One content block per page, in llms.txt order (or by relevance, with a budget)
+            with STAGE_SECONDS.time(stage="format"):
+                if max_tokens is None:
+                    entries = [_format_page_summary(page) for page in pages]
+                else:
+                    entries = _format_budgeted(pages, int(max_tokens) - estimate_tokens(header), query)
+            return [TextContent(type="text", text=text) for text in [header, *entries]]
         except Exception as e:
             return [TextContent(type="text", text=f"Error fetching documentation: {str(e)}")]
 
+    elif name == "search_docs":
+        query = arguments["query"]
+        k = int(arguments.get("k", 5))
+        if SEARCH_INDEX is None:
+            return [TextContent(type="text", text="Error searching docs: search index is disabled")]
+        try:
+            hits = await asyncio.to_thread(SEARCH_INDEX.search, query, k)
+        except Exception as e:
+            return [TextContent(type="text", text=f"Error searching docs: {str(e)}")]
+        if not hits:
+            return [TextContent(type="text", text=f"No passages found for: {query}")]
+        parts = [f"# Search results for: {query}\n\n"]
+        parts.extend(_format_hit(hit, f"{rank}. ") for rank, hit in enumerate(hits, 1))
+        return [TextContent(type="text", text="".join(parts))]
+
+    elif name == "get_chunks":
+        ids = [str(chunk_id) for chunk_id in arguments["ids"]]
+        if SEARCH_INDEX is None:
+            return [TextContent(type="text", text="Error getting chunks: search index is disabled")]
+        try:
+            hits = await asyncio.to_thread(SEARCH_INDEX.get_chunks, ids)
+        except Exception as e:
+            return [TextContent(type="text", text=f"Error getting chunks: {str(e)}")]
+        found = {hit.chunk_id for hit in hits}
+        parts = [_format_hit(hit) for hit in hits]
+        missing = [chunk_id for chunk_id in ids if chunk_id not in found]
+        if missing:
+            parts.append(f"Unknown chunk IDs: {', '.join(missing)}\n")
+        return [TextContent(type="text", text="".join(parts))]
+
+    elif name == "cache_stats":
+        stats = PAGE_CACHE.stats()
+        lookups = stats["hits"] + stats["misses"]
+        hit_ratio = stats["hits"] / lookups if lookups else 0.0
+        lines = ["# Cache Statistics\n\n## Page cache\n\n"]
+        lines.extend(f"- {key}: {value}\n" for key, value in stats.items())
+        lines.append(f"- hit_ratio: {hit_ratio:.2%}\n")
+        if SNAPSHOT is not None:
+            lines.append(f"\n## Snapshot ({SNAPSHOT.path})\n\n")
+            lines.extend(f"- {key}: {value}\n" for key, value in SNAPSHOT.stats().items())
+        lines.append(_format_metrics())
+        return [TextContent(type="text", text="".join(lines))]
+
+    elif name == "export_snapshot":
+        if SEARCH_INDEX is None:
+            return [TextContent(type="text", text="Error exporting snapshot: search index is disabled")]
+        try:
+            path = snapshot_path(SNAPSHOT_DIR, arguments["path"])
+            count = await export_snapshot(str(path))
+        except Exception as e:
+            return [TextContent(type="text", text=f"Error exporting snapshot: {str(e)}")]
+        return [TextContent(type="text", text=f"Exported {count} pages to {path}")]
+
     else:
         return [TextContent(type="text", text=f"Unknown tool: {name}")]
 
 
-def main():
+async def _close_clients() -> None:
+    """Release pooled connections once no tool call is running."""
+    TRANSPORT.close()
+
+
+async def _run_stdio() -> None:
+    """Serve one client over stdin/stdout."""
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await app.run(read_stream, write_stream, app.create_initialization_options())
+    finally:
+        await _close_clients()
+
+
+def _run_http(host: str, port: int) -> None:
+    """Serve any number of clients over streamable HTTP and SSE until SIGINT/SIGTERM.
+
+    On shutdown uvicorn stops accepting connections and waits up to
+    SHUTDOWN_TIMEOUT seconds for in-flight requests before closing sessions.
+    """
+    import uvicorn
+
+    from .http_app import build_app
+
+    http_app = build_app(app, metrics=METRICS, on_shutdown=_close_clients)
+    uvicorn.run(http_app, host=host, port=port, timeout_graceful_shutdown=SHUTDOWN_TIMEOUT, log_level="info")
+
+
+def main(argv: list[str] | None = None):
     """Run the MCP server."""
-    import asyncio
-    asyncio.run(stdio_server(app))
+    global TOOL_SLOTS
+
+    parser = argparse.ArgumentParser(prog="mcp-document-fetcher", description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--transport",
+        choices=("stdio", "http"),
+        default=SERVER_TRANSPORT,
+        help="stdio serves one client; http serves many from one warm process (default: %(default)s)",
+    )
+    parser.add_argument("--host", default=HTTP_HOST, help="HTTP bind address (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=HTTP_PORT, help="HTTP port (default: %(default)s)")
+    parser.add_argument(
+        "--max-concurrent-calls",
+        type=int,
+        default=MAX_CONCURRENT_CALLS,
+        help="tool calls running at once across all clients, 0 for no limit (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=METRICS_PORT,
+        help="Prometheus /metrics sidecar port, 0 to disable (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+
+    TOOL_SLOTS = asyncio.Semaphore(args.max_concurrent_calls) if args.max_concurrent_calls > 0 else None
+    metrics_server = serve_metrics(METRICS, METRICS_HOST, args.metrics_port) if args.metrics_port else None
+    try:
+        if args.transport == "http":
+            _run_http(args.host, args.port)
+        else:
+            asyncio.run(_run_stdio())
+    finally:
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        if CLEAN_POOL is not None:
+            CLEAN_POOL.close()
 
 
 if __name__ == "__main__":
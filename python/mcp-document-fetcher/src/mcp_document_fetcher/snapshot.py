@@ -0,0 +1,359 @@
+"""
+Compact, memory-mappable snapshots of cleaned documentation pages.
+
+A snapshot lets a fetcher start warm: export the pages a crawl collected,
+bake the file into an agent image, and serve those pages without fetching
+them again. The file is laid out for reading in place through mmap:
+
+- a fixed header (magic, version, codec, page count, creation time) and a
+  directory of (offset, length) pairs, one per column
+- the page texts, each compressed as its own zstd frame (zlib when the
+  optional ``zstandard`` package is not installed), in the order added
+- columns sorted by URL: variable-length ones (url, title, digest,
+  content_hash, chunks) as count + 1 offsets followed by the bytes, and
+  fixed-width ones (simhash, flags, frame offset, frame length, text size)
+  as packed little-endian arrays
+
+Opening a snapshot reads only the header; a lookup binary-searches the URL
+column and decompresses a single frame straight out of the mapping.
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path, PurePath
+
+from .chunking import Chunk
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+_MAGIC = b"DOCSNAP\x00"
+_VERSION = 1
+CODEC_ZLIB = 0
+CODEC_ZSTD = 1
+_CODEC_NAMES = {CODEC_ZLIB: "zlib", CODEC_ZSTD: "zstd"}
+# Compression levels: snapshots are written once and read many times
+_ZLIB_LEVEL = 9
+_ZSTD_LEVEL = 12
+
+_HEADER = struct.Struct("<8sHHId")
+_VARLEN_COLUMNS = ("url", "title", "digest", "content_hash", "chunks")
+_FIXED_COLUMNS = {"simhash": "Q", "flags": "B", "frame_offset": "Q", "frame_length": "Q", "size": "Q"}
+_COLUMNS = _VARLEN_COLUMNS + tuple(_FIXED_COLUMNS)
+_DIRECTORY = struct.Struct("<" + "QQ" * len(_COLUMNS))
+_OFFSET = struct.Struct("<Q")
+_OFFSET_PAIR = struct.Struct("<QQ")
+_FLAG_TRUNCATED = 1
+_DECOMPRESS_ERRORS = (zlib.error,) + ((zstandard.ZstdError,) if zstandard is not None else ())
+
+
+def snapshot_path(directory: str | Path, name: str) -> Path:
+    """Resolve a client-supplied snapshot name to a file inside directory.
+
+    Args:
+        directory: Directory snapshots may be written to
+        name: Relative file name, optionally with subdirectories
+
+    Returns:
+        The absolute path of the snapshot file
+
+    Raises:
+        ValueError: If name is empty, absolute, contains ".." or resolves
+            (through symlinks) outside directory
+
+    """
+    relative = PurePath(name)
+    if not name or relative.is_absolute() or relative.anchor or ".." in relative.parts:
+        raise ValueError(f"Snapshot path must be relative to the snapshot directory: {name!r}")
+    root = Path(directory).resolve()
+    path = (root / relative).resolve()
+    if path == root or not path.is_relative_to(root):
+        raise ValueError(f"Snapshot path escapes the snapshot directory: {name!r}")
+    return path
+
+
+@dataclass
+class SnapshotPage:
+    """A cleaned page as stored in a snapshot.
+
+    Attributes:
+        url: Source URL of the page
+        title: Page title
+        content: Cleaned text
+        digest: SHA-256 hex digest of the raw body the page was cleaned from
+        content_hash: Hash of content, for exact duplicate detection
+        simhash: SimHash fingerprint of content, for near duplicates
+        truncated: True if the body was cut at the fetcher's size limit
+        chunks: Heading-aware chunks of content
+    """
+
+    url: str
+    title: str
+    content: str
+    digest: str = ""
+    content_hash: str = ""
+    simhash: int = 0
+    truncated: bool = False
+    chunks: list[Chunk] = field(default_factory=list)
+
+
+def default_codec() -> int:
+    """zstd if the zstandard package is installed, else zlib."""
+    return CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+
+
+def _encode_chunks(chunks: list[Chunk]) -> bytes:
+    return json.dumps(
+        [[c.id, c.heading, c.start, c.end, c.tokens] for c in chunks], ensure_ascii=False, separators=(",", ":")
+    ).encode()
+
+
+def _decode_chunks(data: bytes) -> list[Chunk]:
+    return [
+        Chunk(chunk_id, index, heading, start, end, tokens)
+        for index, (chunk_id, heading, start, end, tokens) in enumerate(json.loads(data))
+    ]
+
+
+class SnapshotWriter:
+    """Writes a snapshot file page by page.
+
+    Page texts are compressed and written as they are added, so only the
+    small per-page metadata is held in memory. Nothing appears at path until
+    close(); add() may be called from several threads.
+    """
+
+    def __init__(self, path: str | os.PathLike, codec: int | None = None):
+        """Start a snapshot that close() will move to path.
+
+        Raises:
+            ValueError: If the codec is unknown or its package is missing
+        """
+        self.path = Path(path)
+        self.codec = default_codec() if codec is None else codec
+        if self.codec not in _CODEC_NAMES:
+            raise ValueError(f"Unknown snapshot codec: {self.codec}")
+        if self.codec == CODEC_ZSTD and zstandard is None:
+            raise ValueError("zstd snapshots require the zstandard package")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        self._file = open(self._tmp, "wb")
+        self._file.write(b"\0" * (_HEADER.size + _DIRECTORY.size))
+        self._rows: dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.codec == CODEC_ZSTD:
+            # Compressor objects are not thread-safe; one per call is cheap
+            return zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compress(data)
+        return zlib.compress(data, _ZLIB_LEVEL)
+
+    def add(self, page: SnapshotPage) -> bool:
+        """Add a page; returns False (and keeps the first) if its URL was already added."""
+        if page.url in self._rows:
+            return False
+        text = page.content.encode()
+        frame = self._compress(text)
+        with self._lock:
+            if page.url in self._rows:
+                return False
+            offset = self._file.tell()
+            self._file.write(frame)
+            self._rows[page.url] = (
+                page.title,
+                page.digest,
+                page.content_hash,
+                _encode_chunks(page.chunks),
+                page.simhash,
+                _FLAG_TRUNCATED if page.truncated else 0,
+                offset,
+                len(frame),
+                len(text),
+            )
+        return True
+
+    def close(self) -> int:
+        """Write the columns and header, then move the file into place.
+
+        Returns:
+            Number of pages in the snapshot
+
+        """
+        with self._lock:
+            urls = sorted(self._rows)
+            rows = [self._rows[url] for url in urls]
+            columns = {
+                "url": [url.encode() for url in urls],
+                "title": [row[0].encode() for row in rows],
+                "digest": [row[1].encode() for row in rows],
+                "content_hash": [row[2].encode() for row in rows],
+                "chunks": [row[3] for row in rows],
+            }
+            for position, name in enumerate(_FIXED_COLUMNS, start=4):
+                columns[name] = [row[position] for row in rows]
+
+            directory = []
+            for name in _COLUMNS:
+                start = self._file.tell()
+                if name in _FIXED_COLUMNS:
+                    self._file.write(struct.pack(f"<{len(rows)}{_FIXED_COLUMNS[name]}", *columns[name]))
+                else:
+                    offsets = [0]
+                    for value in columns[name]:
+                        offsets.append(offsets[-1] + len(value))
+                    self._file.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+                    self._file.writelines(columns[name])
+                directory += [start, self._file.tell() - start]
+
+            self._file.seek(0)
+            self._file.write(_HEADER.pack(_MAGIC, _VERSION, self.codec, len(rows), time.time()))
+            self._file.write(_DIRECTORY.pack(*directory))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            os.replace(self._tmp, self.path)
+            return len(rows)
+
+    def abort(self) -> None:
+        """Discard the snapshot being written."""
+        with self._lock:
+            self._file.close()
+            self._tmp.unlink(missing_ok=True)
+
+
+class Snapshot:
+    """A snapshot file opened for lookups, memory-mapped read-only.
+
+    Lookups are safe from several threads; close() must not race them.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        """Map the snapshot at path.
+
+        Raises:
+            OSError: If the file cannot be opened
+            ValueError: If it is not a snapshot this version can read
+        """
+        self.path = Path(path)
+        self.hits = 0
+        self.misses = 0
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size + _DIRECTORY.size:
+                raise ValueError(f"{self.path} is not a document snapshot")
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, self.codec, self.count, self.created = _HEADER.unpack_from(self._mm)
+            if magic != _MAGIC:
+                raise ValueError(f"{self.path} is not a document snapshot")
+            if version != _VERSION:
+                raise ValueError(f"Unsupported snapshot version {version} in {self.path}")
+            if self.codec not in _CODEC_NAMES:
+                raise ValueError(f"Unknown codec {self.codec} in {self.path}")
+            if self.codec == CODEC_ZSTD and zstandard is None:
+                raise ValueError(f"{self.path} is zstd-compressed; install the zstandard package")
+            directory = _DIRECTORY.unpack_from(self._mm, _HEADER.size)
+            self._columns: dict[str, int] = {}
+            for i, name in enumerate(_COLUMNS):
+                start, length = directory[2 * i], directory[2 * i + 1]
+                if name in _FIXED_COLUMNS:
+                    expected = self.count * struct.calcsize(_FIXED_COLUMNS[name])
+                    valid = length == expected
+                else:
+                    valid = length >= (self.count + 1) * _OFFSET.size
+                if not valid or start + length > size:
+                    raise ValueError(f"Corrupt column {name} in {self.path}")
+                self._columns[name] = start
+        except BaseException:
+            self._mm.close()
+            raise
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, url: str) -> bool:
+        return self._find(url) is not None
+
+    def _varlen(self, name: str, index: int) -> bytes:
+        base = self._columns[name]
+        start, end = _OFFSET_PAIR.unpack_from(self._mm, base + index * _OFFSET.size)
+        data = base + (self.count + 1) * _OFFSET.size
+        return self._mm[data + start : data + end]
+
+    def _fixed(self, name: str, index: int) -> int:
+        code = _FIXED_COLUMNS[name]
+        return struct.unpack_from("<" + code, self._mm, self._columns[name] + index * struct.calcsize(code))[0]
+
+    def _find(self, url: str) -> int | None:
+        key = url.encode()
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._varlen("url", mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < self.count and self._varlen("url", lo) == key else None
+
+    def _text(self, index: int) -> str:
+        offset, length = self._fixed("frame_offset", index), self._fixed("frame_length", index)
+        size = self._fixed("size", index)
+        if offset + length > len(self._mm):
+            raise ValueError(f"Corrupt page frame in {self.path}")
+        with memoryview(self._mm)[offset : offset + length] as frame:
+            try:
+                if self.codec == CODEC_ZSTD:
+                    data = zstandard.ZstdDecompressor().decompress(frame, max_output_size=size)
+                else:
+                    data = zlib.decompress(frame, bufsize=max(size, 1))
+            except _DECOMPRESS_ERRORS as e:
+                raise ValueError(f"Corrupt page frame in {self.path}: {e}") from e
+        return data.decode(errors="replace")
+
+    def get(self, url: str) -> SnapshotPage | None:
+        """Return the page stored for url (exact match), or None.
+
+        Raises:
+            ValueError: If the page's data is corrupt
+        """
+        index = self._find(url)
+        if index is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return SnapshotPage(
+            url=url,
+            title=self._varlen("title", index).decode(errors="replace"),
+            content=self._text(index),
+            digest=self._varlen("digest", index).decode(),
+            content_hash=self._varlen("content_hash", index).decode(),
+            simhash=self._fixed("simhash", index),
+            truncated=bool(self._fixed("flags", index) & _FLAG_TRUNCATED),
+            chunks=_decode_chunks(self._varlen("chunks", index)),
+        )
+
+    def urls(self) -> list[str]:
+        """URLs of every page in the snapshot, in ascending order."""
+        return [self._varlen("url", i).decode() for i in range(self.count)]
+
+    def stats(self) -> dict[str, int | str]:
+        """Return hit/miss counters and the snapshot's size and codec."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "pages": self.count,
+            "bytes": len(self._mm),
+            "codec": _CODEC_NAMES[self.codec],
+        }
+
+    def close(self) -> None:
+        """Unmap the file."""
+        self._mm.close()
@@ -0,0 +1,485 @@
+"""
+Pooled keep-alive HTTP transport for the document fetcher, built on asyncio.
+
+Requests run on non-blocking asyncio streams, so many fetches (and many MCP
+tool calls) overlap on one event loop and a cancelled tool call stops its
+downloads immediately. Documentation crawls usually hit one host dozens of
+times in a row, so idle HTTP/1.1 connections are kept per host and reused,
+DNS lookups are cached, and gzip/deflate (and brotli when the optional
+``brotli`` package, 1.2 or later, is installed) are negotiated. Requests that have to go
+through a configured proxy, or use a scheme other than http/https, fall back
+to urllib in a worker thread.
+"""
+
+import asyncio
+import http.client
+import io
+import socket
+import ssl
+import time
+import urllib.error
+import urllib.request
+import zlib
+from email.message import Message
+from typing import Callable
+from urllib.parse import SplitResult, urljoin, urlsplit
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+_REDIRECTS = frozenset({301, 302, 303, 307, 308})
+# brotli before 1.2 cannot bound the output of a call, so a small body could
+# expand without limit; br is only negotiated with a version that can
+_BROTLI_BOUNDED = brotli is not None and hasattr(brotli.Decompressor, "can_accept_more_data")
+# Content-Encodings this transport can decode
+_DECODABLE = {"gzip", "x-gzip", "deflate"} | ({"br"} if _BROTLI_BOUNDED else set())
+_MAX_REDIRECTS = 10
+# Error bodies up to this size are drained so the connection can be reused
+_MAX_DRAIN = 64 * 1024
+# Longest status line plus header block accepted from a server
+_MAX_HEADER_BYTES = 256 * 1024
+# Errors that mean a request failed on the wire
+_NETWORK_ERRORS = (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, http.client.HTTPException, ValueError)
+
+
+class DnsCache:
+    """Cache of getaddrinfo results with a fixed TTL."""
+
+    def __init__(self, ttl: float = 300.0):
+        """Cache lookups for ttl seconds."""
+        self.ttl = ttl
+        self._entries: dict[tuple[str, int], tuple[float, list]] = {}
+
+    async def resolve(self, host: str, port: int) -> list:
+        """Return getaddrinfo() results for a TCP connection to host:port."""
+        key = (host, port)
+        now = time.monotonic()
+        cached = self._entries.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        self._entries[key] = (now + self.ttl, infos)
+        return infos
+
+    def forget(self, host: str, port: int) -> None:
+        """Drop a cached lookup, e.g. after none of its addresses answered."""
+        self._entries.pop((host, port), None)
+
+
+def _host_header(parts: SplitResult) -> str:
+    """Host header for a URL: its host, bracketed if IPv6, and any non-default port."""
+    host = parts.hostname or ""
+    if ":" in host:
+        host = f"[{host}]"
+    default_port = 443 if parts.scheme == "https" else 80
+    port = parts.port or default_port
+    return host if port == default_port else f"{host}:{port}"
+
+
+class _Decompressor:
+    """Incremental Content-Encoding decoder with bounded output per call."""
+
+    def __init__(self, encoding: str):
+        self._encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Decompressor()
+        else:
+            # 47 = auto-detect gzip or zlib headers; deflate may also be raw
+            self._zlib = zlib.decompressobj(47 if encoding in ("gzip", "x-gzip") else zlib.MAX_WBITS)
+        self._raw_deflate_checked = encoding != "deflate"
+
+    @property
+    def needs_input(self) -> bool:
+        """False while input already given still has output to produce."""
+        if self._encoding == "br":
+            return self._brotli.can_accept_more_data()
+        return not self._zlib.unconsumed_tail
+
+    def decompress(self, data: bytes, max_length: int) -> bytes:
+        """Decode data (b"" to continue with buffered input) into at most max_length bytes."""
+        if self._encoding == "br":
+            return self._brotli.process(data, output_buffer_limit=max_length)
+        data = data or self._zlib.unconsumed_tail
+        if not self._raw_deflate_checked:
+            self._raw_deflate_checked = True
+            try:
+                return self._zlib.decompress(data, max_length)
+            except zlib.error:
+                self._zlib = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self._zlib.decompress(data, max_length)
+
+    def flush(self) -> bytes:
+        return b"" if self._encoding == "br" else self._zlib.flush()
+
+
+class _Connection:
+    """One open HTTP/1.1 connection."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @property
+    def usable(self) -> bool:
+        return not self.writer.is_closing() and not self.reader.at_eof()
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class PooledResponse:
+    """An HTTP response whose connection goes back to the pool once consumed.
+
+    Attributes:
+        url: Final URL after redirects
+        status: HTTP status code
+        reason: HTTP reason phrase
+        headers: Response headers
+    """
+
+    def __init__(
+        self,
+        pool: "ConnectionPool | None",
+        key: tuple[str, str, int],
+        conn: _Connection,
+        status: int,
+        reason: str,
+        headers: Message,
+        url: str,
+        timeout: float,
+        will_close: bool,
+    ):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self._pool = pool
+        self._key = key
+        self._conn: _Connection | None = conn
+        self._timeout = timeout
+        self._will_close = will_close
+        encoding = (headers.get("Content-Encoding") or "").strip().lower()
+        self._decoder = _Decompressor(encoding) if encoding in _DECODABLE else None
+        self._done = False
+        # Body framing: chunked, a known length, or until the server closes
+        self._chunked = "chunked" in (headers.get("Transfer-Encoding") or "").lower()
+        self._chunk_left = 0
+        length = headers.get("Content-Length", "")
+        if status in (204, 304) or 100 <= status < 200:
+            self._remaining: int | None = 0
+        elif self._chunked:
+            self._remaining = None
+        elif length.strip().isdigit():
+            self._remaining = int(length)
+        else:
+            self._remaining = None
+            self._will_close = True
+        self._complete = self._remaining == 0 and not self._chunked
+
+    async def _io(self, awaitable):
+        return await asyncio.wait_for(awaitable, self._timeout)
+
+    async def _read_raw(self, amt: int) -> bytes:
+        """Read up to amt bytes of the (still encoded) body; b"" at the end."""
+        if self._complete:
+            return b""
+        reader = self._conn.reader
+        if self._chunked:
+            if self._chunk_left == 0:
+                size_line = await self._io(reader.readuntil(b"\r\n"))
+                size = int(size_line.split(b";", 1)[0].strip(), 16)
+                if size == 0:
+                    # Skip trailers up to the terminating empty line
+                    while (await self._io(reader.readuntil(b"\r\n"))) != b"\r\n":
+                        pass
+                    self._complete = True
+                    return b""
+                self._chunk_left = size
+            data = await self._io(reader.read(min(amt, self._chunk_left)))
+            if not data:
+                raise http.client.IncompleteRead(b"")
+            self._chunk_left -= len(data)
+            if self._chunk_left == 0:
+                await self._io(reader.readexactly(2))
+            return data
+        if self._remaining is None:
+            data = await self._io(reader.read(amt))
+            self._complete = not data
+            return data
+        data = await self._io(reader.read(min(amt, self._remaining)))
+        if not data:
+            raise http.client.IncompleteRead(b"", self._remaining)
+        self._remaining -= len(data)
+        self._complete = self._remaining == 0
+        return data
+
+    async def read(self, amt: int) -> bytes:
+        """Read up to about amt bytes of (decoded) body; b"" at the end."""
+        if self._done:
+            return b""
+        if self._decoder is None:
+            data = await self._read_raw(amt)
+            self._done = not data
+            return data
+        while True:
+            data = b""
+            if self._decoder.needs_input:
+                data = await self._read_raw(amt)
+                if not data:
+                    self._done = True
+                    return self._decoder.flush()
+            out = self._decoder.decompress(data, amt)
+            if out:
+                return out
+
+    def close(self) -> None:
+        """Release the connection: back to the pool if the body was fully read."""
+        if self._conn is None:
+            return
+        if self._pool is not None and self._complete and not self._will_close:
+            self._pool._release(self._key, self._conn)
+        else:
+            self._conn.close()
+        self._conn = None
+
+    async def __aenter__(self) -> "PooledResponse":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.close()
+
+
+class _ThreadedResponse:
+    """Adapter giving a urllib response the PooledResponse interface."""
+
+    def __init__(self, response):
+        self.url = response.url
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+        self._response = response
+
+    async def read(self, amt: int) -> bytes:
+        return await asyncio.to_thread(self._response.read, amt)
+
+    def close(self) -> None:
+        self._response.close()
+
+    async def __aenter__(self) -> "_ThreadedResponse":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.close()
+
+
+class _RequestContext:
+    """Result of ConnectionPool.open: await it, or use it with ``async with``."""
+
+    def __init__(self, coro):
+        self._coro = coro
+        self._response = None
+
+    def __await__(self):
+        return self._coro.__await__()
+
+    async def __aenter__(self):
+        self._response = await self._coro
+        return self._response
+
+    async def __aexit__(self, *exc) -> None:
+        self._response.close()
+
+
+class ConnectionPool:
+    """Per-host pool of idle keep-alive HTTP/1.1 connections.
+
+    Connections are checked out for one request at a time and returned once
+    the response body has been read to the end, so concurrent requests each
+    get their own connection while sequential ones reuse it. The pool must
+    only be used from one event loop at a time.
+    """
+
+    def __init__(
+        self,
+        max_idle_per_host: int = 8,
+        idle_timeout: float = 30.0,
+        compression: bool = True,
+        dns_ttl: float = 300.0,
+        observe: Callable[[str, float], None] | None = None,
+    ):
+        """Create a pool.
+
+        Args:
+            max_idle_per_host: Idle connections kept per (scheme, host, port)
+            idle_timeout: Seconds after which an idle connection is discarded
+            compression: Advertise gzip/deflate (and br if available)
+            dns_ttl: Seconds to cache DNS lookups
+            observe: Called with (stage, seconds) for the "dns", "connect"
+                (TCP and TLS) and "ttfb" (request sent to headers read) stages
+        """
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_timeout = idle_timeout
+        self.accept_encoding = ", ".join(sorted(_DECODABLE - {"x-gzip"})) if compression else "identity"
+        self.dns = DnsCache(dns_ttl)
+        self.connections_opened = 0
+        self._observe = observe or (lambda stage, seconds: None)
+        # Loading the system CA store takes tens of milliseconds; done on first use
+        self._ssl_context: ssl.SSLContext | None = None
+        self._idle: dict[tuple[str, str, int], list[tuple[float, _Connection]]] = {}
+
+    async def _connect(self, key: tuple[str, str, int], timeout: float) -> _Connection:
+        scheme, host, port = key
+        error: BaseException | None = None
+        start = time.monotonic()
+        addresses = await asyncio.wait_for(self.dns.resolve(host, port), timeout)
+        self._observe("dns", time.monotonic() - start)
+        if scheme == "https" and self._ssl_context is None:
+            self._ssl_context = ssl.create_default_context()
+        for family, _, _, _, sockaddr in addresses:
+            start = time.monotonic()
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(
+                        sockaddr[0],
+                        port,
+                        family=family,
+                        ssl=self._ssl_context if scheme == "https" else None,
+                        server_hostname=host if scheme == "https" else None,
+                        limit=_MAX_HEADER_BYTES,
+                    ),
+                    timeout,
+                )
+            except (OSError, asyncio.TimeoutError) as e:
+                error = e
+                continue
+            self.connections_opened += 1
+            self._observe("connect", time.monotonic() - start)
+            return _Connection(reader, writer)
+        self.dns.forget(host, port)
+        raise error or OSError(f"getaddrinfo returned no addresses for {host}")
+
+    async def _checkout(self, key: tuple[str, str, int], timeout: float) -> tuple[_Connection, bool]:
+        now = time.monotonic()
+        idle = self._idle.get(key, [])
+        while idle:
+            since, conn = idle.pop()
+            if now - since < self.idle_timeout and conn.usable:
+                return conn, True
+            conn.close()
+        return await self._connect(key, timeout), False
+
+    def _release(self, key: tuple[str, str, int], conn: _Connection) -> None:
+        idle = self._idle.setdefault(key, [])
+        if len(idle) < self.max_idle_per_host and conn.usable:
+            idle.append((time.monotonic(), conn))
+        else:
+            conn.close()
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for _, conn in connections:
+                conn.close()
+
+    async def _send(self, url: str, headers: dict[str, str], timeout: float) -> PooledResponse:
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        key = (parts.scheme, parts.hostname or "", port)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        lines = [f"GET {path} HTTP/1.1", f"Host: {_host_header(parts)}"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        request = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+        while True:
+            conn, reused = await self._checkout(key, timeout)
+            sent = time.monotonic()
+            try:
+                conn.writer.write(request)
+                await asyncio.wait_for(conn.writer.drain(), timeout)
+                while True:
+                    head = await asyncio.wait_for(conn.reader.readuntil(b"\r\n\r\n"), timeout)
+                    status_line, _, header_block = head.partition(b"\r\n")
+                    version, status, reason = (status_line.decode("latin-1").split(None, 2) + [""])[:3]
+                    if not version.startswith("HTTP/"):
+                        raise http.client.BadStatusLine(status_line.decode("latin-1"))
+                    # Skip interim responses such as 100 Continue
+                    if not 100 <= int(status) < 200:
+                        break
+            except (asyncio.IncompleteReadError, ConnectionResetError, BrokenPipeError) as e:
+                conn.close()
+                if reused:
+                    # The server closed an idle keep-alive connection; retry on a fresh one
+                    continue
+                raise http.client.RemoteDisconnected("Remote end closed connection without response") from e
+            except BaseException:
+                conn.close()
+                raise
+            self._observe("ttfb", time.monotonic() - sent)
+            response_headers = http.client.parse_headers(io.BytesIO(header_block))
+            connection = (response_headers.get("Connection") or "").lower()
+            will_close = "close" in connection or (version == "HTTP/1.0" and "keep-alive" not in connection)
+            return PooledResponse(
+                self, key, conn, int(status), reason.strip(), response_headers, url, timeout, will_close
+            )
+
+    def open(self, url: str, headers: dict[str, str], timeout: float) -> _RequestContext:
+        """Send a GET request, following redirects, and return the response.
+
+        Mirrors urllib.request.urlopen: 3xx responses other than redirects and
+        4xx/5xx responses raise urllib.error.HTTPError (a 304 carries the
+        response headers), and connection failures raise URLError.
+
+        Args:
+            url: URL to fetch
+            headers: Request headers
+            timeout: Timeout in seconds for connecting and for each read
+
+        Returns:
+            An awaitable for a response to read and then close, also usable
+            directly as an async context manager
+
+        """
+        return _RequestContext(self._open(url, headers, timeout))
+
+    async def _open(self, url: str, headers: dict[str, str], timeout: float):
+        parts = urlsplit(url)
+        proxies = urllib.request.getproxies()
+        if parts.scheme not in ("http", "https") or (
+            parts.scheme in proxies and not urllib.request.proxy_bypass(parts.hostname or "")
+        ):
+            request = urllib.request.Request(url, headers=headers)
+            return _ThreadedResponse(await asyncio.to_thread(urllib.request.urlopen, request, timeout=timeout))
+
+        headers = {"Accept-Encoding": self.accept_encoding, **headers}
+        for _ in range(_MAX_REDIRECTS + 1):
+            try:
+                response = await self._send(url, headers, timeout)
+            except _NETWORK_ERRORS as e:
+                raise urllib.error.URLError(e) from e
+            if response.status < 300:
+                return response
+            location = response.headers.get("Location")
+            if response.status in _REDIRECTS and location:
+                await self._discard(response)
+                url = urljoin(url, location)
+                if urlsplit(url).scheme not in ("http", "https"):
+                    raise urllib.error.URLError(f"Refusing redirect to {url}")
+                continue
+            await self._discard(response)
+            raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, None)
+        raise urllib.error.URLError(f"Too many redirects fetching {url}")
+
+    async def _discard(self, response: PooledResponse) -> None:
+        """Drain a small body so the connection can be reused, then release it."""
+        try:
+            drained = 0
+            while drained <= _MAX_DRAIN:
+                chunk = await response._read_raw(_MAX_DRAIN)
+                if not chunk:
+                    break
+                drained += len(chunk)
+        except _NETWORK_ERRORS:
+            pass
+        response.close()
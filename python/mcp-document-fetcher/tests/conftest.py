@@ -0,0 +1,6 @@
+"""Shared test setup: keep the server module's caches out of the user's cache directory."""
+
+import os
+import tempfile
+
+os.environ.setdefault("MCP_DOCFETCH_CACHE_DIR", tempfile.mkdtemp(prefix="docfetch-test-"))
@@ -0,0 +1,60 @@
+"""Tests for token budget truncation, allocation and relevance ranking."""
+
+from mcp_document_fetcher.budget import allocate, relevance, truncate
+from mcp_document_fetcher.chunking import estimate_tokens
+
+PROSE = "The quick brown fox jumps over the lazy dog. " * 40
+
+
+def test_text_that_fits_is_unchanged():
+    assert truncate("short text", 10) == "short text"
+
+
+def test_prefers_given_boundaries():
+    text = "# Intro\n\n" + PROSE + "\n\n# Usage\n\n" + PROSE
+    section = text.index("# Usage")
+
+    cut = truncate(text, (section + 200) // 4, boundaries=[0, section])
+
+    assert cut == text[:section].rstrip()
+
+
+def test_falls_back_to_paragraphs_sentences_and_words():
+    paragraphs = PROSE[:300] + "\n\n" + PROSE
+    assert truncate(paragraphs, 100) == PROSE[:300].rstrip()
+
+    cut = truncate(PROSE, 100)
+    assert cut.endswith("dog.") and estimate_tokens(cut) <= 100
+
+    words = "word " * 200
+    assert truncate(words, 50).endswith("word") and estimate_tokens(truncate(words, 50)) <= 50
+
+
+def test_hard_cut_without_boundaries():
+    text = "x" * 1000
+    assert truncate(text, 10) == "x" * 40
+    assert truncate(text, 0) == ""
+
+
+def test_boundaries_far_before_the_limit_are_ignored():
+    text = "a. " + "x" * 1000
+
+    assert truncate(text, 100, boundaries=[3]) == "a. " + "x" * 397
+
+
+def test_allocate_in_order():
+    assert allocate([100, 50, 200], 400) == [100, 50, 200]
+    assert allocate([100, 50, 200], 250) == [100, 50, 100]
+    # The last share would be too small to be useful
+    assert allocate([100, 50, 200], 160, minimum=20) == [100, 50, 0]
+    assert allocate([100, 50, 200], 200, order=[2, 0, 1]) == [0, 0, 200]
+
+
+def test_relevance_ranks_pages_by_query_words():
+    texts = ["Installing the SDK with pip", "Streaming responses and streaming tools", "Changelog"]
+
+    scores = relevance("how do I use streaming?", texts)
+
+    assert scores[1] > scores[0] and scores[1] > 0
+    assert scores[2] == 0
+    assert relevance("", texts) == [0.0, 0.0, 0.0]
@@ -0,0 +1,68 @@
+"""Tests for heading-aware chunking of cleaned pages."""
+
+from mcp_document_fetcher.chunking import chunk_text, estimate_tokens, markdown_headings
+from mcp_document_fetcher.html_text import extract
+
+MARKDOWN = """Intro line.
+
+# Guide
+
+Some text.
+
+## Install
+
+```
+# not a heading
+pip install thing
+```
+
+## Usage
+
+Call it.
+"""
+
+
+def test_markdown_headings_skip_code_fences():
+    headings = markdown_headings(MARKDOWN)
+
+    assert [(level, title) for _, level, title in headings] == [(1, "Guide"), (2, "Install"), (2, "Usage")]
+    for offset, _, title in headings:
+        assert MARKDOWN[offset:].lstrip("# ").startswith(title)
+
+
+def test_chunks_follow_headings_and_offsets():
+    chunks = chunk_text("https://x/doc.md", "d1", MARKDOWN, markdown_headings(MARKDOWN), 512, 64)
+
+    assert [c.heading for c in chunks] == ["", "Guide", "Guide > Install", "Guide > Usage"]
+    assert MARKDOWN[chunks[2].start : chunks[2].end].startswith("## Install")
+    assert [c.index for c in chunks] == list(range(len(chunks)))
+    assert chunks[0].id.endswith("-0") and len({c.id for c in chunks}) == len(chunks)
+
+
+def test_chunk_ids_are_stable_per_digest():
+    headings = markdown_headings(MARKDOWN)
+    first = chunk_text("https://x/doc.md", "d1", MARKDOWN, headings, 512, 64)
+
+    assert [c.id for c in first] == [c.id for c in chunk_text("https://x/doc.md", "d1", MARKDOWN, headings, 512, 64)]
+    assert first[0].id != chunk_text("https://x/doc.md", "d2", MARKDOWN, headings, 512, 64)[0].id
+
+
+def test_large_sections_split_with_overlap():
+    text = "\n".join(f"line {i:03d} " + "word " * 10 for i in range(100))
+
+    chunks = chunk_text("u", "d", text, [], 100, 20)
+
+    assert len(chunks) > 1
+    assert all(c.tokens <= 100 for c in chunks)
+    assert chunks[0].start == 0 and chunks[-1].end == len(text)
+    for prev, cur in zip(chunks, chunks[1:]):
+        assert cur.start < prev.end  # consecutive windows share lines
+    assert all(estimate_tokens(text[c.start : c.end]) == c.tokens for c in chunks)
+
+
+def test_html_heading_offsets_point_into_text():
+    extractor = extract(["<title>T</title><h1>Top</h1><p>a</p><h2>Sub <a>¶</a></h2><p>b</p>"])
+
+    assert [(level, title) for _, level, title in extractor.headings] == [(1, "Top"), (2, "Sub")]
+    for offset, _, title in extractor.headings:
+        assert extractor.text[offset:].startswith(title)
@@ -0,0 +1,112 @@
+"""Tests for content-type dispatch and the markdown, JSON and plain text fast paths."""
+
+import json
+
+import pytest
+
+from mcp_document_fetcher import cleaning
+from mcp_document_fetcher.cleaning import body_kind, clean_body, format_json, strip_front_matter
+
+DIGEST = "d" * 64
+
+
+def _clean(url: str, body: bytes, content_type: str | None):
+    return clean_body(url, body, "utf-8", DIGEST, 64, 8, content_type)
+
+
+@pytest.mark.parametrize(
+    "url, body, content_type, kind",
+    [
+        ("https://a.dev/", b"<p>no markers</p>", "text/html; charset=utf-8", "html"),
+        ("https://a.dev/x", b"# Title", "text/markdown", "markdown"),
+        ("https://a.dev/x", b"{}", "application/vnd.api+json", "json"),
+        # text/plain and missing types are sniffed
+        ("https://a.dev/x", b"\n<!DOCTYPE html><html>", "text/plain", "html"),
+        ("https://a.dev/x", b"\xef\xbb\xbf<!-- generated -->\n<html><body>hi", None, "html"),
+        ("https://a.dev/x", b"Mentions <body> tags", "text/plain", "text"),
+        ("https://a.dev/README.md", b"<body> first", "text/plain", "markdown"),
+        ("https://a.dev/x", b"---\ntitle: T\n---\n", "text/plain", "markdown"),
+        ("https://a.dev/llms.txt", b"# Docs\n\n- [A](https://a.dev/a)", "text/plain", "text"),
+        ("https://a.dev/x", b'  {"a": 1}', "application/octet-stream", "json"),
+        ("https://a.dev/data.json", b"1", None, "json"),
+        ("https://a.dev/x", b"plain words", None, "text"),
+    ],
+)
+def test_body_kind(url, body, content_type, kind):
+    assert body_kind(url, body, content_type) == kind
+
+
+def test_only_the_head_is_sniffed():
+    body = b"<!--" + b" " * cleaning.SNIFF_BYTES + b"--><html><body>late</body></html>"
+
+    assert body_kind("https://a.dev/notes", body, "text/plain") == "text"
+
+
+def test_markdown_mentioning_html_tags_passes_through():
+    body = (
+        b"# Templates\n\nPut scripts before the closing <body> tag:\n\n"
+        b"```html\n<body><script></script></body>\n```\n"
+    )
+
+    cleaned = _clean("https://a.dev/templates", body, "text/markdown")
+
+    assert cleaned.content == body.decode()
+    assert cleaned.title == "Templates"
+
+
+def test_front_matter_is_stripped_and_titles_the_page():
+    text = '---\ntitle: "Getting started"\nweight: 2\n---\n\n# Install\n\nRun pip.\n'
+
+    assert strip_front_matter(text) == ("# Install\n\nRun pip.\n", "Getting started")
+    assert strip_front_matter("+++\ntitle = 'T'\n+++\nBody") == ("Body", "T")
+    assert strip_front_matter("---\nno end") == ("---\nno end", None)
+
+    cleaned = _clean("https://a.dev/start.md", text.encode(), "text/plain")
+
+    assert cleaned.title == "Getting started"
+    assert cleaned.content.startswith("# Install")
+    assert cleaned.chunks[0].heading == "Install"
+
+
+def test_small_json_is_pretty_printed():
+    cleaned = _clean("https://a.dev/api/items", b'{"items":[1,2],"name":"caf\\u00e9"}', "application/json")
+
+    assert cleaned.content == '{\n  "items": [\n    1,\n    2\n  ],\n  "name": "café"\n}'
+    assert cleaned.chunks
+
+
+def test_large_json_is_outlined(monkeypatch):
+    monkeypatch.setattr(cleaning, "JSON_PRETTY_MAX_BYTES", 100)
+    document = {
+        "info": {"title": "API", "version": "1.0"},
+        "paths": [{"path": f"/p{i}", "ops": 3} for i in range(50)],
+    }
+
+    outline = format_json(json.dumps(document))
+
+    assert outline.splitlines()[2:] == [
+        "- $: object (2 keys)",
+        "  - info: object (2 keys)",
+        '    - title: "API"',
+        '    - version: "1.0"',
+        "  - paths: array (50 items)",
+        "    - [0]: object (2 keys)",
+        '      - path: "/p0"',
+        "      - ops: 3",
+    ]
+
+
+def test_invalid_json_is_kept_as_text():
+    body = b'{"truncated": [1, 2'
+
+    assert format_json(body.decode()) is None
+    assert _clean("https://a.dev/x.json", body, "application/json").content == body.decode()
+
+
+def test_plain_text_keeps_headings_for_chunking():
+    body = b"# Docs\n\nIntro.\n\n## Guides\n\n- [A](https://a.dev/a)\n"
+
+    cleaned = _clean("https://a.dev/llms.txt", body, "text/plain")
+
+    assert cleaned.title == "llms.txt"
+    assert [chunk.heading for chunk in cleaned.chunks] == ["Docs", "Docs > Guides"]
@@ -0,0 +1,26 @@
+"""Tests for the incremental crawl state store."""
+
+from mcp_document_fetcher.crawl_state import CrawlState, PageState
+
+
+def test_save_replaces_link_set(tmp_path):
+    state = CrawlState(tmp_path / "state.sqlite3")
+    state.save("llms", ["a", "b"], [PageState("a", "A", "d1", '"e1"'), PageState("b", "B", "d2")])
+
+    # b changed, a was dropped from llms.txt, c failed and has no state yet
+    state.save("llms", ["b", "c"], [PageState("b", "B", "d3", last_modified="Mon, 01 Jan 2024 00:00:00 GMT")])
+
+    pages = state.load("llms")
+    assert set(pages) == {"b"}
+    assert pages["b"].digest == "d3"
+    assert pages["b"].conditional_headers() == {"If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}
+    assert state.load("other") == {}
+
+
+def test_unfetched_links_keep_previous_state(tmp_path):
+    state = CrawlState(tmp_path / "state.sqlite3")
+    state.save("llms", ["a"], [PageState("a", "A", "d1", '"e1"')])
+
+    state.save("llms", ["a"], [])
+
+    assert state.load("llms")["a"].conditional_headers() == {"If-None-Match": '"e1"'}
@@ -0,0 +1,79 @@
+"""Tests for URL canonicalisation and duplicate page detection."""
+
+import random
+
+import pytest
+
+from mcp_document_fetcher.dedup import MAX_DISTANCE, DuplicateDetector, canonical_url, content_hash, hamming, simhash
+
+TEXT = " ".join(f"Agents call the model with tool {i} and loop until the task is done." for i in range(50))
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "https://docs.example.com/guide",
+        "https://docs.example.com/guide/",
+        "HTTPS://Docs.Example.com:443/guide/index.md",
+        "https://docs.example.com/guide/index.html#install",
+        "https://docs.example.com/guide?utm_source=llms&ref=nav",
+    ],
+)
+def test_url_variants_share_canonical_form(url: str):
+    assert canonical_url(url) == "https://docs.example.com/guide"
+
+
+def test_canonical_url_keeps_meaningful_queries():
+    assert canonical_url("https://x.dev/api?v=2&lang=py") == canonical_url("https://x.dev/api?lang=py&v=2")
+    assert canonical_url("https://x.dev/api?v=2") != canonical_url("https://x.dev/api?v=3")
+
+
+def test_simhash_separates_near_and_different_pages():
+    near = TEXT + " Last updated yesterday."
+    other = " ".join(f"Deploy the runtime to region {i} with the starter toolkit." for i in range(50))
+
+    assert hamming(simhash(TEXT), simhash(near)) <= 3
+    assert hamming(simhash(TEXT), simhash(other)) > 3
+    assert simhash("too short") == 0
+
+
+def _api_reference(seed: int, methods: int) -> str:
+    """A templated API reference page: per-method boilerplate around distinct method names."""
+    rng = random.Random(seed)
+    sections = []
+    for _ in range(methods):
+        name = "".join(rng.choices("abcdefghijklmnop", k=10))
+        sections.append(
+            f"## {name}\n\nParameters\n\ntimeout: seconds to wait before giving up. Returns the response "
+            f"object from the service. Raises ClientError if the request fails.\n\nresult = client.{name}(timeout=30)\n"
+        )
+    return "\n".join(sections)
+
+
+@pytest.mark.parametrize("methods", [20, 60, 150])
+def test_templated_but_distinct_pages_are_not_near_duplicates(methods: int):
+    page, other = _api_reference(1, methods), _api_reference(2, methods)
+    detector = DuplicateDetector()
+
+    assert hamming(simhash(page), simhash(other)) > MAX_DISTANCE
+    assert detector.check("a", content_hash(page), simhash(page)) is None
+    assert detector.check("b", content_hash(other), simhash(other)) is None
+
+
+def test_edited_copy_of_templated_page_is_near_duplicate():
+    page = _api_reference(1, 150)
+    edited = page + " Edited."
+    detector = DuplicateDetector()
+
+    assert detector.check("a", content_hash(page), simhash(page)) is None
+    assert detector.check("b", content_hash(edited), simhash(edited)) == "a"
+
+
+def test_detector_reports_first_copy():
+    detector = DuplicateDetector()
+
+    assert detector.check("a", content_hash(TEXT), simhash(TEXT)) is None
+    assert detector.check("b", content_hash("  " + TEXT.replace(" ", "\n")), 0) == "a"
+    near = TEXT + " Edited."
+    assert detector.check("c", content_hash(near), simhash(near)) == "a"
+    assert detector.check("d", content_hash("other page"), simhash("other page")) is None
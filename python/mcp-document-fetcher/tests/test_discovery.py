@@ -0,0 +1,189 @@
+"""Tests for llms.txt and sitemap discovery."""
+
+import gzip
+import urllib.error
+
+import pytest
+
+from mcp_document_fetcher import discovery, server
+from mcp_document_fetcher.discovery import SitemapParser, _sitemap_chunks, discover, is_sitemap
+
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+def _urlset(*locs: str) -> bytes:
+    entries = "".join(f"<url><loc>{loc}</loc><lastmod>2024-01-01</lastmod></url>" for loc in locs)
+    return f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset {NS}>{entries}</urlset>'.encode()
+
+
+def _index(*locs: str) -> bytes:
+    entries = "".join(f"<sitemap><loc>{loc}</loc></sitemap>" for loc in locs)
+    return f"<sitemapindex {NS}>{entries}</sitemapindex>".encode()
+
+
+def _fake_fetch(site: dict[str, bytes], fetched: list[str] | None = None):
+    async def fetch(url: str) -> tuple[bytes, str]:
+        if fetched is not None:
+            fetched.append(url)
+        if url not in site:
+            raise urllib.error.URLError(f"no such page: {url}")
+        return site[url], "utf-8"
+
+    return fetch
+
+
+async def _collect(url: str, site: dict[str, bytes], **kwargs) -> list[tuple[str, str]]:
+    return [link async for link in discover(url, _fake_fetch(site), **kwargs)]
+
+
+def test_sitemap_parser_yields_entries_incrementally():
+    body = _urlset(*(f"https://x.dev/docs/{i}" for i in range(100)))
+    parser = SitemapParser()
+
+    first = parser.feed(body[: len(body) // 2])
+    rest = parser.feed(body[len(body) // 2 :]) + parser.close()
+
+    assert 0 < len(first) < 100
+    assert [loc for _, loc in first + rest] == [f"https://x.dev/docs/{i}" for i in range(100)]
+    assert {kind for kind, _ in first + rest} == {"page"}
+
+
+def test_sitemap_parser_reads_indexes():
+    parser = SitemapParser()
+
+    entries = parser.feed(_index("https://x.dev/a.xml", "https://x.dev/b.xml.gz")) + parser.close()
+
+    assert entries == [("sitemap", "https://x.dev/a.xml"), ("sitemap", "https://x.dev/b.xml.gz")]
+
+
+def test_is_sitemap():
+    assert is_sitemap(_urlset("https://x.dev/a"))
+    assert is_sitemap(b"\xef\xbb\xbf  <urlset>")
+    assert is_sitemap(gzip.compress(b"<urlset/>"))
+    assert not is_sitemap(b"# Docs\n- [A](https://x.dev/a)\n")
+
+
+@pytest.mark.asyncio
+async def test_nested_llms_txt_is_followed_once():
+    site = {
+        "https://x.dev/llms.txt": (
+            b"# X\n- [Intro](https://x.dev/intro.md)\n"
+            b"- [Python SDK](https://x.dev/python/llms.txt)\n"
+            b"- [Again](https://x.dev/llms.txt)\n"
+        ),
+        "https://x.dev/python/llms.txt": (
+            b"- [Install](https://x.dev/python/install.md)\n- [Intro](https://x.dev/intro.md)\n"
+            b"- [Gone](https://x.dev/gone/llms.txt)\n"
+        ),
+    }
+
+    links = await _collect("https://x.dev/llms.txt", site)
+
+    # The cycle back to the root is ignored, the missing nested index skipped
+    assert links == [("Intro", "https://x.dev/intro.md"), ("Install", "https://x.dev/python/install.md")]
+
+
+@pytest.mark.asyncio
+async def test_nesting_depth_is_limited():
+    site = {
+        "https://x.dev/llms.txt": b"- [A](https://x.dev/a.md)\n- [N](https://x.dev/n/llms.txt)\n",
+        "https://x.dev/n/llms.txt": b"- [B](https://x.dev/b.md)\n",
+    }
+
+    assert [url for _, url in await _collect("https://x.dev/llms.txt", site, max_depth=0)] == ["https://x.dev/a.md"]
+
+
+@pytest.mark.asyncio
+async def test_llms_full_txt_is_a_page():
+    fetched: list[str] = []
+    site = {"https://x.dev/llms.txt": b"- [Everything](https://x.dev/llms-full.txt)\n- [A](https://x.dev/a.md)\n"}
+
+    links = [link async for link in discover("https://x.dev/llms.txt", _fake_fetch(site, fetched))]
+
+    assert links == [("Everything", "https://x.dev/llms-full.txt"), ("A", "https://x.dev/a.md")]
+    assert fetched == ["https://x.dev/llms.txt"]
+    assert await _collect("https://x.dev/llms-full.txt", {}) == [("llms-full.txt", "https://x.dev/llms-full.txt")]
+
+
+@pytest.mark.asyncio
+async def test_sitemap_index_with_gzipped_and_truncated_sitemaps():
+    site = {
+        "https://x.dev/sitemap.xml": _index(
+            "https://x.dev/docs.xml.gz", "https://x.dev/broken.xml", "https://x.dev/missing.xml"
+        ),
+        "https://x.dev/docs.xml.gz": gzip.compress(_urlset("https://x.dev/docs/a/", "https://x.dev/docs/b")),
+        "https://x.dev/broken.xml": _urlset("https://x.dev/c", "https://x.dev/docs/b", "https://x.dev/d")[:-40],
+    }
+
+    links = await _collect("https://x.dev/sitemap.xml", site)
+
+    assert links == [("a", "https://x.dev/docs/a/"), ("b", "https://x.dev/docs/b"), ("c", "https://x.dev/c")]
+
+
+def test_gzipped_sitemap_is_decompressed_completely():
+    body = _urlset(*(f"https://x.dev/docs/{i}" for i in range(20000)))
+    assert len(body) > 8 * discovery._PARSE_CHUNK
+
+    chunks = list(_sitemap_chunks(gzip.compress(body)))
+
+    assert b"".join(chunks) == body
+    assert max(len(chunk) for chunk in chunks) <= discovery._PARSE_CHUNK
+
+
+def test_gzipped_sitemap_is_capped(monkeypatch):
+    monkeypatch.setattr(discovery, "MAX_SITEMAP_BYTES", 100_000)
+    body = _urlset(*(f"https://x.dev/docs/{i}" for i in range(20000)))
+
+    produced = sum(len(chunk) for chunk in _sitemap_chunks(gzip.compress(body)))
+
+    assert 100_000 <= produced < 100_000 + discovery._PARSE_CHUNK
+
+
+@pytest.mark.asyncio
+async def test_discovery_is_lazy():
+    fetched: list[str] = []
+    site = {
+        "https://x.dev/llms.txt": b"- [A](https://x.dev/a.md)\n- [N](https://x.dev/n/llms.txt)\n",
+        "https://x.dev/n/llms.txt": b"- [B](https://x.dev/b.md)\n",
+    }
+    links = discover("https://x.dev/llms.txt", _fake_fetch(site, fetched))
+
+    assert await anext(links) == ("A", "https://x.dev/a.md")
+    assert fetched == ["https://x.dev/llms.txt"]
+    await links.aclose()
+
+
+@pytest.mark.asyncio
+async def test_root_failure_is_raised():
+    with pytest.raises(urllib.error.URLError):
+        await _collect("https://x.dev/llms.txt", {})
+
+
+@pytest.mark.asyncio
+async def test_only_sitemaps_are_fetched_with_the_sitemap_size_limit(monkeypatch):
+    site = {
+        "https://x.dev/llms.txt": b"- [Sitemap](https://x.dev/sitemap.xml)\n- [Nested](https://x.dev/n/llms.txt)\n",
+        "https://x.dev/n/llms.txt": b"- [B](https://x.dev/b.md)\n",
+        "https://x.dev/sitemap.xml": _index("https://x.dev/docs.xml.gz"),
+        "https://x.dev/docs.xml.gz": gzip.compress(_urlset("https://x.dev/a")),
+    }
+    limits: dict[str, int] = {}
+
+    async def fetch(url: str, revalidate: bool = False, validators=None, max_bytes: int = server.MAX_BYTES):
+        limits[url] = max_bytes
+        return server._Response(url, site[url], "digest", None)
+
+    monkeypatch.setattr(server, "_fetch", fetch)
+
+    # A sitemap linked from llms.txt is a page, not an index, so start from the sitemap too
+    links = [link async for link in server.discover_links("https://x.dev/llms.txt")]
+    links += [link async for link in server.discover_links("https://x.dev/sitemap.xml")]
+
+    assert ("a", "https://x.dev/a") in links and ("B", "https://x.dev/b.md") in links
+    raised = max(server.MAX_BYTES, discovery.MAX_SITEMAP_BYTES)
+    assert limits == {
+        "https://x.dev/llms.txt": server.MAX_BYTES,
+        "https://x.dev/n/llms.txt": server.MAX_BYTES,
+        "https://x.dev/sitemap.xml": raised,
+        "https://x.dev/docs.xml.gz": raised,
+    }
@@ -0,0 +1,145 @@
+"""Tests for fetch_pages' concurrency limits and result order, against slow local HTTP servers."""
+
+import http.server
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from mcp_document_fetcher import server
+from mcp_document_fetcher.politeness import PolitenessScheduler
+from mcp_document_fetcher.transport import ConnectionPool
+
+
+class _InFlight:
+    """Counts requests in flight per server port and overall, keeping the peaks."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.current: dict[int, int] = {}
+        self.peak: dict[int, int] = {}
+        self.total = 0
+        self.peak_total = 0
+
+    def enter(self, port: int) -> None:
+        with self.lock:
+            self.current[port] = self.current.get(port, 0) + 1
+            self.peak[port] = max(self.peak.get(port, 0), self.current[port])
+            self.total += 1
+            self.peak_total = max(self.peak_total, self.total)
+
+    def leave(self, port: int) -> None:
+        with self.lock:
+            self.current[port] -= 1
+            self.total -= 1
+
+
+class _SlowHandler(http.server.BaseHTTPRequestHandler):
+    """Serves a distinct page per path after sleeping for ?delay= seconds (default 0.1)."""
+
+    protocol_version = "HTTP/1.1"
+    in_flight = _InFlight()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        port = self.server.server_port
+        self.in_flight.enter(port)
+        try:
+            parts = urlsplit(self.path)
+            time.sleep(float(parse_qs(parts.query).get("delay", ["0.1"])[0]))
+            body = f"<title>{parts.path}</title><p>Page {parts.path} on port {port}.</p>".encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            self.in_flight.leave(port)
+
+
+@pytest.fixture
+def hosts(monkeypatch):
+    """Two slow local servers (two hosts, as their ports differ) with politeness and caches out of the way."""
+    _SlowHandler.in_flight = _InFlight()
+    monkeypatch.setattr(server, "SCHEDULER", PolitenessScheduler(0, 1))
+    monkeypatch.setattr(server, "TRANSPORT", ConnectionPool())
+    monkeypatch.setattr(server, "HTTP_CACHE", None)
+    monkeypatch.setattr(server, "SEARCH_INDEX", None)
+    servers = [http.server.ThreadingHTTPServer(("127.0.0.1", 0), _SlowHandler) for _ in range(2)]
+    for httpd in servers:
+        httpd.daemon_threads = True
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield [f"http://127.0.0.1:{httpd.server_port}" for httpd in servers]
+    for httpd in servers:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("max_concurrency, per_host_concurrency", [(3, 2), (8, 2), (3, 8), (1, 1)])
+async def test_peak_requests_in_flight_stay_within_limits(hosts, max_concurrency, per_host_concurrency):
+    prefix = f"peak-{max_concurrency}-{per_host_concurrency}"
+    links = [(f"Page {i}", f"{host}/{prefix}/{i}") for i in range(6) for host in hosts]
+
+    pages = await server.fetch_pages(links, max_concurrency, per_host_concurrency)
+
+    assert not [page.content for page in pages if page.content.startswith("Error")]
+    in_flight = _SlowHandler.in_flight
+    ports = [urlsplit(host).port for host in hosts]
+    # Both limits are reached (the per-host one unless the global one is tighter), and never exceeded
+    peaks = [in_flight.peak[port] for port in ports]
+    assert max(peaks) <= per_host_concurrency
+    if per_host_concurrency < max_concurrency:
+        assert peaks == [per_host_concurrency] * 2
+    assert in_flight.peak_total == min(max_concurrency, 2 * per_host_concurrency)
+
+
+@pytest.mark.asyncio
+async def test_slow_host_does_not_hold_every_slot(hosts):
+    slow, fast = hosts
+    links = [(f"Slow {i}", f"{slow}/held/{i}?delay=0.5") for i in range(4)]
+    links += [(f"Fast {i}", f"{fast}/free/{i}?delay=0") for i in range(4)]
+
+    start = time.monotonic()
+    fast_done: list[float] = []
+
+    async def on_page(index: int, page: server.Page) -> None:
+        if page.url.startswith(fast):
+            fast_done.append(time.monotonic() - start)
+
+    await server.fetch_pages(links, max_concurrency=4, per_host_concurrency=2, on_page=on_page)
+
+    # The fast host's pages finish while the slow host's first two are still in flight
+    assert len(fast_done) == 4 and max(fast_done) < 0.5
+
+
+@pytest.mark.asyncio
+async def test_pages_come_back_in_input_order(hosts):
+    # Later links answer sooner, so completion order is the reverse of input order
+    links = [(f"Page {i}", f"{hosts[i % 2]}/order/{i}?delay={0.1 * (6 - i)}") for i in range(6)]
+    completed: list[int] = []
+
+    async def on_page(index: int, page: server.Page) -> None:
+        completed.append(index)
+
+    pages = await server.fetch_pages(links, max_concurrency=6, per_host_concurrency=3, on_page=on_page)
+
+    assert [page.url for page in pages] == [url for _, url in links]
+    assert [page.title for page in pages] == [f"/order/{i}" for i in range(6)]
+    assert completed == [5, 4, 3, 2, 1, 0]
+
+
+@pytest.mark.asyncio
+async def test_pages_from_an_async_iterable_come_back_in_input_order(hosts):
+    links = [(f"Page {i}", f"{hosts[i % 2]}/stream/{i}?delay={0.05 * (4 - i)}") for i in range(4)]
+
+    async def discovered():
+        for link in links:
+            yield link
+
+    pages = await server.fetch_pages(discovered(), max_concurrency=4, per_host_concurrency=2)
+
+    assert [page.url for page in pages] == [url for _, url in links]
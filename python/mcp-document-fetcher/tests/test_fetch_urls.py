@@ -0,0 +1,84 @@
+"""Tests for the fetch_urls batch tool, with page fetches stubbed out."""
+
+import asyncio
+
+import pytest
+
+from mcp_document_fetcher import server
+from mcp_document_fetcher.server import Page
+
+PAGES = {
+    "https://a.dev/one": Page(
+        url="https://a.dev/one", title="One", content="First page.", digest="1" * 64, content_hash="h1", simhash=0
+    ),
+    "https://a.dev/two": Page(
+        url="https://a.dev/two",
+        title="Two",
+        content="Second page.",
+        digest="2" * 64,
+        content_hash="h2",
+        simhash=2**64 - 1,
+    ),
+    # Same content as /one under another URL
+    "https://b.dev/one": Page(
+        url="https://b.dev/one", title="One", content="First page.", digest="1" * 64, content_hash="h1", simhash=0
+    ),
+}
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+    async def fetch_unique(url: str) -> Page:
+        if url.endswith("/slow"):
+            await asyncio.sleep(10)
+        if url.endswith("/missing"):
+            raise OSError("HTTP Error 404: Not Found")
+        if url.endswith("/stalled"):
+            raise TimeoutError("connect timed out")
+        return PAGES[url]
+
+    monkeypatch.setattr(server, "_fetch_unique", fetch_unique)
+
+
+async def _fetch_urls(**arguments) -> list[str]:
+    return [block.text for block in await server._call_tool("fetch_urls", arguments)]
+
+
+@pytest.mark.asyncio
+async def test_results_and_errors_in_request_order(fetches):
+    urls = [
+        "https://a.dev/two",
+        "https://a.dev/missing",
+        "https://a.dev/one",
+        "https://b.dev/one",
+        "https://a.dev/slow",
+    ]
+
+    header, *entries = await _fetch_urls(urls=urls, timeout=0.05)
+
+    assert header == "# Fetched 3 of 5 URLs (2 failed, 1 duplicates collapsed)\n\n"
+    assert [entry.split("\n")[2] for entry in entries] == [f"URL: {url}" for url in urls]
+    assert "Second page." in entries[0]
+    assert "Error: HTTP Error 404: Not Found" in entries[1]
+    assert "First page." in entries[2]
+    assert "Duplicate of: https://a.dev/one" in entries[3] and "First page." not in entries[3]
+    assert "Error: timed out after 0.05 s" in entries[4]
+
+
+@pytest.mark.asyncio
+async def test_timeouts_raised_by_a_fetch_become_error_pages(fetches):
+    # Without a batch timeout, a TimeoutError from the fetch itself is one failed page
+    header, first, second = await _fetch_urls(urls=["https://a.dev/stalled", "https://a.dev/one"])
+
+    assert header == "# Fetched 1 of 2 URLs (1 failed)\n\n"
+    assert "Error: connect timed out" in first
+    assert "First page." in second
+
+
+@pytest.mark.asyncio
+async def test_too_many_urls_are_rejected(fetches, monkeypatch):
+    monkeypatch.setattr(server, "MAX_BATCH_URLS", 2)
+
+    result = await _fetch_urls(urls=["https://a.dev/one"] * 3)
+
+    assert result == ["Error fetching URLs: more than 2 URLs"]
@@ -0,0 +1,101 @@
+"""CPU budget tests: cleaning and link/heading parsing must stay linear on hostile input.
+
+Every case used to be quadratic (or worse) in the input size; at SIZE bytes
+the old code took from several seconds to minutes, so a fixed budget makes
+a regression obvious without being sensitive to machine speed.
+"""
+
+import random
+import time
+
+import pytest
+
+from mcp_document_fetcher.chunking import markdown_headings
+from mcp_document_fetcher.cleaning import body_kind, strip_front_matter
+from mcp_document_fetcher.discovery import _MD_LINK, markdown_links
+from mcp_document_fetcher.html_text import extract
+
+SIZE = 256 * 1024
+# CPU seconds any SIZE-byte input may take
+BUDGET = 1.5
+
+HOSTILE_HTML = {
+    "unclosed_comments": "<!--",
+    "unclosed_tags": "<a",
+    "bogus_end_tags": "</",
+    "processing_instructions": "<?",
+    "declarations": "<!",
+    "bare_brackets": "<",
+    "unclosed_attributes": '<a b="',
+    "many_attributes": " x=1",
+    "script_end_prefixes": "<script></scrip",
+    "entities": "&#x",
+}
+
+HOSTILE_MARKDOWN = {
+    "heading_padding": "# a" + " #" * (SIZE // 2) + "x",
+    "open_links": "[a](http://" * (SIZE // 11),
+    "open_brackets": "[" * SIZE,
+    "open_titles": '[a](http://x "' * (SIZE // 14),
+}
+
+HOSTILE_SNIFF = {
+    "comments": b"<!--a-->" * (SIZE // 8),
+    "unclosed_comments": b"<!--" * (SIZE // 4),
+    "unclosed_front_matter": b"---\n" + b"--- x\n" * (SIZE // 6),
+    "front_matter_titles": b"---\n" + b"title: '\n" * (SIZE // 10) + b"---\n",
+}
+
+_FRAGMENTS = [
+    "<", "</", "<!--", "-->", "<!", "<?", ">", "<a", "<script>", "</script", " x=", '"', "'", "&", "&#", "p", "\n"
+]
+
+
+def _cpu_seconds(func, *args) -> float:
+    start = time.process_time()
+    func(*args)
+    return time.process_time() - start
+
+
+def _chunks(text: str, size: int) -> list[str]:
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("chunk_size", [SIZE, 64 * 1024])
+@pytest.mark.parametrize("unit", HOSTILE_HTML.values(), ids=HOSTILE_HTML.keys())
+def test_html_cleaning_is_linear(unit: str, chunk_size: int):
+    html = unit * (SIZE // len(unit))
+    assert _cpu_seconds(extract, _chunks(html, chunk_size)) < BUDGET
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_markup_soup(seed: int):
+    rng = random.Random(seed)
+    html = "".join(rng.choice(_FRAGMENTS) for _ in range(SIZE // 3))
+
+    assert _cpu_seconds(extract, _chunks(html, 64 * 1024)) < BUDGET
+    # Chunk boundaries never change the output
+    small = html[:4096]
+    assert extract(_chunks(small, 7)).text == extract([small]).text
+
+
+@pytest.mark.parametrize("text", HOSTILE_MARKDOWN.values(), ids=HOSTILE_MARKDOWN.keys())
+def test_markdown_parsing_is_linear(text: str):
+    assert _cpu_seconds(markdown_headings, text) < BUDGET
+    assert _cpu_seconds(lambda: list(_MD_LINK.finditer(text))) < BUDGET
+
+
+@pytest.mark.parametrize("body", HOSTILE_SNIFF.values(), ids=HOSTILE_SNIFF.keys())
+def test_content_sniffing_is_linear(body: bytes):
+    assert _cpu_seconds(body_kind, "https://x.dev/page", body, None) < BUDGET
+    assert _cpu_seconds(strip_front_matter, body.decode()) < BUDGET
+
+
+def test_markdown_links_and_headings():
+    text = '# Docs ##\n- [Intro](https://x.dev/intro.md): start\n- [API](https://x.dev/api.md "Reference")\n# #\n'
+
+    assert markdown_links(text) == [
+        ("Intro", "https://x.dev/intro.md"),
+        ("API", "https://x.dev/api.md"),
+    ]
+    assert [(level, title) for _, level, title in markdown_headings(text)] == [(1, "Docs"), (1, "#")]
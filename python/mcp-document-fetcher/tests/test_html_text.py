@@ -0,0 +1,75 @@
+"""Golden-corpus tests for the single-pass HTML to text converter.
+
+The expected .txt files and titles.json were produced by the original
+regex-based cleaner; the streaming extractor must reproduce them exactly,
+however the input is split into chunks.
+"""
+
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from mcp_document_fetcher.html_text import HtmlTextExtractor, HtmlTokenizer, extract
+
+GOLDEN = Path(__file__).parent / "golden"
+PAGES = sorted(GOLDEN.glob("*.html"))
+TITLES = json.loads((GOLDEN / "titles.json").read_text(encoding="utf-8"))
+
+
+def _chunks(text: str, size: int) -> list[str]:
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096, 1 << 30])
+@pytest.mark.parametrize("page", PAGES, ids=lambda p: p.stem)
+def test_matches_golden_output(page: Path, chunk_size: int):
+    raw = page.read_bytes().decode("utf-8")
+    expected = page.with_suffix(".txt").read_bytes().decode("utf-8")
+
+    extractor = extract(_chunks(raw, chunk_size))
+
+    assert extractor.text == expected
+    assert extractor.title == TITLES[page.stem]
+
+
+def test_title_priority():
+    extractor = extract(['<meta property="og:title" content="OG"><h1>Heading</h1>'])
+    assert extractor.title == "OG"
+
+    extractor = extract(["<body><h1>Hello <code>world</code></h1></body>"])
+    assert extractor.title == "Hello  world"
+
+
+def test_skipped_blocks_hold_no_text():
+    extractor = HtmlTextExtractor()
+    extractor.feed("<p>a</p><scr")
+    extractor.feed("ipt>var s = '<p>hidden</p>';</script><style>p{}</style><noscript><b>x</b></noscript>b")
+    extractor.close()
+    assert extractor.text == "a b"
+
+
+_SOUP = [
+    "text", " ", "\n", "\r\n", "&amp;", "&lt", "&#", "<p>", "</p>", "<div class=\"a b\">", "<a href='/x?y=1&amp;z'>",
+    "<img src=x alt=\"<\">", "<br/>", "<input disabled />", "<a b=c=\">\">", "<h1>", "</h1>", "<h2 id=s>",
+    "</h2>", "<title>", "</title>", "<meta property=\"og:title\" content=\"OG\">", "<script>", "</script>",
+    "<style>", "</style>", "<noscript>", "</noscript>", "<!-- c -->", "<!doctype html>", "<", ">", "\"", "'",
+    "=", "/", "<a", "</", "<P CLASS=x>", "</DIV >",
+]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_bulk_runs_match_per_tag_handling(seed: int, monkeypatch):
+    rng = random.Random(seed)
+    html = "".join(rng.choice(_SOUP) for _ in range(2000))
+    fast = extract(_chunks(html, 1 << 30))
+    fast_chunked = extract(_chunks(html, 61))
+
+    monkeypatch.setattr(HtmlTextExtractor, "_run", HtmlTokenizer._run)
+    slow = extract(_chunks(html, 1 << 30))
+
+    for extractor in (fast, fast_chunked):
+        assert extractor.text == slow.text
+        assert (extractor.html_title, extractor.og_title, extractor.h1) == (slow.html_title, slow.og_title, slow.h1)
+        assert extractor.headings == slow.headings
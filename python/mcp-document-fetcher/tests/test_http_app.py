@@ -0,0 +1,83 @@
+"""Tests for the streamable HTTP/SSE app."""
+
+from mcp.server import Server
+from mcp.types import TextContent, Tool
+from starlette.testclient import TestClient
+
+from mcp_document_fetcher.http_app import build_app
+from mcp_document_fetcher.metrics import Registry
+
+_HEADERS = {"Accept": "application/json, text/event-stream", "Content-Type": "application/json"}
+
+
+def _server() -> Server:
+    server = Server("test")
+
+    @server.list_tools()
+    async def list_tools() -> list[Tool]:
+        return [Tool(name="echo", description="Echo", inputSchema={"type": "object", "properties": {}})]
+
+    @server.call_tool()
+    async def call_tool(name, arguments) -> list[TextContent]:
+        return [TextContent(type="text", text=name)]
+
+    return server
+
+
+def _initialize(client: TestClient) -> str:
+    response = client.post(
+        "/mcp/",
+        headers=_HEADERS,
+        json={
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "initialize",
+            "params": {
+                "protocolVersion": "2025-03-26",
+                "capabilities": {},
+                "clientInfo": {"name": "test", "version": "0"},
+            },
+        },
+    )
+    assert response.status_code == 200
+    assert '"serverInfo"' in response.text
+    return response.headers["mcp-session-id"]
+
+
+def test_streamable_http_session():
+    with TestClient(build_app(_server())) as client:
+        session = _initialize(client)
+        headers = {**_HEADERS, "mcp-session-id": session}
+        client.post("/mcp/", headers=headers, json={"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+        response = client.post("/mcp/", headers=headers, json={"jsonrpc": "2.0", "id": 2, "method": "tools/list"})
+
+        assert response.status_code == 200
+        assert '"name":"echo"' in response.text
+
+
+def test_health_and_metrics_endpoints():
+    registry = Registry(otel=False)
+    registry.counter("calls_total", "Calls").inc()
+
+    with TestClient(build_app(_server(), metrics=registry)) as client:
+        assert client.get("/healthz").text == "ok\n"
+        response = client.get("/metrics")
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "calls_total 1\n" in response.text
+
+    with TestClient(build_app(_server())) as client:
+        assert client.get("/metrics").status_code == 404
+
+
+def test_shutdown_hook_runs_when_the_app_stops():
+    closed = []
+
+    async def on_shutdown():
+        closed.append(True)
+
+    with TestClient(build_app(_server(), on_shutdown=on_shutdown)) as client:
+        _initialize(client)
+        assert closed == []
+
+    assert closed == [True]
@@ -0,0 +1,130 @@
+"""Tests for the persistent HTTP cache: freshness, revalidation, blob sharing and eviction."""
+
+import email.utils
+from email.message import Message
+
+import pytest
+
+from mcp_document_fetcher.http_cache import HttpCache, freshness_lifetime
+
+NOW = 1_700_000_000.0
+
+
+def _headers(**fields: str) -> Message:
+    headers = Message()
+    for name, value in fields.items():
+        headers[name.replace("_", "-")] = value
+    return headers
+
+
+def _date(timestamp: float) -> str:
+    return email.utils.formatdate(timestamp, usegmt=True)
+
+
+def _blobs(cache: HttpCache) -> list[str]:
+    return sorted(path.name for path in (cache.directory / "objects").rglob("*") if path.is_file())
+
+
+def test_freshness_lifetime():
+    assert freshness_lifetime(_headers(Cache_Control="max-age=600"), NOW) == 600
+    assert freshness_lifetime(_headers(Cache_Control="public, max-age=600", Age="100"), NOW) == 500
+    # max-age wins over Expires
+    assert freshness_lifetime(_headers(Cache_Control="max-age=60", Expires=_date(NOW + 3600)), NOW) == 60
+    assert freshness_lifetime(_headers(Date=_date(NOW), Expires=_date(NOW + 300)), NOW) == 300
+    assert freshness_lifetime(_headers(Expires="0"), NOW) == 0
+    assert freshness_lifetime(_headers(Cache_Control="no-cache, max-age=600"), NOW) == 0
+    assert freshness_lifetime(_headers(Cache_Control="no-store"), NOW) is None
+    # Heuristic: a tenth of the time since Last-Modified
+    assert freshness_lifetime(_headers(Date=_date(NOW), Last_Modified=_date(NOW - 1000)), NOW) == 100
+    assert freshness_lifetime(_headers(), NOW) == 0
+
+
+def test_store_and_lookup(tmp_path):
+    cache = HttpCache(tmp_path, 1024)
+    headers = _headers(Cache_Control="max-age=600", Content_Type="text/html", ETag='"v1"')
+
+    entry = cache.store("https://a.dev/", b"<p>hi</p>", headers)
+
+    cached = cache.lookup("https://a.dev/")
+    assert cached == entry and cached.is_fresh()
+    assert cached.content_type == "text/html"
+    assert cache.read_body(cached) == b"<p>hi</p>"
+    assert cache.lookup("https://a.dev/other") is None
+
+
+def test_uncacheable_responses_are_not_stored(tmp_path):
+    cache = HttpCache(tmp_path, 1024)
+
+    assert cache.store("https://a.dev/a", b"x", _headers(Cache_Control="no-store")) is None
+    # Neither fresh nor revalidatable
+    assert cache.store("https://a.dev/b", b"x", _headers()) is None
+    assert cache.store("https://a.dev/c", b"x" * 2000, _headers(Cache_Control="max-age=60")) is None
+    assert cache.lookup("https://a.dev/a") is None
+
+
+def test_revalidation_refreshes_stored_headers(tmp_path):
+    cache = HttpCache(tmp_path, 1024)
+    entry = cache.store("https://a.dev/", b"body", _headers(Cache_Control="no-cache", ETag='"v1"'))
+    assert not entry.is_fresh()
+    assert entry.conditional_headers() == {"If-None-Match": '"v1"'}
+
+    refreshed = cache.revalidated(entry, _headers(Cache_Control="max-age=600", ETag='"v2"', Last_Modified="Mon"))
+
+    stored = cache.lookup("https://a.dev/")
+    assert stored == refreshed and stored.is_fresh()
+    assert stored.conditional_headers() == {"If-None-Match": '"v2"', "If-Modified-Since": "Mon"}
+    assert cache.read_body(stored) == b"body"
+
+
+def test_identical_bodies_share_one_blob(tmp_path):
+    cache = HttpCache(tmp_path, 1024)
+    headers = _headers(Cache_Control="max-age=600")
+
+    first = cache.store("https://a.dev/a", b"same", headers)
+    second = cache.store("https://a.dev/b", b"same", headers)
+    assert first.digest == second.digest
+    assert _blobs(cache) == [first.digest]
+
+    # The blob survives while another URL still refers to it
+    cache.store("https://a.dev/a", b"changed", headers)
+    assert first.digest in _blobs(cache)
+    cache.store("https://a.dev/b", b"changed", headers)
+    assert first.digest not in _blobs(cache)
+    assert len(_blobs(cache)) == 1
+
+
+def test_least_recently_used_blobs_are_evicted_by_size(tmp_path, monkeypatch):
+    cache = HttpCache(tmp_path, 250)
+    headers = _headers(Cache_Control="max-age=600")
+    clock = iter(range(1, 100))
+    monkeypatch.setattr("mcp_document_fetcher.http_cache.time.time", lambda: NOW + next(clock))
+
+    cache.store("https://a.dev/1", b"1" * 100, headers)
+    cache.store("https://a.dev/2", b"2" * 100, headers)
+    # Reading /1 makes /2 the least recently used
+    cache.read_body(cache.lookup("https://a.dev/1"))
+    cache.store("https://a.dev/3", b"3" * 100, headers)
+
+    assert cache.lookup("https://a.dev/2") is None
+    assert cache.lookup("https://a.dev/1") is not None
+    assert cache.lookup("https://a.dev/3") is not None
+    assert len(_blobs(cache)) == 2
+
+
+def test_failed_store_leaves_no_open_transaction(tmp_path, monkeypatch):
+    cache = HttpCache(tmp_path, 1024)
+    headers = _headers(Cache_Control="max-age=600")
+    cache.store("https://a.dev/", b"old", headers)
+
+    def fail(db, digest):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(cache, "_release", fail)
+    with pytest.raises(OSError):
+        cache.store("https://a.dev/", b"new", headers)
+    monkeypatch.undo()
+
+    # Rolled back: the old entry is intact and later stores still work
+    assert cache.read_body(cache.lookup("https://a.dev/")) == b"old"
+    cache.store("https://a.dev/", b"newer", headers)
+    assert cache.read_body(cache.lookup("https://a.dev/")) == b"newer"
@@ -0,0 +1,95 @@
+"""Tests for the command line entry point and the cap on concurrent tool calls."""
+
+import asyncio
+
+import pytest
+from mcp.types import TextContent
+
+from mcp_document_fetcher import server
+
+
+class _MetricsServer:
+    def __init__(self):
+        self.stopped = False
+
+    def shutdown(self):
+        self.stopped = True
+
+
+@pytest.fixture
+def started(monkeypatch):
+    """What main starts, recorded instead of served; TOOL_SLOTS is restored afterwards."""
+    calls = []
+
+    async def run_stdio():
+        calls.append(("stdio",))
+
+    def run_http(host: str, port: int):
+        calls.append(("http", host, port))
+
+    def serve_metrics(registry, host: str, port: int):
+        metrics_server = _MetricsServer()
+        calls.append(("metrics", registry, host, port, metrics_server))
+        return metrics_server
+
+    monkeypatch.setattr(server, "_run_stdio", run_stdio)
+    monkeypatch.setattr(server, "_run_http", run_http)
+    monkeypatch.setattr(server, "serve_metrics", serve_metrics)
+    monkeypatch.setattr(server, "CLEAN_POOL", None)
+    monkeypatch.setattr(server, "TOOL_SLOTS", None)
+    return calls
+
+
+def test_defaults_serve_stdio(started):
+    server.main([])
+
+    assert started == [("stdio",)]
+    assert server.TOOL_SLOTS._value == server.MAX_CONCURRENT_CALLS
+
+
+def test_http_transport_with_metrics_sidecar(started):
+    server.main("--transport http --host 0.0.0.0 --port 9001 --metrics-port 9100 --max-concurrent-calls 3".split())
+
+    (_, registry, host, port, metrics_server), http = started
+    assert (registry, host, port) == (server.METRICS, server.METRICS_HOST, 9100)
+    assert http == ("http", "0.0.0.0", 9001)
+    assert server.TOOL_SLOTS._value == 3
+    # The sidecar is stopped once the server returns
+    assert metrics_server.stopped
+
+
+def test_zero_max_concurrent_calls_means_no_limit(started):
+    server.main(["--max-concurrent-calls", "0"])
+
+    assert server.TOOL_SLOTS is None
+
+
+@pytest.mark.parametrize("argv", [["--transport", "sse"], ["--port", "http"], ["--max-concurrent-calls", "many"]])
+def test_invalid_arguments_are_rejected(started, argv):
+    with pytest.raises(SystemExit):
+        server.main(argv)
+
+    assert started == []
+
+
+def test_concurrent_tool_calls_are_capped(started, monkeypatch):
+    running = peak = 0
+
+    async def call_tool(name, arguments):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return [TextContent(type="text", text=name)]
+
+    monkeypatch.setattr(server, "_call_tool", call_tool)
+    server.main(["--max-concurrent-calls", "2"])
+
+    async def calls():
+        return await asyncio.gather(*(server.call_tool(f"tool-{i}", {}) for i in range(6)))
+
+    results = asyncio.run(calls())
+
+    assert [result[0].text for result in results] == [f"tool-{i}" for i in range(6)]
+    assert peak == 2
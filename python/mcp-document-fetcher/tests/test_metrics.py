@@ -0,0 +1,91 @@
+"""Tests for the metrics registry and its Prometheus endpoint."""
+
+import urllib.error
+import urllib.request
+
+import pytest
+
+from mcp_document_fetcher import metrics
+from mcp_document_fetcher.metrics import Registry, serve_metrics
+
+
+def test_counters_and_histograms_render_prometheus_text():
+    registry = Registry(otel=False)
+    errors = registry.counter("errors_total", "Errors", ("host",))
+    seconds = registry.histogram("stage_seconds", "Stage time", ("stage",), buckets=(0.1, 1.0))
+
+    errors.inc(host="a.dev")
+    errors.inc(2, host='b"dev')
+    seconds.observe(0.05, stage="clean")
+    seconds.observe(0.5, stage="clean")
+    seconds.observe(5, stage="clean")
+    with seconds.time(stage="format"):
+        pass
+
+    text = registry.render()
+
+    assert "# TYPE errors_total counter" in text
+    assert 'errors_total{host="a.dev"} 1\n' in text
+    assert 'errors_total{host="b\\"dev"} 2\n' in text
+    assert "# TYPE stage_seconds histogram" in text
+    assert 'stage_seconds_bucket{stage="clean",le="0.1"} 1\n' in text
+    assert 'stage_seconds_bucket{stage="clean",le="1"} 2\n' in text
+    assert 'stage_seconds_bucket{stage="clean",le="+Inf"} 3\n' in text
+    assert 'stage_seconds_sum{stage="clean"} 5.55\n' in text
+    assert 'stage_seconds_count{stage="format"} 1\n' in text
+    assert seconds.summary()[("clean",)] == (3, 5.55)
+
+
+def test_series_beyond_the_limit_are_folded(monkeypatch):
+    monkeypatch.setattr(metrics, "MAX_SERIES", 2)
+    counter = Registry(otel=False).counter("bytes_total", "Bytes", ("host",))
+
+    for host in ("a", "b", "c", "d", "a"):
+        counter.inc(host=host)
+
+    assert counter.values() == {("a",): 2, ("b",): 1, ("_other",): 2}
+
+
+def test_collectors_are_read_at_render_time():
+    registry = Registry(otel=False)
+    stats = {"hits": 1}
+    registry.collector(lambda: [("cache_hits_total", "Hits", [({"cache": "page"}, stats["hits"])])])
+
+    stats["hits"] = 7
+
+    assert 'cache_hits_total{cache="page"} 7\n' in registry.render()
+
+
+def test_otel_mirroring_is_optional():
+    pytest.importorskip("opentelemetry.metrics")
+    registry = Registry(otel=True)
+    registry.collector(lambda: [("cache_hits_total", "Hits", [({"cache": "page"}, 1)])])
+    counter = registry.counter("errors_total", "Errors", ("host",))
+
+    # Without an OTEL SDK the instruments are no-ops; local values still count
+    counter.inc(host="a.dev")
+
+    assert counter.values() == {("a.dev",): 1}
+
+
+def test_metrics_endpoint():
+    registry = Registry(otel=False)
+    registry.counter("requests_total", "Requests").inc()
+    server = serve_metrics(registry, "127.0.0.1", 0)
+    try:
+        base = f"http://127.0.0.1:{server.server_port}"
+        with urllib.request.urlopen(base + "/metrics", timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert b"requests_total 1\n" in response.read()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(base + "/other", timeout=5)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_process_age_counts_from_process_start():
+    age = metrics.process_age()
+
+    # The test run itself has been going for a while, but not for an hour
+    assert 0 < age < 3600
@@ -0,0 +1,99 @@
+"""Tests for the in-memory page cache: TTL expiry, LRU eviction and counters."""
+
+from dataclasses import dataclass, field
+
+import pytest
+
+from mcp_document_fetcher import page_cache
+from mcp_document_fetcher.chunking import Chunk
+from mcp_document_fetcher.page_cache import PageCache, _page_size
+
+
+@dataclass
+class FakePage:
+    url: str
+    title: str = ""
+    content: str = ""
+    chunks: list[Chunk] = field(default_factory=list)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(page_cache.time, "monotonic", clock)
+    return clock
+
+
+def _page(name: str, size: int) -> FakePage:
+    url = f"https://x.dev/{name}"
+    return FakePage(url=url, content="x" * (size - len(url)))
+
+
+def test_page_size_counts_chunks():
+    page = FakePage(url="u", title="t", content="c" * 10)
+    bare = _page_size(page)
+    page.chunks = [Chunk(id="a" * 16, index=0, heading="Intro > Setup", start=0, end=10, tokens=3)]
+    assert _page_size(page) == bare + 16 + len("Intro > Setup") + page_cache._CHUNK_OVERHEAD
+
+
+def test_hit_and_miss_counters(clock):
+    cache = PageCache(max_bytes=1000, ttl=60)
+    page = _page("a", 100)
+    assert cache.get(page.url, "d1") is None
+    cache.put(page.url, "d1", page)
+    assert cache.get(page.url, "d1") is page
+    assert cache.get(page.url, "d2") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"], stats["bytes"]) == (1, 2, 1, 100)
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = PageCache(max_bytes=1000, ttl=60)
+    page = _page("a", 100)
+    cache.put(page.url, "d", page)
+    clock.now += 59
+    assert cache.get(page.url, "d") is page
+    clock.now += 1
+    assert cache.get(page.url, "d") is None
+    stats = cache.stats()
+    assert (stats["evictions"], stats["entries"], stats["bytes"]) == (1, 0, 0)
+
+
+def test_lru_eviction_is_bounded_by_bytes(clock):
+    cache = PageCache(max_bytes=300, ttl=60)
+    a, b, c, d = (_page(name, 100) for name in "abcd")
+    for page in (a, b, c):
+        cache.put(page.url, "d", page)
+    assert cache.get(a.url, "d") is a  # a is now the most recently used
+    cache.put(d.url, "d", d)
+    assert cache.get(b.url, "d") is None
+    assert all(cache.get(page.url, "d") is page for page in (a, c, d))
+    stats = cache.stats()
+    assert (stats["evictions"], stats["bytes"]) == (1, 300)
+
+
+def test_replacing_an_entry_does_not_double_count(clock):
+    cache = PageCache(max_bytes=300, ttl=60)
+    page = _page("a", 100)
+    cache.put(page.url, "d", page)
+    cache.put(page.url, "d", page)
+    assert cache.stats()["bytes"] == 100
+
+
+def test_oversize_pages_are_not_cached(clock):
+    cache = PageCache(max_bytes=300, ttl=60)
+    small, big = _page("small", 100), _page("big", 301)
+    cache.put(small.url, "d", small)
+    cache.put(big.url, "d", big)
+    assert cache.get(big.url, "d") is None
+    assert cache.get(small.url, "d") is small
+    stats = cache.stats()
+    assert (stats["evictions"], stats["entries"], stats["bytes"]) == (0, 1, 100)
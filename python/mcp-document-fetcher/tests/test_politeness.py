@@ -0,0 +1,79 @@
+"""Tests for the per-host politeness scheduler."""
+
+import asyncio
+import time
+
+import pytest
+
+from mcp_document_fetcher import server
+from mcp_document_fetcher.politeness import PolitenessScheduler, parse_retry_after, robots_delay
+
+ROBOTS = """
+User-agent: Googlebot
+Crawl-delay: 9
+
+User-agent: MCP-DocumentFetcher
+User-agent: other
+Disallow: /private
+Crawl-delay: 0.5  # seconds
+Request-rate: 1/2s
+
+User-agent: *
+Crawl-delay: 1
+"""
+
+
+def test_robots_delay_picks_matching_group():
+    assert robots_delay(ROBOTS, "MCP-DocumentFetcher") == 2.0
+    assert robots_delay(ROBOTS, "SomeBot") == 1.0
+    assert robots_delay("User-agent: *\nCrawl-delay: 0.25\n", "x") == 0.25
+    assert robots_delay("User-agent: *\nDisallow: /\n", "x") is None
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:10 GMT", now=1445412480.0) == 10.0
+    assert parse_retry_after("soon") is None
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_each_host_separately():
+    scheduler = PolitenessScheduler(rate=20, burst=2)
+
+    start = time.monotonic()
+    for _ in range(6):
+        await scheduler.acquire("https://a.example/page")
+    await scheduler.acquire("https://b.example/page")
+
+    # Two burst tokens, then four more at 20/s; host b is not delayed by a
+    assert 0.18 <= time.monotonic() - start < 0.5
+
+
+@pytest.mark.asyncio
+async def test_robots_crawl_delay_and_retry_after():
+    async def fetch_robots(origin: str) -> str | None:
+        return "User-agent: *\nCrawl-delay: 0.1\n" if origin == "https://slow.example" else None
+
+    scheduler = PolitenessScheduler(rate=100, burst=10, fetch_robots=fetch_robots)
+
+    start = time.monotonic()
+    for _ in range(3):
+        await scheduler.acquire("https://slow.example/")
+    assert time.monotonic() - start >= 0.18
+
+    assert scheduler.throttled("https://fast.example/", "0")
+    assert not scheduler.throttled("https://fast.example/", "3600")
+    assert scheduler._hosts["fast.example"].rate < 100
+
+
+@pytest.mark.asyncio
+async def test_slow_robots_txt_times_out_as_allow(monkeypatch):
+    async def download(url: str, headers: dict[str, str], max_bytes: int):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(server, "_download", download)
+    monkeypatch.setattr(server, "ROBOTS_TIMEOUT", 0.05)
+
+    start = time.monotonic()
+    assert await server._fetch_robots_txt("https://slow.example") is None
+    assert time.monotonic() - start < 1
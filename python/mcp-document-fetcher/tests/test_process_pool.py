@@ -0,0 +1,41 @@
+"""Tests for CPU quota detection and the cleaning process pool."""
+
+import pytest
+
+from mcp_document_fetcher.cleaning import clean_body
+from mcp_document_fetcher.process_pool import ProcessPool, available_cpus, cpu_quota
+
+PAGE = b"<html><head><title>Guide</title></head><body><h1>Guide</h1>" + b"<p>Some text.</p>\n" * 200 + b"</body></html>"
+
+
+def test_cpu_quota_cgroup_v2(tmp_path):
+    (tmp_path / "cpu.max").write_text("150000 100000\n")
+    assert cpu_quota(tmp_path) == 1.5
+
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert cpu_quota(tmp_path) is None
+
+
+def test_cpu_quota_cgroup_v1(tmp_path):
+    (tmp_path / "cpu,cpuacct").mkdir()
+    (tmp_path / "cpu,cpuacct" / "cpu.cfs_quota_us").write_text("400000\n")
+    (tmp_path / "cpu,cpuacct" / "cpu.cfs_period_us").write_text("100000\n")
+    assert cpu_quota(tmp_path) == 4.0
+
+    (tmp_path / "cpu,cpuacct" / "cpu.cfs_quota_us").write_text("-1\n")
+    assert cpu_quota(tmp_path) is None
+    assert cpu_quota(tmp_path / "missing") is None
+
+
+def test_available_cpus_is_positive():
+    assert available_cpus() >= 1
+
+
+@pytest.mark.asyncio
+async def test_pool_cleans_like_in_process():
+    pool = ProcessPool(1)
+    try:
+        args = ("https://example.com/guide", PAGE, "utf-8", "d" * 64, 64, 8)
+        assert await pool.run(clean_body, *args) == clean_body(*args)
+    finally:
+        pool.close()
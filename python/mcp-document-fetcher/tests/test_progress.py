@@ -0,0 +1,95 @@
+"""Tests for MCP progress notifications, through an in-memory client session."""
+
+import pytest
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from mcp_document_fetcher import server
+from mcp_document_fetcher.server import Page
+
+# Fingerprints far apart, so no page is a near duplicate of another
+PAGES = {
+    url: Page(url=url, title=title, content=f"{title} page.", digest=str(i) * 64, content_hash=f"h{i}", simhash=simhash)
+    for i, (title, url, simhash) in enumerate(
+        [
+            ("One", "https://p.dev/one", 0),
+            ("Two", "https://p.dev/two", 2**64 - 1),
+            ("Three", "https://p.dev/three", 0x5555_5555_5555_5555),
+        ],
+        1,
+    )
+}
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+    async def fetch_unique(url: str) -> Page:
+        return PAGES[url]
+
+    async def discover_links(url: str, revalidate: bool = False):
+        for page in PAGES.values():
+            yield page.title, page.url
+
+    monkeypatch.setattr(server, "_fetch_unique", fetch_unique)
+    monkeypatch.setattr(server, "discover_links", discover_links)
+    monkeypatch.setattr(server, "SEARCH_INDEX", None)
+
+
+@pytest.fixture
+def reporters(monkeypatch):
+    """Every callback _progress_reporter returns during the test."""
+    returned = []
+    progress_reporter = server._progress_reporter
+
+    def record():
+        returned.append(progress_reporter())
+        return returned[-1]
+
+    monkeypatch.setattr(server, "_progress_reporter", record)
+    return returned
+
+
+async def _call_with_progress(name: str, arguments: dict) -> tuple[list[str], list[tuple[float, float | None, str]]]:
+    notifications = []
+
+    async def on_progress(progress: float, total: float | None, message: str | None) -> None:
+        notifications.append((progress, total, message))
+
+    async with create_connected_server_and_client_session(server.app) as client:
+        result = await client.call_tool(name, arguments, progress_callback=on_progress)
+    return [block.text for block in result.content], notifications
+
+
+@pytest.mark.asyncio
+async def test_fetch_urls_reports_each_page(fetches, reporters):
+    urls = list(PAGES)
+
+    _, notifications = await _call_with_progress("fetch_urls", {"urls": urls})
+
+    assert [(progress, total) for progress, total, _ in notifications] == [(1, 3), (2, 3), (3, 3)]
+    # Each notification carries that page's summary, so the client can show it before the call returns
+    assert sorted(message.split("\n")[2] for _, _, message in notifications) == sorted(f"URL: {url}" for url in urls)
+    assert reporters[0] is not None
+
+
+@pytest.mark.asyncio
+async def test_fetch_documentation_reports_each_page(fetches, reporters):
+    result, notifications = await _call_with_progress("fetch_documentation", {"llms_txt_url": "https://p.dev/llms.txt"})
+
+    assert result[0] == "# Documentation (fetched 3 pages, 0 duplicates collapsed)\n\n"
+    assert [progress for progress, _, _ in notifications] == [1, 2, 3]
+    # The total is only known once the index has been read
+    assert notifications[-1][1] in (None, 3)
+    assert all(message.startswith("## ") for _, _, message in notifications)
+
+
+@pytest.mark.asyncio
+async def test_no_reporter_without_a_progress_token(fetches, reporters):
+    async with create_connected_server_and_client_session(server.app) as client:
+        result = await client.call_tool("fetch_urls", {"urls": list(PAGES)})
+
+    assert result.content[0].text == "# Fetched 3 of 3 URLs (0 failed)\n\n"
+    assert reporters == [None]
+
+
+def test_no_reporter_outside_a_request():
+    assert server._progress_reporter() is None
@@ -0,0 +1,108 @@
+"""Tests for reading response bodies up to the size limit and detecting their charset."""
+
+import codecs
+from email.message import Message
+
+import pytest
+
+from mcp_document_fetcher import server
+
+
+class _FakeResponse:
+    """A transport response serving a fixed body, counting the bytes read from it."""
+
+    def __init__(self, body: bytes, content_length: int | None = None, content_type: str = "text/html"):
+        self.status = 200
+        self.headers = Message()
+        self.headers["Content-Type"] = content_type
+        if content_length is not None:
+            self.headers["Content-Length"] = str(content_length)
+        self.consumed = 0
+        self._body = body
+
+    async def read(self, amt: int) -> bytes:
+        chunk, self._body = self._body[:amt], self._body[amt:]
+        self.consumed += len(chunk)
+        return chunk
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "size, truncated",
+    [(0, False), (100, False), (server.CHUNK_SIZE, False), (250_000, False), (250_001, True), (1_000_000, True)],
+)
+async def test_body_is_cut_at_max_bytes(size, truncated):
+    body = bytes(i % 251 for i in range(size))
+    r = _FakeResponse(body)
+
+    read, was_truncated = await server._read_body(r, 250_000)
+
+    assert read == body[:250_000]
+    assert was_truncated is truncated
+    # Never reads more than one byte past the limit
+    assert r.consumed == min(size, 250_001)
+
+
+@pytest.mark.asyncio
+async def test_content_length_over_the_limit_marks_the_body_truncated_up_front():
+    # The server announces more than the limit; whatever arrives is kept
+    r = _FakeResponse(b"x" * 100, content_length=5_000)
+
+    body, truncated = await server._read_body(r, 1_000)
+
+    assert body == b"x" * 100
+    assert truncated
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("content_length", ["1000", "999", "", "bogus"])
+async def test_content_length_within_the_limit_is_not_truncated(content_length):
+    r = _FakeResponse(b"x" * 100)
+    r.headers["Content-Length"] = content_length
+
+    assert await server._read_body(r, 1_000) == (b"x" * 100, False)
+
+
+@pytest.mark.asyncio
+async def test_truncated_page_carries_a_note(monkeypatch):
+    async def polite_download(url: str, headers: dict[str, str], max_bytes: int = server.MAX_BYTES):
+        r = _FakeResponse(b"<title>Big</title><p>The start of a huge page.</p>", content_length=max_bytes + 1)
+        body, truncated = await server._read_body(r, max_bytes)
+        return body, truncated, r.headers, r.status
+
+    monkeypatch.setattr(server, "_polite_download", polite_download)
+
+    [block] = await server._call_tool("fetch_url", {"url": "https://big.dev/truncated"})
+
+    assert block.text.startswith("# Big\n\nURL: https://big.dev/truncated\n\n")
+    assert "The start of a huge page." in block.text
+    assert block.text.endswith(f"\n\n[Truncated: response exceeded {server.MAX_BYTES} bytes]")
+
+
+@pytest.mark.parametrize(
+    "content_type, body, charset",
+    [
+        # Content-Type wins over a BOM and a <meta charset>
+        ("text/html; charset=ISO-8859-1", codecs.BOM_UTF8 + b'<meta charset="koi8-r">', "iso8859-1"),
+        # Then a BOM, over a <meta charset>
+        ("text/html", codecs.BOM_UTF8 + b'<meta charset="koi8-r">', "utf-8-sig"),
+        ("text/html", codecs.BOM_UTF16_LE + "<p>hi</p>".encode("utf-16-le"), "utf-16"),
+        ("text/html", codecs.BOM_UTF16_BE + "<p>hi</p>".encode("utf-16-be"), "utf-16"),
+        # Then a <meta charset> or http-equiv within the first 1024 bytes
+        (None, b"<html><head><meta charset='windows-1252'>", "cp1252"),
+        ("text/html", b'<meta http-equiv="Content-Type" content="text/html; charset=Shift_JIS">', "shift_jis"),
+        ("text/html", b" " * 1000 + b"<meta charset=koi8-r>", "koi8-r"),
+        ("text/html", b" " * 1024 + b"<meta charset=koi8-r>", "utf-8"),
+        # Unknown names fall back to UTF-8
+        ("text/html; charset=no-such-charset", b"<p>hi</p>", "utf-8"),
+        ("text/html", b"<meta charset=no-such-charset>", "utf-8"),
+        (None, b"<p>hi</p>", "utf-8"),
+    ],
+)
+def test_charset_order(content_type, body, charset):
+    assert server._Response("https://a.dev/", body, "digest", content_type).charset == charset
+
+
+def test_text_is_decoded_with_the_detected_charset():
+    body = b"<meta charset=windows-1252><p>\x93quoted\x94</p>"
+    assert server._Response("https://a.dev/", body, "digest", "text/html").text().endswith("<p>“quoted”</p>")
@@ -0,0 +1,84 @@
+"""Tests for retry classification, backoff and hedged requests."""
+
+import asyncio
+import time
+import urllib.error
+
+import pytest
+
+from mcp_document_fetcher.retry import LatencyTracker, RetryPolicy, hedged, is_transient
+
+
+def test_is_transient():
+    assert is_transient(urllib.error.URLError(ConnectionResetError()))
+    assert is_transient(urllib.error.URLError(TimeoutError("timed out")))
+    assert is_transient(urllib.error.HTTPError("u", 502, "Bad Gateway", None, None))
+    assert not is_transient(urllib.error.HTTPError("u", 404, "Not Found", None, None))
+    assert not is_transient(urllib.error.HTTPError("u", 503, "Unavailable", None, None))
+    assert not is_transient(urllib.error.URLError("unknown url type"))
+    assert not is_transient(ValueError())
+
+
+def test_backoff_is_jittered_and_capped():
+    policy = RetryPolicy(5, base_delay=1.0, max_delay=4.0)
+
+    delays = [policy.backoff(retry) for retry in (1, 2, 3, 10) for _ in range(50)]
+
+    assert all(0 <= d <= 4.0 for d in delays)
+    assert max(policy.backoff(1) for _ in range(50)) <= 1.0
+    assert len(set(delays)) > 1
+
+
+def test_latency_percentile_needs_samples():
+    tracker = LatencyTracker(window=100, min_samples=10)
+    for i in range(9):
+        tracker.record("a", i / 100)
+    assert tracker.percentile("a", 95) is None
+
+    for i in range(9, 100):
+        tracker.record("a", i / 100)
+    assert tracker.percentile("a", 95) == 0.95
+    assert tracker.percentile("b", 95) is None
+
+
+@pytest.mark.asyncio
+async def test_hedge_wins_over_stalled_request():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return "slow"
+
+    async def fast():
+        return "fast"
+
+    start = time.monotonic()
+    assert await hedged(slow, fast, 0.05) == "fast"
+    assert time.monotonic() - start < 1
+    await asyncio.sleep(0)
+    assert cancelled
+
+
+@pytest.mark.asyncio
+async def test_no_hedge_when_primary_is_quick_or_fails():
+    calls = []
+
+    async def quick():
+        return "quick"
+
+    async def failing():
+        raise ConnectionResetError()
+
+    async def backup():
+        calls.append(True)
+        return "backup"
+
+    assert await hedged(quick, backup, 0.5) == "quick"
+    assert await hedged(quick, backup, None) == "quick"
+    with pytest.raises(ConnectionResetError):
+        await hedged(failing, backup, 0.5)
+    assert not calls
@@ -0,0 +1,92 @@
+"""Tests for the FTS5 search index: ranking, passages, re-indexing and query escaping."""
+
+import pytest
+
+from mcp_document_fetcher.chunking import chunk_text, markdown_headings
+from mcp_document_fetcher.search_index import SearchIndex
+
+STREAMING = """# Streaming
+
+Streaming responses arrive token by token. Enable streaming with stream=True.
+
+## Errors
+
+Retry streaming requests that fail with a server error.
+"""
+
+INSTALL = """# Installation
+
+Install the SDK with pip. Streaming is covered elsewhere.
+"""
+
+
+def _add(index: SearchIndex, url: str, title: str, content: str, digest: str) -> bool:
+    chunks = chunk_text(url, digest, content, markdown_headings(content), 64, 8)
+    return index.add(url, title, content, digest, chunks, content_hash=digest, simhash=0)
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SearchIndex(tmp_path / "search.sqlite3")
+    _add(index, "https://a.dev/streaming", "Streaming guide", STREAMING, "d1")
+    _add(index, "https://a.dev/install", "Install guide", INSTALL, "d2")
+    return index
+
+
+def test_indexes_pages_as_chunks(index):
+    assert index.page_count() == 2
+    assert index.urls() == ["https://a.dev/install", "https://a.dev/streaming"]
+    chunks = index.page_chunks("https://a.dev/streaming")
+    assert [chunk.heading for chunk in chunks] == ["Streaming", "Streaming > Errors"]
+
+    hits = index.get_chunks([chunks[1].id, "unknown", chunks[0].id])
+
+    assert [hit.chunk_id for hit in hits] == [chunks[1].id, chunks[0].id]
+    assert hits[0].passage == STREAMING[chunks[1].start : chunks[1].end]
+    assert hits[0].title == "Streaming guide" and hits[0].score == 0
+
+
+def test_search_ranks_by_bm25(index):
+    hits = index.search("streaming token", k=5)
+
+    assert [hit.heading for hit in hits][:1] == ["Streaming"]
+    assert {hit.url for hit in hits} == {"https://a.dev/streaming", "https://a.dev/install"}
+    assert [hit.score for hit in hits] == sorted(hit.score for hit in hits)
+    # Stemming: "installing" matches "Install"
+    assert [hit.url for hit in index.search("installing")] == ["https://a.dev/install"]
+    assert len(index.search("streaming", k=1)) == 1
+    assert index.search("nonexistentword") == []
+
+
+def test_changed_digest_replaces_the_page(index):
+    old_ids = [chunk.id for chunk in index.page_chunks("https://a.dev/install")]
+
+    assert _add(index, "https://a.dev/install", "Install guide", INSTALL, "d2") is False
+    assert _add(index, "https://a.dev/install", "Setup guide", "# Setup\n\nUse conda instead.\n", "d3") is True
+
+    assert index.page_count() == 2
+    assert index.get_chunks(old_ids) == []
+    assert index.search("pip") == []
+    [hit] = index.search("conda")
+    assert hit.title == "Setup guide" and hit.heading == "Setup"
+
+
+@pytest.mark.parametrize(
+    "query",
+    ['"streaming', "streaming -errors", "streaming NEAR errors", "NEAR(streaming errors)", "streaming* OR errors:"],
+)
+def test_fts5_syntax_in_queries_is_treated_as_words(index, query):
+    # Quotes, "-", NEAR, prefixes and column filters are not operators: any word matches
+    headings = {hit.heading for hit in index.search(query)}
+
+    assert {"Streaming", "Streaming > Errors"} <= headings
+
+
+def test_operator_words_alone_match_literally(index):
+    assert index.search("NEAR") == []
+    assert index.search("AND OR NOT") == []
+
+
+def test_queries_without_words_return_nothing(index):
+    assert index.search('"" -- ()') == []
+    assert index.search("") == []
@@ -0,0 +1,114 @@
+"""Tests for writing and reading document snapshots."""
+
+import pytest
+
+from mcp_document_fetcher.chunking import Chunk
+from mcp_document_fetcher.snapshot import CODEC_ZLIB, CODEC_ZSTD, Snapshot, SnapshotPage, SnapshotWriter, snapshot_path
+
+
+def _page(i: int, **kwargs) -> SnapshotPage:
+    content = f"# Page {i}\n\nBody of page {i} with ünïcode. " * 20
+    return SnapshotPage(
+        url=f"https://x.dev/docs/{i}",
+        title=f"Page {i}",
+        content=content,
+        digest=f"{i:064x}",
+        content_hash=f"h{i}",
+        simhash=(1 << 63) + i,
+        chunks=[Chunk(f"c{i}-0", 0, f"Page {i}", 0, 20, 5), Chunk(f"c{i}-1", 1, "", 20, len(content), 100)],
+        **kwargs,
+    )
+
+
+def _write(path, pages, codec=CODEC_ZLIB) -> int:
+    writer = SnapshotWriter(path, codec)
+    for page in pages:
+        writer.add(page)
+    return writer.close()
+
+
+@pytest.mark.parametrize("codec", [CODEC_ZLIB, CODEC_ZSTD])
+def test_round_trip(tmp_path, codec):
+    if codec == CODEC_ZSTD:
+        pytest.importorskip("zstandard")
+    path = tmp_path / "docs.snapshot"
+    # Added out of order: lookups binary-search the sorted URL column
+    pages = [_page(i, truncated=i == 3) for i in (5, 1, 12, 3, 0)]
+
+    assert _write(path, pages, codec) == 5
+
+    snapshot = Snapshot(path)
+    try:
+        assert len(snapshot) == 5
+        assert snapshot.urls() == sorted(page.url for page in pages)
+        for page in pages:
+            assert snapshot.get(page.url) == page
+        assert snapshot.get("https://x.dev/docs/2") is None
+        assert "https://x.dev/docs/12" in snapshot
+        assert snapshot.stats()["hits"] == 5
+    finally:
+        snapshot.close()
+
+
+def test_duplicate_urls_keep_the_first(tmp_path):
+    writer = SnapshotWriter(tmp_path / "s")
+    assert writer.add(_page(1))
+    assert not writer.add(SnapshotPage(url="https://x.dev/docs/1", title="Other", content=""))
+    writer.close()
+
+    snapshot = Snapshot(tmp_path / "s")
+    assert snapshot.get("https://x.dev/docs/1").title == "Page 1"
+    snapshot.close()
+
+
+def test_empty_snapshot(tmp_path):
+    assert _write(tmp_path / "s", []) == 0
+
+    snapshot = Snapshot(tmp_path / "s")
+    assert len(snapshot) == 0 and snapshot.get("https://x.dev/") is None
+    snapshot.close()
+
+
+def test_nothing_is_published_until_close(tmp_path):
+    path = tmp_path / "s"
+    writer = SnapshotWriter(path)
+    writer.add(_page(1))
+    assert not path.exists()
+
+    writer.abort()
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_invalid_files_are_rejected(tmp_path):
+    path = tmp_path / "s"
+    _write(path, [_page(i) for i in range(3)])
+    data = path.read_bytes()
+
+    (tmp_path / "garbage").write_bytes(b"not a snapshot" * 20)
+    with pytest.raises(ValueError, match="not a document snapshot"):
+        Snapshot(tmp_path / "garbage")
+
+    (tmp_path / "truncated").write_bytes(data[: len(data) - 10])
+    with pytest.raises(ValueError, match="Corrupt column"):
+        Snapshot(tmp_path / "truncated")
+
+    # A damaged frame fails on lookup, not on open
+    frame = data.index(b"x\xda")
+    (tmp_path / "damaged").write_bytes(data[:frame] + b"\0" * 8 + data[frame + 8 :])
+    snapshot = Snapshot(tmp_path / "damaged")
+    with pytest.raises(ValueError, match="Corrupt page frame"):
+        [snapshot.get(url) for url in snapshot.urls()]
+    snapshot.close()
+
+
+def test_snapshot_paths_stay_inside_the_directory(tmp_path):
+    root = tmp_path / "snapshots"
+    root.mkdir()
+    (root / "escape").symlink_to(tmp_path)
+
+    assert snapshot_path(root, "docs.snap") == root / "docs.snap"
+    assert snapshot_path(root, "team/docs.snap") == root / "team" / "docs.snap"
+    for name in ("", ".", "../outside.snap", "team/../../outside.snap", "/etc/passwd", str(tmp_path / "x"), "escape/x"):
+        with pytest.raises(ValueError):
+            snapshot_path(root, name)
@@ -0,0 +1,46 @@
+"""Import-time budget of the server module, measured with python -X importtime."""
+
+import os
+import subprocess
+import sys
+
+# Summed self time of this package's modules when the console script imports the
+# server (the mcp stack itself is not counted). Generous for slow CI machines; a
+# module-level TLS context or an eager heavy import on its own blows it.
+IMPORT_BUDGET_MS = float(os.environ.get("MCP_DOCFETCH_IMPORT_BUDGET_MS", "50"))
+# Modules only the code paths needing them import (uvicorn is not listed: mcp imports it)
+DEFERRED_MODULES = ("mcp_document_fetcher.discovery", "mcp_document_fetcher.http_app", "xml.etree.ElementTree")
+
+
+def _import_times(tmp_path) -> dict[str, int]:
+    """Self time in microseconds of every module imported with the server."""
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path), "MCP_DOCFETCH_CACHE_DIR": str(tmp_path)}
+    # Let the first run write bytecode, as an installed package has it
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import mcp_document_fetcher.server"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line and "self [us]" not in line:
+            self_us, _, name = line[len("import time:") :].split("|")
+            times[name.strip()] = int(self_us)
+    return times
+
+
+def test_server_import_stays_within_budget(tmp_path):
+    runs = [_import_times(tmp_path) for _ in range(3)]
+    own = min(sum(us for name, us in times.items() if name.startswith("mcp_document_fetcher")) for times in runs)
+
+    assert own / 1000 <= IMPORT_BUDGET_MS, f"importing the server took {own / 1000:.1f} ms"
+
+
+def test_heavy_modules_are_imported_on_first_use(tmp_path):
+    times = _import_times(tmp_path)
+
+    assert "mcp_document_fetcher.server" in times
+    assert [name for name in DEFERRED_MODULES if name in times] == []